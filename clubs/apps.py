@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ClubsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clubs'
+
+    def ready(self):
+        # Connect the signal receivers invalidating cached fragments
+        from clubs import signals
@@ -0,0 +1,151 @@
+"""Prefix searches serving the autocomplete endpoints, over per-process indexes of whole tables or over a few loaded objects."""
+from bisect import bisect_left
+import threading
+
+from clubs.fragment_cache import get_version, bump_version
+from clubs.models import Club, PrefixIndexWord
+
+# Version counter key shared by every row of an indexed model, bumped when an indexed column changes
+INDEX_VERSION_KEY = 'prefix_index'
+
+# Largest number of rows indexed in memory, bigger tables are searched with range queries of their stored word starts instead
+MAX_INDEX_ROWS = 500000
+
+def get_word_starts(value):
+    """Return the lowercased value from the start of each of its words, so 'doe' finds 'John Doe'."""
+    value = (value or '').lower()
+    starts = []
+    start = 0
+    while start < len(value):
+        starts.append(value[start:])
+        start = value.find(' ', start) + 1
+        if start == 0:
+            break
+    return starts
+
+def search_objects(objects, fields, prefix, limit):
+    """Return the ids of up to `limit` of the objects with a word starting with the prefix, in the order of PrefixIndex.search."""
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    matches = []
+    for obj in objects:
+        words = [word for field in fields for word in get_word_starts(getattr(obj, field)) if word.startswith(prefix)]
+        if words:
+            matches.append((min(words), obj.pk))
+    return [pk for word, pk in sorted(matches)[:limit]]
+
+class PrefixIndex:
+    """Sorted array of the lowercased words of some text columns of a model, rebuilt when the model's index version changes.
+
+    The version is kept in the database, so a write in any process makes every process rebuild its
+    index. A lookup finding the index out of date never waits for the rebuild: it is answered by the database,
+    and the index is rebuilt once the response has been sent, by rebuild_stale_indexes() in clubs.signals.
+    The database keeps the same word starts as PrefixIndexWord rows, so both answer every lookup alike.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.label = model._meta.label_lower
+        self.fields = fields
+        self.version = None
+        self.stale_version = None
+        self.indexed = False
+        self.keys = []
+        self.ids = []
+        self.lock = threading.Lock()
+
+    def invalidate(self, update_fields=None):
+        """Make every process rebuild its index after its next lookup, unless only unindexed columns were saved."""
+        if update_fields is not None and not set(update_fields) & set(self.fields):
+            return
+        bump_version(self.model, INDEX_VERSION_KEY)
+
+    def get_words(self, rows):
+        """Return the PrefixIndexWord rows of every word start of the indexed columns of rows given as (id, *columns) tuples."""
+        return [
+            PrefixIndexWord(model=self.label, object_id=row[0], word=word)
+            for row in rows for value in row[1:] for word in get_word_starts(value)
+        ]
+
+    def update(self, obj, update_fields=None, deleted=False):
+        """Replace the stored word starts of a saved object, or drop those of a deleted one, and invalidate the index."""
+        if update_fields is not None and not set(update_fields) & set(self.fields):
+            return
+        PrefixIndexWord.objects.filter(model=self.label, object_id=obj.pk).delete()
+        if not deleted:
+            PrefixIndexWord.objects.bulk_create(self.get_words([(obj.pk, *(getattr(obj, field) for field in self.fields))]))
+        self.invalidate()
+
+    def reindex(self):
+        """Store the word starts of every row again, after rows were written without sending signals."""
+        PrefixIndexWord.objects.filter(model=self.label).delete()
+        PrefixIndexWord.objects.bulk_create(self.get_words(self.model.objects.values_list('id', *self.fields).iterator()))
+
+    def build(self):
+        """Load the indexed columns and sort every word start of them, or return False if the table is too big to index in memory."""
+        if self.model.objects.count() > MAX_INDEX_ROWS:
+            self.keys, self.ids = [], []
+            return False
+        entries = []
+        for row in self.model.objects.values_list('id', *self.fields).iterator():
+            pk, values = row[0], row[1:]
+            for value in values:
+                entries.extend((word, pk) for word in get_word_starts(value))
+        entries.sort()
+        self.keys, self.ids = [key for key, pk in entries], [pk for key, pk in entries]
+        return True
+
+    def is_ready(self):
+        """Return whether the in-memory index is up to date, or else schedule its rebuild."""
+        version = get_version(self.model, INDEX_VERSION_KEY)
+        if version != self.version:
+            self.stale_version = version
+            return False
+        return self.indexed
+
+    def rebuild(self):
+        """Rebuild the index if a lookup found it out of date since its last rebuild."""
+        if self.stale_version is None or not self.lock.acquire(blocking=False):
+            return
+        try:
+            # The version is read before the rows, so a write during the build only causes another rebuild
+            version, self.stale_version = self.stale_version, None
+            self.indexed = self.build()
+            self.version = version
+        finally:
+            self.lock.release()
+
+    def search(self, prefix, limit):
+        """Return the ids of up to `limit` rows with a word starting with the prefix, in alphabetical order of the matching words."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        if not self.is_ready():
+            return self.search_database(prefix, limit)
+
+        ids = []
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix) and len(ids) < limit:
+            if self.ids[position] not in ids:
+                ids.append(self.ids[position])
+            position += 1
+        return ids
+
+    def get_word_range(self, prefix):
+        """Return the stored word starts beginning with the prefix, as a range of their index sorted like the in-memory index."""
+        # LIKE is case-insensitive on SQLite, so it cannot use an index, but a range of the lowercased words can
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return PrefixIndexWord.objects.filter(model=self.label, word__gte=prefix, word__lt=end).order_by('word', 'object_id')
+
+    def search_database(self, prefix, limit):
+        """Return the ids of up to `limit` rows with a word starting with the prefix, in the order of search()."""
+        ids = []
+        for pk in self.get_word_range(prefix).values_list('object_id', flat=True).iterator():
+            if pk not in ids:
+                ids.append(pk)
+                if len(ids) == limit:
+                    break
+        return ids
+
+club_index = PrefixIndex(Club, ['name'])
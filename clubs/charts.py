@@ -0,0 +1,46 @@
+"""Downsampling of chart series so long histories can be drawn from a few hundred points."""
+
+
+def largest_triangle_three_buckets(points, threshold):
+    """Downsample a list of (x, y) points to at most threshold points, keeping the series' visual shape.
+
+    The first and last points are always kept. The points in between are split into threshold - 2 buckets,
+    and from each bucket the point forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+    """
+    if threshold < 3:
+        raise ValueError('At least 3 points are needed to keep the first, last and one bucket point.')
+    if threshold >= len(points):
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket, or the last point for the final bucket
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        if next_start >= next_end:
+            next_start, next_end = len(points) - 1, len(points)
+        next_points = points[next_start:next_end]
+        average_x = sum(x for x, _ in next_points) / len(next_points)
+        average_y = sum(y for _, y in next_points) / len(next_points)
+
+        previous_x, previous_y = points[previous]
+        largest_area = -1
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((previous_x - average_x) * (y - previous_y) - (previous_x - x) * (average_y - previous_y))
+            if area > largest_area:
+                largest_area = area
+                selected = index
+
+        sampled.append(points[selected])
+        previous = selected
+
+    sampled.append(points[-1])
+    return sampled
@@ -1,7 +1,9 @@
 """Forms for the clubs app."""
 from django import forms
+from django.core.exceptions import NON_FIELD_ERRORS
 from django.core.validators import RegexValidator
 from .models import User, Membership, Club, Tournament
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 class LogInForm(forms.Form):
     """Form enabling registered users to log in."""
@@ -116,24 +118,25 @@ class MembershipApplicationForm(forms.ModelForm):
         model = Membership
         fields = ['club', 'user', 'personal_statement']
         widgets = {
+            'club': AutocompleteSelect('autocomplete_clubs'),
             'user': forms.HiddenInput(attrs = {'is_hidden': True}),
             'personal_statement': forms.Textarea(),
         }
+        # Applications to a club already applied to fail the (user, club) uniqueness check of validate_unique()
+        error_messages = {
+            NON_FIELD_ERRORS: {'unique_together': 'You have already applied to this club.'},
+        }
 
     def __init__(self, *args, **kwargs):
         """Change label for selector """
         super(MembershipApplicationForm, self).__init__(*args, **kwargs)
         self.fields['club'].label_from_instance = lambda instance: instance.name
 
-        """Querying database and retrieving all clubs which a user can apply for (ie: all clubs the user is not a member, officer, or owner at)"""
         if (self.initial.get('user') != None):
-            self.queryset = Club.objects.exclude(id__in = Membership.objects.filter(user = self.initial['user'].id).values('club'))
             self.data['user'] = self.initial['user']
-        else:
-            self.queryset = Club.objects.exclude(id__in = Membership.objects.filter(user = User.objects.get(id=self.data.get('user'))).values('club'))
 
-        """Displaying all available clubs to the user"""
-        self.fields['club'].queryset = self.queryset
+        # Accepting the id of any club picked from the search or autocomplete, it is looked up by primary key
+        self.fields['club'].queryset = Club.objects.all()
         self.fields['club'].empty_label = None
 
     def clean(self):
@@ -179,7 +182,7 @@ class TournamentCreationForm(forms.ModelForm):
             'description': forms.Textarea(),
             'organizer': forms.HiddenInput(attrs = {'is_hidden': True}),
             'club': forms.HiddenInput(attrs = {'is_hidden': True}),
-            'coorganizers': forms.CheckboxSelectMultiple()
+            'coorganizers': AutocompleteSelectMultiple('autocomplete_users')
         }
 
     def __init__(self, *args, **kwargs):
@@ -190,11 +193,15 @@ class TournamentCreationForm(forms.ModelForm):
             self.data['club'] = self.initial['club']
             self.data['organizer'] = self.initial['organizer']
 
-        """Displaying all officers and owners which can co-organize"""
+        """Suggesting the club's officers and owner as co-organizers as the user types"""
+        club = self.data.get('club')
+        self.fields['coorganizers'].widget.query = {'club': getattr(club, 'pk', club)}
+
+        """Accepting all officers and owners which can co-organize"""
         self.fields['coorganizers'].queryset = User.objects.filter(id__in =
                 Membership.objects.filter(
                     club=self.data.get('club'),
-                    user_type__in = [Membership.UserTypes.OWNER, Membership.UserTypes.OFFICER]
+                    rank__gte = Membership.Ranks.OFFICER
                 )
                 .exclude(user = self.data.get('organizer'))
                 .values('user')
@@ -0,0 +1,24 @@
+"""Per-object version counters used to key cached template fragments.
+
+The versions are kept in a table shared by every worker process, so a write in one of them invalidates the
+fragments cached by all of them, while the fragments themselves stay in each process' cache.
+"""
+import time
+
+from clubs.models.fragments import FragmentVersion
+
+def get_version_key(model, pk):
+    """Return the key of the row holding the version of the given object."""
+    return f'{model._meta.label_lower}:{pk}'
+
+def get_version(model, pk):
+    """Return the current version of the given object, 0 if it was never bumped."""
+    version = FragmentVersion.objects.filter(key=get_version_key(model, pk)).values_list('version', flat=True).first()
+    return version or 0
+
+def bump_version(model, pk):
+    """Invalidate the fragments rendered from the given object by moving it to a new version."""
+    key = get_version_key(model, pk)
+    # A new timestamp rather than an increment, so a counter rolled back with its transaction never reuses a version
+    if not FragmentVersion.objects.filter(key=key).update(version=time.time_ns()):
+        FragmentVersion.objects.get_or_create(key=key, defaults={'version': time.time_ns()})
@@ -1,6 +1,11 @@
+import heapq
+
 from django.conf import settings
+from django.db.models import F, Q
 from django.shortcuts import redirect
 
+from clubs.models import Membership
+
 def login_prohibited(view_function):
     def modified_view_function(request):
         if request.user.is_authenticated:
@@ -9,4 +14,84 @@ def login_prohibited(view_function):
             return view_function(request)
     return modified_view_function
 
+def get_keyset_page(queryset, after=None, page_size=20, key='id'):
+    """Return the query of the page of objects whose key follows `after`, with one more object telling if another page follows."""
+    if after is not None:
+        queryset = queryset.filter(**{f'{key}__gt': after})
+    return queryset.order_by(key)[:page_size + 1]
+
+def keyset_paginate(queryset, after=None, page_size=20, key='id'):
+    """Return the page of objects whose key follows `after`, and the key to continue from (None on the last page)."""
+    page = list(get_keyset_page(queryset, after, page_size, key))
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, getattr(page[-1], key)
+    return page, None
+
+def sorted_keyset_paginate(querysets, sort_key, descending=False, after=None, page_size=20):
+    """Return the page of objects following the object with id `after` when the objects of the querysets are sorted together by `sort_key` then id, and the id to continue from (None on the last page).
+
+    Null sort values come first in ascending order and last in descending order. Each queryset is paged on its own, so it can be read
+    in order from an index, and the pages are merged. The page is empty if `after` is not the id of one of the objects.
+    """
+    lookup = 'lt' if descending else 'gt'
+    if after is not None:
+        # The cursor is the id of the last object of the previous page, its sort value is read back from the database
+        for queryset in querysets:
+            last = queryset.filter(id=after).values(sort_key).first()
+            if last is not None:
+                break
+        else:
+            return [], None
+        value = last[sort_key]
+        if value is None:
+            # In ascending order, every non-null value follows the nulls
+            following = Q(**{f'{sort_key}__isnull': True, f'id__{lookup}': after})
+            if not descending:
+                following |= Q(**{f'{sort_key}__isnull': False})
+        else:
+            # In descending order, the nulls follow every non-null value
+            following = Q(**{f'{sort_key}__{lookup}': value}) | Q(**{sort_key: value, f'id__{lookup}': after})
+            if descending:
+                following |= Q(**{f'{sort_key}__isnull': True})
+        querysets = [queryset.filter(following) for queryset in querysets]
+    ordering = [F(sort_key).desc(nulls_last=True), '-id'] if descending else [F(sort_key).asc(nulls_first=True), 'id']
+    pages = [list(queryset.order_by(*ordering)[:page_size + 1]) for queryset in querysets]
+    sort_value = lambda obj: (getattr(obj, sort_key) is not None, getattr(obj, sort_key), obj.id)
+    page = list(heapq.merge(*pages, key=sort_value, reverse=descending))[:page_size + 1]
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, page[-1].id
+    return page, None
+
+def get_cursor(request, name='after'):
+    """Return the integer keyset cursor passed in the request's query string, if any."""
+    try:
+        return int(request.GET.get(name))
+    except (TypeError, ValueError):
+        return None
+
+def get_user_memberships(user):
+    """Return a dict of club id to membership for every club the user has applied to or joined."""
+    if not user.is_authenticated:
+        return {}
+    memberships = Membership.objects.filter(user=user)
+    return {membership.club_id: membership for membership in memberships}
+
+def get_membership(request, club_id):
+    """Return the logged-in user's membership of the club from the request's membership cache."""
+    if not hasattr(request, 'memberships'):
+        request.memberships = get_user_memberships(request.user)
+    return request.memberships.get(int(club_id))
+
+def get_user_types(request, club_id):
+    """Return the user types of the logged-in user in the club, read from the request's membership cache."""
+    membership = get_membership(request, club_id)
+    return membership.get_user_types() if membership else []
 
+def is_tournament_organizer(request, tournament):
+    """Return whether the logged-in user organizes the tournament, only looking up its co-organizers for the club's officers and owner."""
+    # Tournaments are organized by the club's officers and owner only, see TournamentCreationForm
+    if Membership.UserTypes.OFFICER not in get_user_types(request, tournament.club_id):
+        return False
+    return tournament.organizer_id == request.user.id or tournament.coorganizers.filter(id=request.user.id).exists()
@@ -0,0 +1,233 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clubs.models.clubs import Membership
+from clubs.models.tournaments import Tournament, Match, Group, EloRating
+from clubs.management.commands.seed import Command as SeedCommand
+
+from datetime import timedelta
+from io import StringIO
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+
+class Command(BaseCommand):
+    """The benchmark suite of the hot views and model operations.
+
+    A throwaway database is seeded with a fixed size and seed, so the results of two runs are comparable. Each
+    benchmark first runs once under tracemalloc to count its queries and measure its peak memory, then --repeat
+    times for its wall time, since tracemalloc slows the code it traces. Every run starts from cleared caches and
+    is rolled back, so no run sees the changes of another.
+    """
+
+    DEFAULT_SEED = 0
+    help = 'Times the hot views and model operations, and compares them with a previous run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SeedCommand.PRESETS, default='small', help='Preset size of the seeded dataset')
+        parser.add_argument('--seed', type=int, default=self.DEFAULT_SEED, help='Seed of the seeded dataset')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs of each benchmark')
+        parser.add_argument('--output', help='File the results are written to as JSON')
+        parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+        parser.add_argument('--max-slowdown', type=float, default=1.25, help='Ratio of the baseline median time over which a benchmark is a regression')
+        parser.add_argument('--in-place', action='store_true', help='Benchmark the data of the current database instead of seeding a throwaway one')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        self.in_place = options['in_place']
+        baseline = self.load_baseline(options['baseline']) if options['baseline'] else None
+
+        dataset = {'size': 'in-place'} if options['in_place'] else {'size': options['size'], 'seed': options['seed']}
+        if baseline is not None and baseline['dataset'] != dataset:
+            raise CommandError(f"The baseline was run on the dataset {baseline['dataset']}, not {dataset}.")
+
+        # Run as in production, without the query log of DEBUG, and keep the requests out of the shared metrics
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], METRICS_ENABLED=False):
+            if self.in_place:
+                results = self.run_benchmarks(options['repeat'])
+            else:
+                test_settings = connection.settings_dict.get('TEST', {})
+                with tempfile.TemporaryDirectory() as directory:
+                    old_name = self.create_database(directory)
+                    try:
+                        self.stdout.write(f"Seeding a {options['size']} dataset with --seed {options['seed']}...")
+                        call_command('seed', size=options['size'], seed=options['seed'], simulate_results=True, stdout=StringIO())
+                        results = self.run_benchmarks(options['repeat'])
+                    finally:
+                        connection.creation.destroy_test_db(old_name, verbosity=0)
+                        connection.settings_dict['TEST'] = test_settings
+
+        report = {'dataset': dataset, 'repeat': options['repeat'], 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = self.compare(results, baseline['results'], options['max_slowdown'])
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmarks regressed: {', '.join(regressions)}")
+
+    def load_baseline(self, path):
+        try:
+            with open(path) as baseline:
+                return json.load(baseline)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read the baseline {path}: {error}')
+
+    def create_database(self, directory):
+        """Creates the throwaway database, in a file on SQLite so it is as slow to read as the real one."""
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST'] = {**connection.settings_dict.get('TEST', {}), 'NAME': os.path.join(directory, 'bench.sqlite3')}
+        return connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    def get_benchmarks(self):
+        """Returns the (name, setup) of each benchmark, setup returning the function to time."""
+        membership = Membership.objects.filter(rank__gte=Membership.Ranks.MEMBER).annotate(
+            rating_count=Count('elo_ratings')
+        ).select_related('user', 'club').order_by('-rating_count', 'id').first()
+        if membership is None:
+            raise CommandError('The database has no club members to benchmark with.')
+        club = membership.club
+        tournament = Tournament.objects.filter(club=club).annotate(match_count=Count('matches')).order_by('-match_count', 'id').first()
+        if tournament is None:
+            raise CommandError(f'{club} has no tournaments to benchmark with.')
+        player = Membership.objects.filter(club=club, rank=Membership.Ranks.MEMBER).select_related('user').first()
+        if player is None:
+            raise CommandError(f'{club} has no members to join a tournament with.')
+
+        client = Client()
+        client.force_login(membership.user)
+
+        def view(url_name, **kwargs):
+            url = reverse(url_name, kwargs=kwargs)
+            def get():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} responded with {response.status_code}.')
+            return lambda: get
+
+        def join_tournament():
+            open_tournament = Tournament.objects.create(
+                name='Benchmark tournament', description='-', club=club, organizer=club.owner, capacity=96,
+                date=timezone.now() + timedelta(days=2), deadline=timezone.now() + timedelta(days=1)
+            )
+            def join():
+                error = open_tournament.join_tournament(player.user)
+                if error:
+                    raise CommandError(f'{player.user} could not join the tournament: {error}')
+            return join
+
+        def generate_matches():
+            # Back to the first round, with the stage the tournament had when its sign-ups closed
+            first_round = Tournament.objects.get(id=tournament.id)
+            Match.objects.filter(tournament=first_round).delete()
+            Group.objects.filter(tournament=first_round).delete()
+            first_round.stage = first_round.get_first_round_stage()
+            first_round.save()
+            return first_round.generate_matches
+
+        def stage_transition():
+            closing = Tournament.objects.get(id=tournament.id)
+            closing.stage = Tournament.StageTypes.SIGNUPS_OPEN
+            closing.deadline = timezone.now() - timedelta(days=2)
+            closing.date = timezone.now() - timedelta(days=1)
+            closing.save()
+            return closing.check_tournament_stage_transition
+
+        return [
+            ('club_dashboard', view('club_dashboard', club_id=club.id)),
+            ('tournament_dashboard', view('tournament_dashboard', tournament_id=tournament.id)),
+            ('member_profile', view('member_profile', membership_id=membership.id)),
+            ('available_clubs', view('available_clubs')),
+            ('join_tournament', join_tournament),
+            ('generate_matches', generate_matches),
+            ('get_ratings', lambda: lambda: EloRating.get_ratings(membership)),
+            ('stage_transition', stage_transition),
+        ]
+
+    def run_benchmarks(self, repeat):
+        results = {}
+        for name, setup in self.get_benchmarks():
+            queries, peak_memory = self.measure_run(setup)
+            times = [self.time_run(setup) for i in range(repeat)]
+            results[name] = {
+                'median_ms': round(statistics.median(times) * 1000, 3),
+                'min_ms': round(min(times) * 1000, 3),
+                'queries': queries,
+                'peak_memory': peak_memory,
+            }
+            self.stdout.write(
+                f"{name:<24}{results[name]['median_ms']:>10.1f} ms{results[name]['min_ms']:>10.1f} ms min"
+                f"{queries:>8} queries{peak_memory / 1024:>10.0f} KiB"
+            )
+        return results
+
+    def run_once(self, setup, measure):
+        """Runs one benchmark from cleared caches in a transaction rolled back at the end, returning the result of measure(function).
+
+        With --in-place, only the caches local to this process are cleared, since the shared ones are in use by the site.
+        """
+        for cache in caches.all():
+            if not self.in_place or isinstance(cache, LocMemCache):
+                cache.clear()
+        with transaction.atomic():
+            function = setup()
+            try:
+                return measure(function)
+            finally:
+                transaction.set_rollback(True)
+
+    def time_run(self, setup):
+        def measure(function):
+            start = time.perf_counter()
+            function()
+            return time.perf_counter() - start
+        return self.run_once(setup, measure)
+
+    def measure_run(self, setup):
+        """Returns the number of queries and the peak memory, in bytes, of one run of a benchmark."""
+        def measure(function):
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                tracemalloc.start()
+                try:
+                    function()
+                    peak_memory = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            return len(queries), peak_memory
+        return self.run_once(setup, measure)
+
+    def compare(self, results, baseline, max_slowdown):
+        """Reports the change of each benchmark since the baseline, and returns the names of the ones that regressed.
+
+        A benchmark regresses when its median time grows by more than max_slowdown times, or when it runs more queries.
+        """
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            slowdown = result['median_ms'] / baseline[name]['median_ms'] if baseline[name]['median_ms'] else 1
+            more_queries = result['queries'] > baseline[name]['queries']
+            if slowdown > max_slowdown or more_queries:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:<24}{slowdown:>8.2f}x time{result['queries'] - baseline[name]['queries']:>+6} queries"
+                + ('  REGRESSION' if name in regressions else '')
+            )
+        return regressions
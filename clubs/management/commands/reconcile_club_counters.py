@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from clubs.models.clubs import Club, Membership
+
+class Command(BaseCommand):
+    """Recomputes the denormalized membership counters of every club."""
+
+    help = 'Fixes any drift in the member, officer and pending application counters of clubs'
+
+    def handle(self, *args, **options):
+        clubs = Club.objects.annotate(
+            members=Count('membership', filter=~Q(membership__user_type=Membership.UserTypes.NON_MEMBER)),
+            officers=Count('membership', filter=Q(membership__user_type=Membership.UserTypes.OFFICER)),
+            applications=Count('membership', filter=Q(membership__application_status=Membership.Application.PENDING))
+        )
+
+        drifted_clubs = []
+        for club in clubs:
+            if (club.member_count, club.officer_count, club.pending_application_count) != (club.members, club.officers, club.applications):
+                club.member_count = club.members
+                club.officer_count = club.officers
+                club.pending_application_count = club.applications
+                drifted_clubs.append(club)
+
+        Club.objects.bulk_update(drifted_clubs, Club.COUNTER_FIELDS, batch_size=500)
+        self.stdout.write(f"Reconciled counters of {len(drifted_clubs)} clubs.")
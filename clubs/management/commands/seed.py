@@ -1,227 +1,356 @@
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
 from django.utils.timezone import make_aware
 
+from clubs.autocomplete import club_index
 from clubs.models.users import User
 from clubs.models.clubs import Club, Membership
-from clubs.models.tournaments import Tournament, TournamentParticipation, Match, Group
+from clubs.models.tournaments import Tournament, TournamentParticipation, Match, Group, EloRating, EloRatingRecord
 
-import pytz
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from faker import Faker
-from random import randint, random
-import traceback
+from itertools import combinations
+from random import Random, SystemRandom
+import re
+import string
+
+from datetime import datetime, timedelta, timezone
+
+# Bounds of the seeded dates, fixed so the same seed always gives the same dataset
+SEEDED_FROM = datetime(2018, 1, 1)
+SIGNUPS_CLOSED_AT = datetime(2020, 8, 31, 13, 50, 6)
+SEEDED_UNTIL = datetime(2021, 12, 31, 23, 59, 59)
+
+# Number of users and clubs generated from each random stream, independent of the number of workers
+PARTITION_SIZE = 20000
+TEXT_POOL_SIZE = 500
+MEMBERSHIPS_PER_USER = 4
+APPROVE_CHANCE = 0.9
+OFFICER_CHANCE = 0.1
+
+# Hidden playing strength of each experience level, simulated results are drawn from the Elo expected score between them
+EXPERIENCE_STRENGTHS = {'B': 800, 'I': 1000, 'A': 1200, 'M': 1400, 'G': 1600}
+DRAW_CHANCE = 0.3
+
+def get_stream(seed, name, partition=0):
+    """Returns the random number generator and the faker of one partition of the dataset."""
+    key = f'{seed}:{name}:{partition}'
+    faker = Faker('en_GB')
+    faker.seed_instance(key)
+    return Random(key), faker
+
+def create_text_pools(seed):
+    """Generates the free text fields once, seeded rows pick from these pools."""
+    random, faker = get_stream(seed, 'text')
+    return {
+        'bios': [faker.text(max_nb_chars=250) for i in range(TEXT_POOL_SIZE)],
+        'statements': [faker.text(max_nb_chars=500) for i in range(TEXT_POOL_SIZE)],
+        'descriptions': [faker.text(max_nb_chars=1000) for i in range(TEXT_POOL_SIZE)],
+        'catch_phrases': [faker.catch_phrase()[:200] for i in range(TEXT_POOL_SIZE)],
+        'cities': [faker.city() for i in range(TEXT_POOL_SIZE)],
+    }
+
+def create_username(first_name, last_name, user_id):
+    # The id keeps usernames unique, and only letters are kept so they pass the username validator
+    return re.sub('[^a-z]', '', (first_name + last_name).lower())[:20] + str(user_id)
+
+def create_email(username):
+    return username + '@example.org'
+
+def generate_users(seed, partition, user_ids, password, pools):
+    """Returns the users of one partition."""
+    random, faker = get_stream(seed, 'users', partition)
+    users = []
+    for user_id in user_ids:
+        first_name = faker.first_name()
+        last_name = faker.last_name()
+        username = create_username(first_name, last_name, user_id)
+        email = create_email(username)
+        users.append(User(
+            id=user_id,
+            username=username,
+            name=first_name + " " + last_name,
+            password=password,
+            email=email,
+            email_hash=User.hash_email(email),
+            public_bio=random.choice(pools['bios']),
+            chess_experience=random.choice(User.Experience.values),
+            date_joined=make_aware(faker.date_time_between(start_date=SEEDED_FROM, end_date=SIGNUPS_CLOSED_AT))
+        ))
+    return users
+
+def generate_clubs(seed, partition, club_ids, user_ids, pools):
+    """Returns the clubs of one partition, owned by random users."""
+    random, faker = get_stream(seed, 'clubs', partition)
+    return [
+        Club(
+            id=club_id,
+            name=re.sub('[^A-Za-z0-9 ]', '', faker.company()).strip()[:90],
+            owner_id=random.choice(user_ids),
+            location=random.choice(pools['cities']),
+            mission_statement=random.choice(pools['catch_phrases']),
+            description=random.choice(pools['descriptions'])[:500]
+        )
+        for club_id in club_ids
+    ]
+
+def generate_memberships(seed, partition, user_ids, club_ids, club_owners, pools):
+    """Returns the applications of the users of one partition to a few random clubs, most of them approved."""
+    random, faker = get_stream(seed, 'memberships', partition)
+    memberships = []
+    for user_id in user_ids:
+        club_count = min(random.randint(0, 2 * MEMBERSHIPS_PER_USER), len(club_ids))
+        for club_id in random.sample(club_ids, club_count):
+            if club_owners.get(club_id) == user_id:
+                continue
+
+            if random.random() < APPROVE_CHANCE:
+                application_status = Membership.Application.APPROVED
+                if random.random() < OFFICER_CHANCE:
+                    user_type = Membership.UserTypes.OFFICER
+                else:
+                    user_type = Membership.UserTypes.MEMBER
+            else:
+                application_status = Membership.Application.PENDING
+                user_type = Membership.UserTypes.NON_MEMBER
+
+            memberships.append(Membership(
+                user_id=user_id,
+                club_id=club_id,
+                personal_statement=random.choice(pools['statements']),
+                application_status=application_status,
+                user_type=user_type
+            ))
+    return memberships
 
-from datetime import datetime, timezone
 
 class Command(BaseCommand):
-    """The database seeder."""
-
-    USER_COUNT = 500
-    CLUB_COUNT = 20
-    TOURNAMENT_COUNT = 5
-    MEMBER_CHANCE = 0.2
-    APPROVE_CHANCE = 0.9
-    OFFICER_CHANCE = 0.1
+    """The database seeder.
+
+    Every seeded object is generated in memory and written with chunked bulk_create(), so the scale options can
+    build databases with millions of rows. Users, clubs and memberships are generated in partitions, each from its
+    own random stream derived from --seed, so a seed gives the same dataset whatever the number of workers. The
+    denormalized club counters are reconciled once at the end, since bulk_create() skips the Membership.save()
+    that maintains them.
+    """
+
+    PRESETS = {
+        'small': {'users': 500, 'clubs': 20, 'tournaments': 80, 'matches': 10000},
+        'medium': {'users': 50000, 'clubs': 1000, 'tournaments': 2000, 'matches': 100000},
+        'large': {'users': 1000000, 'clubs': 10000, 'tournaments': 20000, 'matches': 500000},
+    }
     DEFAULT_PASSWORD = 'Password123'
+    BATCH_SIZE = 5000
+    CLUB_CHUNK_SIZE = 500
+    # Tournaments are over in a few rounds, the cap only guards against a bracket that cannot finish
+    MAX_ROUNDS = 40
     help = 'Seeds the database with sample data'
 
-    def __init__(self):
-        self.faker = Faker('en_GB')
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=self.PRESETS, default='small', help='Preset dataset size, the other options override it')
+        parser.add_argument('--users', type=int, help='Number of users, including the default users')
+        parser.add_argument('--clubs', type=int, help='Number of clubs, including the default club')
+        parser.add_argument('--tournaments', type=int, help='Number of tournaments, including the default tournaments')
+        parser.add_argument('--matches', type=int, help='Maximum number of first round matches scheduled across the tournaments')
+        parser.add_argument('--seed', type=int, help='Seed of the random data, the same seed always gives the same dataset')
+        parser.add_argument('--workers', type=int, default=1, help='Number of processes generating users, clubs and memberships')
+        parser.add_argument('--simulate-results', action='store_true', help='Play every scheduled tournament until it is finished, and store the rating histories')
 
     def handle(self, *args, **options):
-        self.create_default_users()
-        self.create_users()
-        self.users = User.objects.exclude(is_superuser=True)
-        self.create_clubs()
-        self.clubs = Club.objects.all()
-        self.create_default_memberships()
-        self.make_memberships()
-        self.memberships = Membership.objects.all()
-        self.create_default_tournaments()
-        self.create_tournaments()
-        self.tournaments = Tournament.objects.all()
-        self.participants = TournamentParticipation.objects.all()
-        self.create_tournament_matches()
+        counts = dict(self.PRESETS[options['size']])
+        for option in counts:
+            if options[option] is not None:
+                counts[option] = options[option]
+            if counts[option] < 0:
+                raise CommandError(f'--{option} cannot be negative.')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        self.seed = options['seed']
+        if self.seed is None:
+            self.seed = SystemRandom().randrange(2 ** 32)
+        self.log(f"Seeding with --seed {self.seed}")
+
+        self.random, self.faker = get_stream(self.seed, 'tournaments')
+        self.password = self.create_password()
+        self.pools = create_text_pools(self.seed)
+        self.next_ids = {}
+        self.groups, self.group_players, self.matches = [], [], []
+
+        # Workers only generate objects, every database write happens in this process
+        self.pool = ProcessPoolExecutor(options['workers'], initializer=django.setup) if options['workers'] > 1 else None
+        try:
+            with transaction.atomic():
+                self.create_default_users()
+                self.create_users(counts['users'] - len(self.default_users))
+                self.create_clubs(counts['clubs'] - 1)
+                self.create_default_memberships()
+                self.make_memberships()
+                self.create_default_tournaments()
+                self.create_tournaments(counts['tournaments'] - len(self.default_tournaments), counts['matches'])
+                if options['simulate_results']:
+                    self.simulate_results()
+                self.reset_sequences()
+        finally:
+            if self.pool:
+                self.pool.shutdown()
+
+        call_command('reconcile_club_counters', stdout=self.stdout)
+        # bulk_create() skips the signals storing the word starts of each club
+        club_index.reindex()
+        club_index.invalidate()
+
+    def log(self, message, progress=False):
+        self.stdout.write(message, ending='\r' if progress else '\n')
+
+    def create_password(self):
+        """Hashes the default password once, with a salt drawn from the seed, to be shared by every seeded user."""
+        random, faker = get_stream(self.seed, 'password')
+        salt = ''.join(random.choice(string.ascii_letters + string.digits) for i in range(22))
+        return make_password(self.DEFAULT_PASSWORD, salt)
+
+    def map_partitions(self, function, ids, *args):
+        """Generates the objects of each partition of ids, in the worker processes if there are any, in partition order."""
+        partitions = [ids[start:start + PARTITION_SIZE] for start in range(0, len(ids), PARTITION_SIZE)]
+        arguments = [(self.seed, index, partition) + args for index, partition in enumerate(partitions)]
+        if self.pool:
+            return self.pool.map(function, *zip(*arguments))
+        return (function(*partition_arguments) for partition_arguments in arguments)
+
+    def allocate_ids(self, model, count):
+        """Reserves a range of primary keys, so rows can reference each other before they are inserted."""
+        if model not in self.next_ids:
+            self.next_ids[model] = (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        first_id = self.next_ids[model]
+        self.next_ids[model] += count
+        return range(first_id, first_id + count)
+
+    def reset_sequences(self):
+        """Moves the primary key sequences past the explicitly assigned ids, on the databases that have them."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(self.next_ids)):
+                cursor.execute(sql)
 
     def create_default_users(self):
-        user1 = User.objects.create_user(username = "jkerman", password = "Password123")
+        user_ids = self.allocate_ids(User, 3)
+        joined = make_aware(SEEDED_FROM)
+
+        user1 = User.objects.create(id = user_ids[0], username = "jkerman", password = self.password, date_joined = joined)
         user1.name = "Jebediah Kerman"
         user1.email = "jeb@example.org"
         user1.public_bio = "Welcome to my brand new profile!"
         user1.chess_experience = "B"
         user1.save()
 
-        user2 = User.objects.create_user(username = "vkerman", password = "Password123")
+        user2 = User.objects.create(id = user_ids[1], username = "vkerman", password = self.password, date_joined = joined)
         user2.name = "Valentina Kerman"
         user2.email = "val@example.org"
         user2.public_bio = "Welcome to my profile!"
         user2.chess_experience = "I"
         user2.save()
 
-        user3 = User.objects.create_user(username = "bkerman", password = "Password123")
+        user3 = User.objects.create(id = user_ids[2], username = "bkerman", password = self.password, date_joined = joined)
         user3.name = "Billie Kerman"
         user3.email = "billie@example.org"
         user3.public_bio = "Welcome to my profile!"
         user3.chess_experience = "A"
         user3.save()
 
-        print("Default Users seeding complete.      ")
+        self.default_users = [user1, user2, user3]
+        self.log("Default Users seeding complete.      ")
 
-        club1 = Club.objects.create(name = "Kerbal Chess Club", owner = user3)
+        club1 = Club.objects.create(id = self.allocate_ids(Club, 1)[0], name = "Kerbal Chess Club", owner = user3)
         club1.location = "London, United Kingdom"
         club1.mission_statement = "We have the best players in the world!"
         club1.description = "We are a club to develop the best players in the world!"
         club1.save()
 
-        print("Default Club seeding complete.      ")
-
-
-    def create_users(self):
-        user_count = 3
-        while user_count < self.USER_COUNT:
-            print(f"Seeding user {user_count}/{self.USER_COUNT}", end='\r')
-            try:
-                self.create_user_profile()
-            except Exception:
-                continue
-            user_count = user_count + 1
-        print("User seeding complete.      ")
-
-    def create_user_profile(self):
-        first_name = self.faker.first_name()
-        last_name = self.faker.last_name()
-        name = first_name + " " + last_name
-        email = self.create_email(first_name, last_name)
-        username = self.create_username(first_name, last_name)
-        public_bio = self.faker.text(max_nb_chars=250)
-        chess_experience = 'B'
-        random_chess_experience = random()
-
-        if random_chess_experience <= 0.20:
-            chess_experience = 'B'
-        elif random_chess_experience <= 0.40:
-            chess_experience = 'I'
-        elif random_chess_experience <= 0.60:
-            chess_experience = 'A'
-        elif random_chess_experience <= 0.80:
-            chess_experience = 'M'
-        else:
-            chess_experience = 'G'
-
-        user_create = User.objects.create_user(username=username, 
-                                               name=name,
-                                               password=Command.DEFAULT_PASSWORD,
-                                               email=email,
-                                               public_bio=public_bio,
-                                               chess_experience=chess_experience)
-
-
-        user_create.save()
-
-    def create_email(self, first_name, last_name):
-        return first_name + '.' + last_name + '@example.org'
-
-    def create_username(self, first_name, last_name):
-        return first_name.lower() + last_name.lower()
-
-    def get_random_user(self):
-        index = randint(0,self.users.count()-1)
-        return self.users[index]
-
-    def create_clubs(self):
-        club_count = 2
-        while club_count < self.CLUB_COUNT:
-            print(f"Seeding club {club_count}/{self.CLUB_COUNT}", end='\r')
-            try:
-                self.create_club()
-            except:
-                continue
-            club_count = club_count + 1
-        print("Club seeding complete.      ")
-
-    def create_club(self):
-        name = self.faker.company()
-        owner = self.get_random_user()
-        location = self.faker.city()
-        mission_statement = self.faker.catch_phrase()
-        description = self.faker.text(max_nb_chars=500)
-
-        club = Club.objects.create(
-            name=name,
-            owner=owner,
-            location=location,
-            mission_statement=mission_statement,
-            description=description
-        )
-
-        club.save()
+        self.default_club = club1
+        self.log("Default Club seeding complete.      ")
+
+    def create_users(self, count):
+        self.user_ids = self.allocate_ids(User, max(count, 0))
+        seeded = 0
+        for users in self.map_partitions(generate_users, self.user_ids, self.password, self.pools):
+            User.objects.bulk_create(users, batch_size=self.BATCH_SIZE)
+            seeded += len(users)
+            self.log(f"Seeding user {seeded}/{len(self.user_ids)}", progress=True)
+        self.log("User seeding complete.      ")
+
+    def create_clubs(self, count):
+        self.club_owners = {}
+        if not self.user_ids:
+            count = 0
+        club_ids = self.allocate_ids(Club, max(count, 0))
+
+        # Partitions pick their names independently, duplicates are renamed here in id order
+        names = {self.default_club.name}
+        clubs = []
+        for partition in self.map_partitions(generate_clubs, club_ids, self.user_ids, self.pools):
+            for club in partition:
+                if club.name in names or not club.name[:1].isalpha():
+                    club.name = f"Chess Club {club.id}"
+                names.add(club.name)
+                self.club_owners[club.id] = club.owner_id
+                clubs.append(club)
+
+        Club.objects.bulk_create(clubs, batch_size=self.BATCH_SIZE)
+        # bulk_create() skips Club.save(), which gives the owner its membership
+        Membership.objects.bulk_create([
+            Membership(
+                user_id=owner_id,
+                club_id=club_id,
+                personal_statement="-",
+                application_status=Membership.Application.APPROVED,
+                user_type=Membership.UserTypes.OWNER
+            )
+            for club_id, owner_id in self.club_owners.items()
+        ], batch_size=self.BATCH_SIZE)
+        self.club_ids = [self.default_club.id] + list(club_ids)
+        self.log("Club seeding complete.      ")
 
     def make_memberships(self):
-        count = 1
-        for user in self.users:
-            for club in self.clubs:
-                if not Membership.objects.filter(club=club, user=user).exists():
-                    if random() < self.MEMBER_CHANCE:
-
-                        if random() < self.APPROVE_CHANCE:
-                            application_status = 'A'
-
-                            if random() < self.OFFICER_CHANCE:
-                                user_type = 'OF'
-                            else:
-                                user_type = 'MB'
-                        else:
-                            application_status = 'P'
-                            user_type = 'NM'
-                                
-
-                        print(f"Seeding memberships, Count:{count}", end='\r')
-
-                        personal_statement = self.faker.text(max_nb_chars=500)
-
-                        membership = Membership.objects.create(
-                            user=user,
-                            club=club,
-                            personal_statement=personal_statement,
-                            application_status=application_status,
-                            user_type=user_type
-                        )
-                        
-                        membership.save()
-                        
-                        count += 1
-
-        print("Memberships seeding complete.      ")
+        count = 0
+        for memberships in self.map_partitions(generate_memberships, self.user_ids, self.club_ids, self.club_owners, self.pools):
+            Membership.objects.bulk_create(memberships, batch_size=self.BATCH_SIZE)
+            count += len(memberships)
+            self.log(f"Seeding memberships, Count:{count}", progress=True)
 
-    def create_default_memberships(self):
+        self.log("Memberships seeding complete.      ")
 
-        vkerman = self.users.get(name="Valentina Kerman")
-        jkerman = self.users.get(name="Jebediah Kerman")
-        kerbal = self.clubs.get(name="Kerbal Chess Club")
+    def create_default_memberships(self):
+        jkerman, vkerman, bkerman = self.default_users
+        kerbal = self.default_club
 
         member_check1 = Membership.objects.create(
-                user = vkerman, 
+                user = vkerman,
                 club = kerbal,
                 personal_statement = "I want to join this club!",
                 application_status = "A",
                 user_type = "OF")
         member_check2 = Membership.objects.create(
-                user = jkerman, 
+                user = jkerman,
                 club = kerbal,
                 personal_statement = "I really like this club!",
                 application_status = "A",
                 user_type = "MB")
 
-        member_check1.save()
-        member_check2.save()
-
-        print("Default Memberships seeding complete.      ")
+        self.log("Default Memberships seeding complete.      ")
 
     def create_default_tournaments(self):
-        vkerman = self.users.get(name="Valentina Kerman")
-        bkerman = self.users.get(name="Billie Kerman")
-        kerbal = self.clubs.get(name="Kerbal Chess Club")
+        jkerman, vkerman, bkerman = self.default_users
+        kerbal = self.default_club
+
+        tournament_ids = self.allocate_ids(Tournament, 2)
 
         tournament1 = Tournament.objects.create(
+            id = tournament_ids[0],
             name = "Tournament 1",
             description = "Tournament description",
             club = kerbal,
@@ -232,6 +361,7 @@ class Command(BaseCommand):
         )
 
         tournament2 = Tournament.objects.create(
+            id = tournament_ids[1],
             name = "Tournament 2",
             description = "Tournament description",
             club = kerbal,
@@ -241,70 +371,227 @@ class Command(BaseCommand):
             deadline = make_aware(datetime(2020, 12, 20, 12, 0), timezone.utc),
         )
 
-        tournament1.save()
-        tournament2.save()
-
-        self.create_participants(tournament1)
-        self.create_participants(tournament2)
-
-        TournamentParticipation.objects.filter(tournament=tournament1, user=bkerman).delete()
-        TournamentParticipation.objects.filter(tournament=tournament2, user=bkerman).delete()
-
-        print("Default Tournaments seeding complete.")
-
-    def create_tournaments(self):
-        for club in self.clubs:
-            tournament_count = 1
-            
-            potential_organizers = self.memberships.filter(club=club, user_type=Membership.UserTypes.OFFICER).order_by('?')
-
-            while tournament_count < self.TOURNAMENT_COUNT:
-                
-                name = self.faker.name()
-                deadline = make_aware(self.faker.date_time_between(end_date=datetime(2020, 8, 31, 13, 50, 6)))
-                date = make_aware(self.faker.date_time_between(start_date=datetime(2020, 8, 31, 13, 50, 6)))
-
-                organizer = potential_organizers.first().user
-
-                tournament = Tournament.objects.create(name=name,
-                    description=self.faker.text(max_nb_chars=1000),
-                    date=date,
-                    organizer=organizer,
-                    club=club,
-                    capacity=randint(0,96),
-                    deadline=deadline,
-                    stage=Tournament.StageTypes.SIGNUPS_OPEN)
-                
-                tournament.save()
-                
-                self.create_participants(tournament)
-                
-                tournament_count += 1
-                
-        print("Tournament seeding complete.      ")
-
-    def create_participants(self, tournament):
-        max = tournament.capacity
-        club = tournament.club
-        
-        members = Membership.objects.filter(club=club).exclude(user=tournament.organizer).order_by('?')
-        current_count = 0
-        
-        if max > members.count():
-            user_count = randint(0, members.count())
+        self.default_tournaments = [tournament1, tournament2]
+        self.log("Default Tournaments seeding complete.")
+
+    def get_club_members(self, club_ids):
+        """Returns the approved members of the given clubs and the ones who can organize tournaments, by club."""
+        members = {club_id: [] for club_id in club_ids}
+        organizers = {club_id: [] for club_id in club_ids}
+        rows = Membership.objects.filter(
+            club_id__in=club_ids, rank__gte=Membership.Ranks.MEMBER
+        ).order_by('club_id', 'user_id').values_list('club_id', 'user_id', 'rank')
+        for club_id, user_id, rank in rows:
+            members[club_id].append(user_id)
+            if rank >= Membership.Ranks.OFFICER:
+                organizers[club_id].append(user_id)
+        return members, organizers
+
+    def create_tournaments(self, count, match_count):
+        self.remaining_matches = match_count
+        tournament_counts = Counter(self.random.choice(self.club_ids) for i in range(max(count, 0)))
+        club_ids = sorted(tournament_counts)
+        names = set()
+
+        # The default tournaments get their participants and first round with the default club's chunk
+        default_tournaments = list(self.default_tournaments)
+        if self.default_club.id not in tournament_counts:
+            club_ids.insert(0, self.default_club.id)
+
+        seeded = 0
+        for start in range(0, len(club_ids), self.CLUB_CHUNK_SIZE):
+            chunk = club_ids[start:start + self.CLUB_CHUNK_SIZE]
+            members, organizers = self.get_club_members(chunk)
+
+            tournaments = []
+            for club_id in chunk:
+                for tournament_id in self.allocate_ids(Tournament, tournament_counts[club_id]):
+                    name = self.faker.name()
+                    if (club_id, name) in names:
+                        name = f"{name} {tournament_id}"
+                    names.add((club_id, name))
+                    tournaments.append(Tournament(
+                        id=tournament_id,
+                        name=name,
+                        description=self.random.choice(self.pools['descriptions']),
+                        date=make_aware(self.faker.date_time_between(start_date=SIGNUPS_CLOSED_AT, end_date=SEEDED_UNTIL)),
+                        organizer_id=self.random.choice(organizers[club_id] or [self.club_owners.get(club_id, self.default_club.owner_id)]),
+                        club_id=club_id,
+                        capacity=self.random.randint(2, 96),
+                        deadline=make_aware(self.faker.date_time_between(start_date=SEEDED_FROM, end_date=SIGNUPS_CLOSED_AT)),
+                        stage=Tournament.StageTypes.SIGNUPS_OPEN
+                    ))
+
+            participants = {}
+            for tournament in default_tournaments + tournaments:
+                participants[tournament] = self.create_participants(tournament, members[tournament.club_id])
+            for tournament in default_tournaments:
+                self.create_tournament_matches(tournament, participants[tournament], update=True)
+            for tournament in tournaments:
+                self.create_tournament_matches(tournament, participants[tournament])
+
+            Tournament.objects.bulk_create(tournaments, batch_size=self.BATCH_SIZE)
+            TournamentParticipation.objects.bulk_create([
+                TournamentParticipation(tournament_id=tournament.id, user_id=user_id)
+                for tournament, user_ids in participants.items() for user_id in user_ids
+            ], batch_size=self.BATCH_SIZE)
+            self.save_tournament_matches()
+
+            default_tournaments = []
+            seeded += len(tournaments)
+            self.log(f"Seeding tournament {seeded}/{max(count, 0)}", progress=True)
+
+        self.log("Tournament seeding complete.      ")
+        self.log("Tournament Matches seeding complete.")
+
+    def create_participants(self, tournament, members):
+        """Returns the ids of a random number of the club's members, up to the tournament's capacity."""
+        candidates = [user_id for user_id in members if user_id != tournament.organizer_id]
+        user_count = self.random.randint(0, min(tournament.capacity, len(candidates)))
+        return self.random.sample(candidates, user_count)
+
+    def create_tournament_matches(self, tournament, players, update=False):
+        """Schedules the first round of a tournament whose date has passed, the way Tournament.generate_matches() would.
+
+        Tournaments that would go over the match budget keep their sign-ups stage, and move on when they are next viewed.
+        """
+        if len(players) < 2:
+            return
+
+        # The participants are not saved yet, so they are counted here
+        stage = tournament.get_first_round_stage(len(players))
+        if stage == Tournament.StageTypes.ELIMINATION:
+            groups = [('Elimination 1', Group.GroupStageTypes.ELIMINATION, 0, players)]
+            pairings = [[tuple(players[i:i + 2]) for i in range(0, len(players) - 1, 2)]]
         else:
-            user_count = randint(0, max)
-        
-        for current_count in range(user_count):
-
-            participant = TournamentParticipation.objects.get_or_create(
-                user=members[current_count].user, 
-                tournament=tournament
-            )
+            phase = 1 if len(players) <= 32 else 0
+            size = 4 if phase == 1 else 6
+            groups = [
+                (f'Group {chr(ord("@") + i + 1)}', Group.GroupStageTypes.GROUP_STAGE, phase, players[i * size:(i + 1) * size])
+                for i in range(len(players) // size)
+            ]
+            pairings = [list(combinations(group_players, 2)) for _, _, _, group_players in groups]
+
+        match_count = sum(len(group_pairings) for group_pairings in pairings)
+        if match_count > self.remaining_matches:
+            return
+        self.remaining_matches -= match_count
+
+        tournament.stage = stage
+        if update:
+            Tournament.objects.filter(id=tournament.id).update(stage=stage)
+
+        for group_id, (name, group_stage, phase, group_players), group_pairings in zip(self.allocate_ids(Group, len(groups)), groups, pairings):
+            self.groups.append(Group(id=group_id, name=name, tournament_id=tournament.id, stage=group_stage, phase=phase))
+            self.group_players += [Group.players.through(group_id=group_id, user_id=user_id) for user_id in group_players]
+            self.matches += [
+                Match(tournament_id=tournament.id, group_id=group_id, white_player_id=white, black_player_id=black)
+                for white, black in group_pairings
+            ]
+
+    def save_tournament_matches(self):
+        """Writes the groups and matches scheduled since the last call."""
+        Group.objects.bulk_create(self.groups, batch_size=self.BATCH_SIZE)
+        Group.players.through.objects.bulk_create(self.group_players, batch_size=self.BATCH_SIZE)
+        Match.objects.bulk_create(self.matches, batch_size=self.BATCH_SIZE)
+        self.groups, self.group_players, self.matches = [], [], []
+
+    def simulate_results(self):
+        """Plays every tournament with a scheduled first round until it is finished, a round a day from its date.
+
+        Each round's results are written with one bulk update, and the next round is scheduled by the tournament
+        itself, so the seeded histories follow the same stage transitions as the ones played on the site.
+        """
+        tournaments = Tournament.objects.filter(
+            stage__in=[Tournament.StageTypes.GROUP_STAGES, Tournament.StageTypes.ELIMINATION]
+        ).order_by('date', 'id')
+        self.strengths = {
+            user_id: EXPERIENCE_STRENGTHS[experience]
+            for user_id, experience in User.objects.filter(tournamentparticipation__isnull=False).distinct().values_list('id', 'chess_experience')
+        }
+
+        played = 0
+        total = tournaments.count()
+        for tournament in tournaments.iterator():
+            self.play_tournament(tournament)
+            played += 1
+            self.log(f"Simulating tournament {played}/{total}", progress=True)
+        self.log("Tournament results simulation complete.")
+
+        self.create_rating_histories()
+
+    def play_tournament(self, tournament):
+        for day in range(1, self.MAX_ROUNDS + 1):
+            matches = list(tournament.matches.filter(_result=Match.MatchResultTypes.PENDING).select_related('group'))
+            if not matches:
+                break
+
+            round_date = tournament.date + timedelta(days=day)
+            for match in matches:
+                match._result = self.draw_result(match)
+                match.result_date = round_date + timedelta(seconds=self.random.randrange(24 * 60 * 60))
+            Match.objects.bulk_update(matches, ['_result', 'result_date'], batch_size=self.BATCH_SIZE)
 
-    def create_tournament_matches(self):
-        for tournament in self.tournaments:
             tournament.check_tournament_stage_transition()
+            if tournament.stage == Tournament.StageTypes.FINISHED:
+                break
             tournament.generate_matches()
-        print("Tournament Matches seeding complete.")
 
+    def draw_result(self, match):
+        """Draws the result of a match from the players' Elo expected score, without draws in elimination rounds."""
+        expected_score = 1 / (1 + 10 ** ((self.strengths[match.black_player_id] - self.strengths[match.white_player_id]) / 400))
+        draw_chance = 0
+        if match.group is None or match.group.stage != Group.GroupStageTypes.ELIMINATION:
+            # Draws are likeliest between players of the same strength, and keep the white player's expected score
+            draw_chance = DRAW_CHANCE * (1 - abs(2 * expected_score - 1))
+
+        outcome = self.random.random()
+        if outcome < expected_score - draw_chance / 2:
+            return Match.MatchResultTypes.WHITE_WIN
+        elif outcome < expected_score + draw_chance / 2:
+            return Match.MatchResultTypes.DRAW
+        return Match.MatchResultTypes.BLACK_WIN
+
+    def create_rating_histories(self):
+        """Stores every member's rating after each of its simulated matches, replaying the matches in result order.
+
+        The ratings are computed by EloRating.calculate_new_elo_rating(), as EloRating.record_ratings() does for the
+        matches played on the site, but kept in memory instead of being read back from the stored records.
+        """
+        matches = Match.objects.exclude(_result=Match.MatchResultTypes.PENDING).exclude(result_date=None).order_by('result_date', 'id').values_list(
+            'id', 'tournament__club_id', 'white_player_id', 'black_player_id', '_result', 'result_date'
+        )
+        memberships = {
+            (membership.club_id, membership.user_id): membership
+            for membership in Membership.objects.filter(user__in=self.strengths).only('club_id', 'user_id', 'highest_elo_rating', 'lowest_elo_rating')
+        }
+
+        # Players are compared by id, so unsaved stand-ins spare loading the users
+        players = {user_id: User(id=user_id) for user_id in self.strengths}
+
+        ratings = {}
+        records = []
+        for match_id, club_id, white_player_id, black_player_id, result, result_date in matches.iterator():
+            match = Match(id=match_id, white_player=players[white_player_id], black_player=players[black_player_id], _result=result)
+            white = memberships.get((club_id, white_player_id))
+            black = memberships.get((club_id, black_player_id))
+            new_ratings = EloRating.calculate_new_elo_rating(
+                ratings.get(white, EloRating.INITIAL_RATING), match.white_player,
+                ratings.get(black, EloRating.INITIAL_RATING), match.black_player,
+                match
+            )
+            for membership, rating in zip((white, black), new_ratings):
+                if membership is None:
+                    continue
+                ratings[membership] = rating
+                membership.highest_elo_rating = max(membership.highest_elo_rating, round(rating))
+                membership.lowest_elo_rating = min(membership.lowest_elo_rating, round(rating))
+                records.append(EloRatingRecord(membership_id=membership.id, match_id=match_id, rating=rating, date=result_date))
+
+            if len(records) >= self.BATCH_SIZE:
+                EloRatingRecord.objects.bulk_create(records, batch_size=self.BATCH_SIZE)
+                records = []
+
+        EloRatingRecord.objects.bulk_create(records, batch_size=self.BATCH_SIZE)
+        Membership.objects.bulk_update(list(ratings), ['highest_elo_rating', 'lowest_elo_rating'], batch_size=self.BATCH_SIZE)
+        self.log("Rating histories seeding complete.")
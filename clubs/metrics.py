@@ -0,0 +1,228 @@
+"""Prometheus metrics of the app, shared by every worker process through a local SQLite file.
+
+Each process sums its observations in memory and adds them to the file at most every METRICS_FLUSH_INTERVAL
+seconds, and when it serves /metrics, so workers rarely wait on each other's writes and a scrape of any worker
+reports the totals of all of them without an external service.
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger('clubs.metrics')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class MetricsStore:
+    """Sums of the metric samples of every process, in the SQLite file named by METRICS_DATABASE."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get_connection(self):
+        path = settings.METRICS_DATABASE
+        if getattr(self.local, 'path', None) != path:
+            connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS metrics (name TEXT, labels TEXT, value REAL, PRIMARY KEY (name, labels))')
+            self.local.path, self.local.connection = path, connection
+        return self.local.connection
+
+    def add(self, samples):
+        """Add the values of a {(name, labels): value} dict of samples to the stored sums."""
+        if not samples:
+            return
+        connection = self.get_connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in samples.items()]
+            )
+
+    def get_samples(self):
+        """Return the stored samples as a {name: {labels: value}} dict."""
+        samples = defaultdict(dict)
+        for name, labels, value in self.get_connection().execute('SELECT name, labels, value FROM metrics ORDER BY name, labels'):
+            samples[name][labels] = value
+        return samples
+
+    def clear(self):
+        self.get_connection().execute('DELETE FROM metrics')
+
+class SampleBuffer:
+    """Samples recorded by this process that are not in the shared store yet."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.flushed_at = time.monotonic()
+
+    def add(self, samples):
+        with self.lock:
+            self.merge(samples)
+            due = time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def merge(self, samples):
+        for key, value in samples.items():
+            self.samples[key] = self.samples.get(key, 0) + value
+
+    def flush(self):
+        """Add the buffered samples to the shared store, keeping them for the next flush if it cannot be written."""
+        with self.lock:
+            samples, self.samples = self.samples, {}
+            self.flushed_at = time.monotonic()
+        try:
+            store.add(samples)
+        except sqlite3.Error:
+            # Metrics must never fail the request recording them
+            logger.exception('Could not write %d metric samples to %s', len(samples), settings.METRICS_DATABASE)
+            with self.lock:
+                self.merge(samples)
+
+    def clear(self):
+        with self.lock:
+            self.samples = {}
+
+store = MetricsStore()
+buffer = SampleBuffer()
+registry = []
+
+@atexit.register
+def flush_at_exit():
+    if settings.configured and settings.METRICS_ENABLED:
+        buffer.flush()
+
+def format_labels(**labels):
+    return ','.join(f'{name}="{str(value)}"' for name, value in sorted(labels.items()))
+
+def record(samples):
+    """Add samples to the buffer of this process, which is written to the shared store when it is due."""
+    if not settings.METRICS_ENABLED:
+        return
+    buffer.add(samples)
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        registry.append(self)
+
+    def get_sample_names(self):
+        return [self.name]
+
+    def expose(self, samples):
+        """Return the lines of this metric in the Prometheus text format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for name in self.get_sample_names():
+            for labels, value in samples.get(name, {}).items():
+                lines.append(f'{name}{{{labels}}} {value:g}' if labels else f'{name} {value:g}')
+        return lines
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        record({(self.name, format_labels(**labels)): amount})
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+
+    def get_sample_names(self):
+        return [f'{self.name}_bucket', f'{self.name}_sum', f'{self.name}_count']
+
+    def observe(self, value, **labels):
+        # Buckets are cumulative, an observation counts towards every bucket whose bound it does not exceed
+        samples = {
+            (f'{self.name}_bucket', format_labels(le=bound, **labels)): 1
+            for bound in self.buckets if value <= bound
+        }
+        samples[(f'{self.name}_bucket', format_labels(le='+Inf', **labels))] = 1
+        samples[(f'{self.name}_sum', format_labels(**labels))] = value
+        samples[(f'{self.name}_count', format_labels(**labels))] = 1
+        record(samples)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+class CacheHitRatio(Metric):
+    """Gauge computed when metrics are collected, from the cache request counter."""
+    type = 'gauge'
+
+    def expose(self, samples):
+        requests = defaultdict(dict)
+        for labels, value in samples.get(cache_requests.name, {}).items():
+            cache_label, result_label = labels.split(',')
+            requests[cache_label][result_label] = value
+        ratios = {
+            cache_label: results.get('result="hit"', 0) / sum(results.values())
+            for cache_label, results in requests.items() if sum(results.values())
+        }
+        return super().expose({self.name: ratios})
+
+def get_metrics():
+    """Return every metric of every process in the Prometheus text format, including the latest samples of this one."""
+    if settings.METRICS_ENABLED:
+        buffer.flush()
+    samples = store.get_samples()
+    return '\n'.join(line for metric in registry for line in metric.expose(samples)) + '\n'
+
+class InstrumentedCacheMixin:
+    """Cache backend mixin counting the hits and misses of lookups, by cache location.
+
+    Lookups of several keys go through get() one key at a time, so they are counted too.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.location = location or 'default'
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version)
+        cache_requests.inc(cache=self.location, result='miss' if value is missing else 'hit')
+        return default if value is missing else value
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    """Local memory cache counting its hits and misses."""
+
+def timed_operation(operation):
+    """Decorator counting and timing the calls to a domain operation."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with operation_duration.time(operation=operation):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+request_duration = Histogram('clubs_request_duration_seconds', 'Time spent serving requests, by view.')
+request_queries = Histogram('clubs_request_queries', 'Number of database queries run by requests, by view.', QUERY_COUNT_BUCKETS)
+request_query_duration = Histogram('clubs_request_query_duration_seconds', 'Time spent in database queries by requests, by view.')
+cache_requests = Counter('clubs_cache_requests_total', 'Cache lookups, by cache and whether they were hits or misses.')
+cache_hit_ratio = CacheHitRatio('clubs_cache_hit_ratio', 'Share of cache lookups that were hits, by cache.')
+operation_duration = Histogram('clubs_operation_duration_seconds', 'Calls to domain operations and the time they took, by operation.')
+stage_transitions = Counter('clubs_tournament_stage_transitions_total', 'Tournament stage transitions, by stage left and stage entered.')
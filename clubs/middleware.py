@@ -0,0 +1,147 @@
+"""Middleware for the clubs app."""
+import cProfile
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+
+from clubs import metrics
+from clubs.helpers import get_user_memberships
+from clubs.profiling import (
+    QueryProfile, QueryBudgetExceeded, RequestTiming, SlowQueryLog, current_timing, get_top_functions, latency_buffer,
+    save_profile, logger as query_logger
+)
+
+class MembershipMiddleware:
+    """Attach the logged-in user's memberships to the request, loaded with a single query the first time they are used."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.memberships = SimpleLazyObject(lambda: get_user_memberships(request.user))
+        return self.get_response(request)
+
+class QueryProfilingMiddleware:
+    """Record the queries run while serving each request, when QUERY_PROFILING is enabled.
+
+    Statements run several times are logged as likely N+1 queries, and requests to a view running more queries
+    than its budget in QUERY_BUDGETS are logged too, or fail if QUERY_BUDGET_STRICT is set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_PROFILING:
+            return self.get_response(request)
+
+        request.query_profile = profile = QueryProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        query_logger.debug('%s %s (%s): %d queries in %.1f ms', request.method, request.path, url_name, profile.count, profile.duration * 1000)
+
+        for sql, count in profile.get_duplicates(settings.QUERY_DUPLICATE_THRESHOLD).items():
+            query_logger.warning('%s (%s) ran the same query %d times: %s', request.path, url_name, count, sql)
+
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        if budget is not None and profile.count > budget:
+            message = f'{request.path} ({url_name}) ran {profile.count} queries, over its budget of {budget}'
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            query_logger.warning(message)
+
+        return response
+
+class SlowQueryLogMiddleware:
+    """Log the queries slower than SLOW_QUERY_THRESHOLD milliseconds, unless it is None, with their plan and where they were run."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD is None:
+            return self.get_response(request)
+
+        slow_query_log = SlowQueryLog(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(slow_query_log))
+            return self.get_response(request)
+
+class RequestTimingMiddleware:
+    """Measure the time spent in each view, its queries and its templates.
+
+    The timings are sent in a Server-Timing header, and kept in this process' latency buffer of the view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.timing = timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        timing.view = time.perf_counter() - start
+
+        response['Server-Timing'] = timing.get_server_timing()
+        if request.resolver_match:
+            latency_buffer.record(request.resolver_match.url_name, timing)
+        return response
+
+class MetricsMiddleware:
+    """Add the timings of each request to the Prometheus metrics, once its response is ready.
+
+    Must come before RequestTimingMiddleware, whose timings it reads.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        timing = getattr(request, 'timing', None)
+        if settings.METRICS_ENABLED and timing is not None and request.resolver_match:
+            labels = {'view': request.resolver_match.url_name}
+            metrics.request_duration.observe(timing.view, method=request.method, status=response.status_code, **labels)
+            metrics.request_queries.observe(timing.queries, **labels)
+            metrics.request_query_duration.observe(timing.db, **labels)
+        return response
+
+class CProfileMiddleware:
+    """Run the requests of staff asking for it, with a profile query parameter or an X-Profile header, under cProfile.
+
+    The profile is saved to PROFILING_DIRECTORY, and the response gets the functions taking the most cumulative
+    time in an X-Profile-Summary header and the URL of the full report in an X-Profile-Url header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not ('profile' in request.GET or 'HTTP_X_PROFILE' in request.META) or not request.user.is_staff:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+
+        name = save_profile(profiler, request.resolver_match.url_name if request.resolver_match else None)
+        top_functions = get_top_functions(pstats.Stats(profiler), settings.PROFILING_SUMMARY_FUNCTIONS)
+        response['X-Profile-Summary'] = '; '.join(f'{duration * 1000:.1f}ms {function}' for function, duration in top_functions)
+        response['X-Profile-Url'] = reverse('profile_report', kwargs={'name': name})
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:46
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_club_counters(apps, schema_editor):
+    Club = apps.get_model('clubs', 'Club')
+    clubs = Club.objects.annotate(
+        members=Count('membership', filter=~Q(membership__user_type='NM')),
+        officers=Count('membership', filter=Q(membership__user_type='OF')),
+        applications=Count('membership', filter=Q(membership__application_status='P'))
+    )
+    for club in clubs:
+        Club.objects.filter(pk=club.pk).update(
+            member_count=club.members,
+            officer_count=club.officers,
+            pending_application_count=club.applications
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0047_merge_20211216_2100'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='club',
+            name='member_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='club',
+            name='officer_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='club',
+            name='pending_application_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_club_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:51
+
+from django.db import migrations, models
+from hashlib import md5
+
+
+def populate_email_hashes(apps, schema_editor):
+    User = apps.get_model('clubs', 'User')
+    users = list(User.objects.only('id', 'email'))
+    for user in users:
+        user.email_hash = md5(user.email.lower().strip().encode('utf-8')).hexdigest()
+    User.objects.bulk_update(users, ['email_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0048_club_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(populate_email_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.10 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+USER_TYPE_RANKS = {'NM': 0, 'MB': 1, 'OF': 2, 'OW': 3}
+
+
+def populate_membership_ranks(apps, schema_editor):
+    Membership = apps.get_model('clubs', 'Membership')
+    for user_type, rank in USER_TYPE_RANKS.items():
+        Membership.objects.filter(user_type=user_type).update(rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0049_user_email_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membership',
+            name='rank',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Non Member'), (1, 'Member'), (2, 'Officer'), (3, 'Owner')], default=0, editable=False),
+        ),
+        migrations.RunPython(populate_membership_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['club', 'rank'], name='membership_club_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+CREATE_CLUB_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE clubs_club_search USING fts5(
+        name, location, mission_statement, description,
+        content='clubs_club', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER clubs_club_search_insert AFTER INSERT ON clubs_club BEGIN
+        INSERT INTO clubs_club_search(rowid, name, location, mission_statement, description)
+        VALUES (new.id, new.name, new.location, new.mission_statement, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER clubs_club_search_delete AFTER DELETE ON clubs_club BEGIN
+        INSERT INTO clubs_club_search(clubs_club_search, rowid, name, location, mission_statement, description)
+        VALUES ('delete', old.id, old.name, old.location, old.mission_statement, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER clubs_club_search_update AFTER UPDATE OF name, location, mission_statement, description ON clubs_club BEGIN
+        INSERT INTO clubs_club_search(clubs_club_search, rowid, name, location, mission_statement, description)
+        VALUES ('delete', old.id, old.name, old.location, old.mission_statement, old.description);
+        INSERT INTO clubs_club_search(rowid, name, location, mission_statement, description)
+        VALUES (new.id, new.name, new.location, new.mission_statement, new.description);
+    END
+    """,
+    "INSERT INTO clubs_club_search(clubs_club_search) VALUES ('rebuild')",
+]
+
+DROP_CLUB_SEARCH = [
+    "DROP TRIGGER IF EXISTS clubs_club_search_update",
+    "DROP TRIGGER IF EXISTS clubs_club_search_delete",
+    "DROP TRIGGER IF EXISTS clubs_club_search_insert",
+    "DROP TABLE IF EXISTS clubs_club_search",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # The full-text index relies on SQLite's FTS5 extension
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0050_membership_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_CLUB_SEARCH), run_on_sqlite(DROP_CLUB_SEARCH)),
+    ]
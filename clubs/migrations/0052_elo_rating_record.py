@@ -0,0 +1,71 @@
+# Generated by Django 3.2.10 on 2026-10-19 12:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+INITIAL_RATING = 1000
+WHITE_AWARDS = {'W': 1, 'D': 0.5, 'B': 0}
+
+
+def populate_elo_rating_records(apps, schema_editor):
+    """Replay every decided match in result order to store each member's rating history."""
+    Match = apps.get_model('clubs', 'Match')
+    Membership = apps.get_model('clubs', 'Membership')
+    EloRatingRecord = apps.get_model('clubs', 'EloRatingRecord')
+
+    memberships = {(membership.club_id, membership.user_id): membership for membership in Membership.objects.all()}
+    ratings = {}
+    records = []
+    matches = Match.objects.exclude(_result='P').exclude(result_date=None).select_related('tournament').order_by('result_date', 'id')
+    for match in matches:
+        club_id = match.tournament.club_id
+        white = memberships.get((club_id, match.white_player_id))
+        black = memberships.get((club_id, match.black_player_id))
+        rating_white = ratings.get(white.id, INITIAL_RATING) if white else INITIAL_RATING
+        rating_black = ratings.get(black.id, INITIAL_RATING) if black else INITIAL_RATING
+        expected_white = 1 / (1 + 10 ** ((rating_black - rating_white) / 400))
+        award_white = WHITE_AWARDS[match._result]
+        new_ratings = (
+            (white, rating_white + 32 * (award_white - expected_white)),
+            (black, rating_black + 32 * ((1 - award_white) - (1 - expected_white))),
+        )
+        for membership, rating in new_ratings:
+            if membership is None:
+                continue
+            ratings[membership.id] = rating
+            membership.highest_elo_rating = max(membership.highest_elo_rating, round(rating))
+            membership.lowest_elo_rating = min(membership.lowest_elo_rating, round(rating))
+            records.append(EloRatingRecord(membership=membership, match=match, rating=rating, date=match.result_date))
+
+    EloRatingRecord.objects.bulk_create(records, batch_size=1000)
+    rated = [membership for membership in memberships.values() if membership.id in ratings]
+    Membership.objects.bulk_update(rated, ['highest_elo_rating', 'lowest_elo_rating'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0051_club_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EloRatingRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField()),
+                ('date', models.DateTimeField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='elo_ratings', to='clubs.match')),
+                ('membership', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='elo_ratings', to='clubs.membership')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='eloratingrecord',
+            index=models.Index(fields=['membership', 'date'], name='elo_rating_membership_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eloratingrecord',
+            unique_together={('membership', 'match')},
+        ),
+        migrations.RunPython(populate_elo_rating_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.10 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0052_elo_rating_record'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='group',
+            name='tournament',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='clubs.tournament'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='black_player',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='tournament',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='clubs.tournament'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='white_player',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['tournament', 'phase'], name='group_tournament_phase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', '_result'], name='match_tournament_result_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['white_player', 'result_date'], name='match_white_player_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['black_player', 'result_date'], name='match_black_player_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['club', 'application_status'], name='membership_club_status_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.10 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0054_club_name_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FragmentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
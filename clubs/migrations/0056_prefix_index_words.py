@@ -0,0 +1,59 @@
+# Generated by Django 3.2.10 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+
+def get_word_starts(value):
+    """Return the lowercased value from the start of each of its words, as clubs.autocomplete.get_word_starts()."""
+    value = (value or '').lower()
+    starts = []
+    start = 0
+    while start < len(value):
+        starts.append(value[start:])
+        start = value.find(' ', start) + 1
+        if start == 0:
+            break
+    return starts
+
+
+def populate_club_name_words(apps, schema_editor):
+    """Store the word starts of the existing club names, searched by the autocomplete when the clubs are too many to index in memory."""
+    Club = apps.get_model('clubs', 'Club')
+    PrefixIndexWord = apps.get_model('clubs', 'PrefixIndexWord')
+    PrefixIndexWord.objects.bulk_create([
+        PrefixIndexWord(model='clubs.club', object_id=pk, word=word)
+        for pk, name in Club.objects.values_list('id', 'name').iterator()
+        for word in get_word_starts(name)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0055_fragmentversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrefixIndexWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('word', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='club',
+            name='club_name_lower_idx',
+        ),
+        migrations.AddIndex(
+            model_name='prefixindexword',
+            index=models.Index(fields=['model', 'word', 'object_id'], name='prefix_word_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prefixindexword',
+            index=models.Index(fields=['model', 'object_id'], name='prefix_word_object_idx'),
+        ),
+        migrations.RunPython(populate_club_name_words, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
 from .users import *
 from .clubs import *
-from .tournaments import *
\ No newline at end of file
+from .tournaments import *
+from .fragments import *
+from .search import *
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.core.validators import RegexValidator
 from django.db import models
 from django import forms
@@ -25,7 +26,20 @@ class Club(models.Model):
     mission_statement=models.CharField(max_length=200, blank=False)
     description=models.CharField(max_length=500, blank=False)
 
+    """Denormalized counters, maintained by Membership.save() and Membership.delete()"""
+    member_count = models.IntegerField(default=0)
+    officer_count = models.IntegerField(default=0)
+    pending_application_count = models.IntegerField(default=0)
+
+    COUNTER_FIELDS = ['member_count', 'officer_count', 'pending_application_count']
+
     def save(self, *args, **kwargs):
+        # Never write counters back from a (possibly stale) instance, they are only changed with F-expressions
+        if not self._state.adding and not kwargs.get('update_fields'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
         try:
             Membership.objects.get(club = self, user = self.owner)
@@ -38,11 +52,28 @@ class Club(models.Model):
                 personal_statement = "-"
             )
 
+class MembershipQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips Membership.save(), keep the rank in sync with the user type here too
+        objs = list(objs)
+        for membership in objs:
+            membership.rank = membership.get_rank()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if 'user_type' in kwargs and 'rank' not in kwargs:
+            kwargs['rank'] = Membership.USER_TYPE_RANKS[kwargs['user_type']]
+        return super().update(**kwargs)
+
 class Membership(models.Model):
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['user', 'club'], name='unique_user_club'),
         ]
+        indexes = [
+            models.Index(fields=['club', 'rank'], name='membership_club_rank_idx'),
+            models.Index(fields=['club', 'application_status'], name='membership_club_status_idx'),
+        ]
 
     class UserTypes(models.TextChoices):
         NON_MEMBER = 'NM'
@@ -55,16 +86,80 @@ class Membership(models.Model):
         APPROVED = 'A'
         DENIED = 'D'
 
+    class Ranks(models.IntegerChoices):
+        NON_MEMBER = 0
+        MEMBER = 1
+        OFFICER = 2
+        OWNER = 3
+
     """Attributes of a user in the club"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
     club = models.ForeignKey(Club, on_delete=models.CASCADE, null=False)
     personal_statement = models.CharField(max_length=500, blank=False)
     application_status = models.CharField(max_length=10, choices=Application.choices, default=Application.PENDING)
     user_type = models.CharField(max_length=10, choices=UserTypes.choices, default=UserTypes.NON_MEMBER)
+    """Position of the user type in the role hierarchy, kept in sync with user_type by save() so role checks are range queries"""
+    rank = models.PositiveSmallIntegerField(choices=Ranks.choices, default=Ranks.NON_MEMBER, editable=False)
 
     highest_elo_rating = models.IntegerField(default=1000)
     lowest_elo_rating = models.IntegerField(default=1000)
 
+    objects = MembershipQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'user_type' in field_names and 'application_status' in field_names:
+            instance._counted_as = instance.get_counter_contribution()
+        return instance
+
+    def get_counter_contribution(self):
+        """Returns how this membership counts towards its club's (members, officers, pending applications)."""
+        return (
+            int(self.user_type != self.UserTypes.NON_MEMBER),
+            int(self.user_type == self.UserTypes.OFFICER),
+            int(self.application_status == self.Application.PENDING)
+        )
+
+    def _get_stored_contribution(self):
+        """Returns the contribution of the row currently stored in the database."""
+        if self._state.adding:
+            return (0, 0, 0)
+        if not hasattr(self, '_counted_as'):
+            stored = Membership.objects.filter(pk=self.pk).values('user_type', 'application_status').first()
+            if stored is None:
+                return (0, 0, 0)
+            self._counted_as = Membership(**stored).get_counter_contribution()
+        return self._counted_as
+
+    def _update_club_counters(self, old, new):
+        """Applies the difference between two contributions to the club counters."""
+        members, officers, applications = (n - o for n, o in zip(new, old))
+        if members or officers or applications:
+            Club.objects.filter(pk=self.club_id).update(
+                member_count=F('member_count') + members,
+                officer_count=F('officer_count') + officers,
+                pending_application_count=F('pending_application_count') + applications
+            )
+
+    def save(self, *args, **kwargs):
+        self.rank = self.get_rank()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'user_type' in update_fields and 'rank' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['rank']
+        old = self._get_stored_contribution()
+        super().save(*args, **kwargs)
+        new = self.get_counter_contribution()
+        self._update_club_counters(old, new)
+        self._counted_as = new
+
+    def delete(self, *args, **kwargs):
+        old = self._get_stored_contribution()
+        result = super().delete(*args, **kwargs)
+        self._update_club_counters(old, (0, 0, 0))
+        self._counted_as = (0, 0, 0)
+        return result
+
     def approve_membership(self):
         """Application is approved and user becomes a memeber of the club."""
         if self.user_type == self.UserTypes.NON_MEMBER:
@@ -142,6 +237,17 @@ class Membership(models.Model):
     def get_user_types(self):
         return self.USER_TYPE_IDENTITIES[self.user_type]
 
+    # Define the rank of each user type in the role hierarchy
+    USER_TYPE_RANKS = {
+        UserTypes.NON_MEMBER: Ranks.NON_MEMBER,
+        UserTypes.MEMBER: Ranks.MEMBER,
+        UserTypes.OFFICER: Ranks.OFFICER,
+        UserTypes.OWNER: Ranks.OWNER
+    }
+
+    def get_rank(self):
+        return self.USER_TYPE_RANKS[self.user_type]
+
 
     USER_TYPE_NAMES = {
         UserTypes.NON_MEMBER: "a Non-Member",
@@ -0,0 +1,7 @@
+from django.db import models
+
+
+class FragmentVersion(models.Model):
+    """Version of an object that keys the template fragments rendered from it, shared by every worker process."""
+    key = models.CharField(max_length=100, unique=True, blank=False)
+    version = models.PositiveBigIntegerField(default=0)
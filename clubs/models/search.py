@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class PrefixIndexWord(models.Model):
+    """Lowercased column of an indexed row from the start of one of its words, searched when a table is too big to index in memory."""
+    class Meta:
+        indexes = [
+            # Answers PrefixIndex.search_database() in the order of the in-memory index
+            models.Index(fields=['model', 'word', 'object_id'], name='prefix_word_idx'),
+            # Finds the words of a row to replace them when it is saved
+            models.Index(fields=['model', 'object_id'], name='prefix_word_object_idx'),
+        ]
+
+    model = models.CharField(max_length=100, blank=False)
+    object_id = models.PositiveBigIntegerField()
+    word = models.CharField(max_length=255, blank=False)
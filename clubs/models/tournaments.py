@@ -1,9 +1,12 @@
 from django.db import models
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Q, Count, Max, Min
+from django.db.models.functions import Greatest, Least
 from django.contrib import messages
 from .users import User
 from .clubs import Club, Membership
+from clubs.fragment_cache import bump_version
+from clubs.metrics import timed_operation, stage_transitions
 import random
 from datetime import datetime
 import itertools
@@ -82,60 +85,66 @@ class Tournament(models.Model):
 
                 group = Group(tournament=self, name='Elimination 1', phase=last_competing_group.phase+1, stage=Group.GroupStageTypes.ELIMINATION)
                 group.save()
-                for competing_player in competing_players:
-                    group.players.add(competing_player)
+                group.players.add(*competing_players)
 
             # If first stage (with no group stages preceeding)
             else:
                 competing_players = self.competing_players()
                 group = Group(tournament=self, name='Elimination 1', phase=0, stage=Group.GroupStageTypes.ELIMINATION)
                 group.save()
-                for competing_player in competing_players:
-                    group.players.add(competing_player)
+                group.players.add(*competing_players)
         else:
             last_competing_group = Group.objects.filter(tournament=self).latest('phase')
             last_competing_players = self.competing_players()
-            last_matches = self.matches.filter(group=last_competing_group)
 
-            players_within_matches = []
-            for last_match in last_matches:
-                players_within_matches.append(last_match.white_player)
-                players_within_matches.append(last_match.black_player)
-
-            competing_players = []
+            # Group the last round's matches by pairing, recording whether each pairing has a decisive result
+            decisive_result = Q(_result=Match.MatchResultTypes.WHITE_WIN) | Q(_result=Match.MatchResultTypes.BLACK_WIN)
+            pairings = self.matches.filter(group=last_competing_group).values(
+                'white_player', 'black_player'
+            ).annotate(
+                white_wins=Count('id', filter=Q(_result=Match.MatchResultTypes.WHITE_WIN)),
+                black_wins=Count('id', filter=Q(_result=Match.MatchResultTypes.BLACK_WIN)),
+                decided_by=Max('id', filter=decisive_result),
+                first_match=Min('id')
+            ).order_by('first_match')
+
+            players_within_matches = set()
+            decided_pairings = []
+            for pairing in pairings:
+                players_within_matches.add(pairing['white_player'])
+                players_within_matches.add(pairing['black_player'])
+
+                if pairing['decided_by'] is not None:
+                    decided_pairings.append(pairing)
+                # TODO: Change functionality to reschedule match
+                else:
+                    rescheduled_matches.append(pairing)
 
             # Add bye player to competitors based on player not within matches
-            for last_competing_player in last_competing_players:
-                if not last_competing_player in players_within_matches:
-                    competing_players.append(last_competing_player)
-
-            for match in self.matches.filter(group=last_competing_group):
-                if match.result == Match.MatchResultTypes.WHITE_WIN:
-                    competing_players.append(match.white_player)
-                elif match.result == Match.MatchResultTypes.BLACK_WIN:
-                    competing_players.append(match.black_player)
+            competing_players = [player.id for player in last_competing_players if player.id not in players_within_matches]
 
-                # TODO: Change functionality to reschedule match
+            for pairing in sorted(decided_pairings, key=lambda pairing: pairing['decided_by']):
+                if pairing['white_wins']:
+                    competing_players.append(pairing['white_player'])
                 else:
-                    # If there doesn't exist a match between the players in the same round which has a result
-                    if not Match.objects.filter(white_player=match.white_player, black_player=match.black_player, tournament=self, group=last_competing_group).filter(Q(_result=Match.MatchResultTypes.WHITE_WIN) | Q(_result=Match.MatchResultTypes.BLACK_WIN)).exists():
-                        rescheduled_matches.append(match)
+                    competing_players.append(pairing['black_player'])
 
             if not rescheduled_matches:
                 group_index = last_competing_group.phase + 1
                 group = Group(tournament=self, name=f'Elimination {group_index}', stage=Group.GroupStageTypes.ELIMINATION, phase=group_index)
                 group.save()
-                for competing_player in competing_players:
-                    group.players.add(competing_player)
+                group.players.add(*competing_players)
 
         if rescheduled_matches:
-            for match in rescheduled_matches:
-                match = Match(white_player=match.white_player,
-                              black_player=match.black_player,
-                              tournament=self,
-                              group=last_competing_group)
-                match.save()
-                match_count += 1
+            matches = Match.objects.bulk_create([
+                Match(white_player_id=pairing['white_player'],
+                      black_player_id=pairing['black_player'],
+                      tournament=self,
+                      group=last_competing_group)
+                for pairing in rescheduled_matches
+            ])
+            match_count = len(matches)
+            bump_version(Tournament, self.pk)
             return (messages.SUCCESS, f'{match_count} matches rescheduled.')
         else:
             group_players = list(group.players.all())
@@ -161,13 +170,15 @@ class Tournament(models.Model):
             it = iter(ordered_group_players)
             players_of_matches = zip(it,it)
 
-            for players_of_match in players_of_matches:
-                match = Match(white_player=players_of_match[0],
-                              black_player=players_of_match[1],
-                              tournament=self,
-                              group=group)
-                match.save()
-                match_count += 1
+            matches = Match.objects.bulk_create([
+                Match(white_player=players_of_match[0],
+                      black_player=players_of_match[1],
+                      tournament=self,
+                      group=group)
+                for players_of_match in players_of_matches
+            ])
+            match_count = len(matches)
+            bump_version(Tournament, self.pk)
             return (messages.SUCCESS, f'{match_count} elimination stage matches generated.')
 
 
@@ -218,6 +229,7 @@ class Tournament(models.Model):
 
         return self.generate_group_stage_matches(groups)
 
+    @timed_operation('generate_matches')
     def generate_matches(self):
         """Generates matches for group and elimination stages"""
         if not self.matches.filter(_result=Match.MatchResultTypes.PENDING).exists():
@@ -232,8 +244,19 @@ class Tournament(models.Model):
             return (messages.WARNING, 'Matches already generated.')
 
 
+    def get_first_round_stage(self, participant_count=None):
+        """Returns the stage the tournament starts in once its sign-ups are closed, elimination for up to 16 participants, counted unless given"""
+        if participant_count is None:
+            participant_count = self.participants.count()
+        if participant_count <= 16:
+            return self.StageTypes.ELIMINATION
+        return self.StageTypes.GROUP_STAGES
+
+    @timed_operation('check_tournament_stage_transition')
     def check_tournament_stage_transition(self):
         """Checks whether previous stages of the tournament have been completed and moves to the next stage"""
+        previous_stage = self.stage
+
         if self.stage == self.StageTypes.SIGNUPS_OPEN:
             if self.deadline is not None:
                 if self.deadline < timezone.now():
@@ -241,10 +264,7 @@ class Tournament(models.Model):
 
         if self.stage == self.StageTypes.SIGNUPS_CLOSED:
             if self.date and self.date < timezone.now():
-                if self.participants.count() <= 16:
-                    self.stage = self.StageTypes.ELIMINATION
-                else:
-                    self.stage = self.StageTypes.GROUP_STAGES
+                self.stage = self.get_first_round_stage()
 
         elif self.stage == self.StageTypes.GROUP_STAGES:
             # If all group stage matches have been played
@@ -260,15 +280,20 @@ class Tournament(models.Model):
                 if last_competing_group.players.count() == 2 and self.matches.get(group=last_competing_group).result != Match.MatchResultTypes.PENDING:
                     self.stage = self.StageTypes.FINISHED
 
-        self.save()
+        # Only save on transitions, so viewing a tournament does not invalidate its cached fragments
+        if self.stage != previous_stage:
+            stage_transitions.inc(from_stage=previous_stage, to_stage=self.stage)
+            self.save()
 
-    def join_tournament(self, user):
+    @timed_operation('join_tournament')
+    def join_tournament(self, user, membership=None):
         current_datetime = timezone.make_aware(datetime.now(), timezone.utc)
         # The sign-up deadline must not have passed to be able to join the tournament
         if current_datetime < self.deadline:
-            # The user must be member of the club to join the tournament
+            # The user must be member of the club to join the tournament, the membership is looked up unless it is given
             try:
-                membership = Membership.objects.get(user=user, club=self.club)
+                if membership is None:
+                    membership = Membership.objects.get(user=user, club=self.club)
                 # The user must not be one of the tournament's organizers to be able to join the tournament
                 if (Membership.UserTypes.MEMBER in membership.get_user_types()):
                     if user != self.organizer and user not in self.coorganizers.all():
@@ -338,9 +363,15 @@ class Group(models.Model):
     class GroupStageTypes(models.TextChoices):
         ELIMINATION = 'E'
         GROUP_STAGE = 'G'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tournament', 'phase'], name='group_tournament_phase_idx'),
+        ]
+
     """Attributes off groups"""
     name = models.CharField(max_length=100, blank=False)
-    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, null=False, related_name="groups")
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, null=False, related_name="groups", db_index=False)
     players = models.ManyToManyField(User)
 
     stage = models.CharField(max_length=1, choices=GroupStageTypes.choices, default=GroupStageTypes.ELIMINATION)
@@ -366,9 +397,10 @@ class Match(models.Model):
         DRAW = 'D'
         BLACK_WIN = 'B'
     """Attributes of the matches"""
-    white_player = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
-    black_player = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
-    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, null=False, related_name="matches")
+    # The foreign keys are the first columns of the composite indexes in Meta, which also serve lookups on them alone
+    white_player = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False)
+    black_player = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False)
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, null=False, related_name="matches", db_index=False)
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, null=True, related_name="matches")
     _result = models.CharField(max_length=1, choices=MatchResultTypes.choices, default=MatchResultTypes.PENDING)
 
@@ -384,12 +416,49 @@ class Match(models.Model):
 
     result_date = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tournament', '_result'], name='match_tournament_result_idx'),
+            models.Index(fields=['white_player', 'result_date'], name='match_white_player_date_idx'),
+            models.Index(fields=['black_player', 'result_date'], name='match_black_player_date_idx'),
+        ]
+
     MATCH_AWARDS = {
         "WIN": 1,
         "DRAW": 0.5,
         "LOSS": 0
     }
 
+    @staticmethod
+    def get_player_matches(user, club):
+        """Returns the matches played by the user in the club's tournaments."""
+        return Match.objects.filter(Q(white_player=user) | Q(black_player=user), tournament__club=club)
+
+    @staticmethod
+    def get_player_statistics(user, club):
+        """Returns the user's numbers of wins, losses and draws in the club's tournaments, counted in one query."""
+        statistics = Match.get_player_matches(user, club).aggregate(
+            wins=Count('id', filter=Q(white_player=user, _result=Match.MatchResultTypes.WHITE_WIN) | Q(black_player=user, _result=Match.MatchResultTypes.BLACK_WIN)),
+            losses=Count('id', filter=Q(white_player=user, _result=Match.MatchResultTypes.BLACK_WIN) | Q(black_player=user, _result=Match.MatchResultTypes.WHITE_WIN)),
+            draws=Count('id', filter=Q(_result=Match.MatchResultTypes.DRAW))
+        )
+        return [statistics['wins'], statistics['losses'], statistics['draws']]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        match = super().from_db(db, field_names, values)
+        # The stored result, to tell a corrected result from the first one when the match is saved
+        match._saved_result = match.__dict__.get('_result')
+        return match
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The players' ratings are stored when the result of the match is first set, and replayed when it is corrected
+        if self._result != self.MatchResultTypes.PENDING and self.result_date is not None:
+            saved_result = getattr(self, '_saved_result', None)
+            EloRating.record_ratings(self, corrected=saved_result is not None and saved_result != self._result)
+        self._saved_result = self._result
+
     def get_match_award_for_user(self, user):
         """Returns the outcome of the matches"""
         if user != self.white_player and user != self.black_player:
@@ -414,6 +483,8 @@ class Match(models.Model):
                     return self.MATCH_AWARDS["LOSS"]
 
 class EloRating():
+    INITIAL_RATING = 1000
+
     @staticmethod
     def calculate_new_elo_rating(rating_a, player_a, rating_b, player_b, match):
         expected_score_a = 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
@@ -425,35 +496,95 @@ class EloRating():
         return new_rating_a, new_rating_b
 
     @staticmethod
-    def get_ratings(membership, date = None):
-        if not date:
-            date = timezone.now()
-
-        matches = Match.objects.filter(
-            Q(white_player = membership.user) | Q(black_player = membership.user)
-        ).filter(
-            result_date__lt=date
-        ).order_by('result_date')
-
-        current_rating = 1000
-        ratings = [(1000,None)]
-        for match in matches:
-            if match.white_player == membership.user:
-                player_b = match.black_player
-            else:
-                player_b = match.white_player
+    def get_current_rating(membership, date = None):
+        """Returns the member's rating before the given date, read from its stored rating history."""
+        records = EloRatingRecord.objects.filter(membership=membership)
+        if date:
+            records = records.filter(date__lt=date)
+        record = records.order_by('-date', '-id').values_list('rating', flat=True).first()
+        return record if record is not None else EloRating.INITIAL_RATING
 
-            player_b_membership = Membership.objects.get(user = player_b, club = membership.club)
-            rating_b = EloRating.get_ratings(player_b_membership, match.result_date)[-1][0]
+    @staticmethod
+    def get_ratings(membership, date = None):
+        """Returns the member's (rating, date) history before the given date, starting from the initial rating."""
+        records = EloRatingRecord.objects.filter(membership=membership)
+        if date:
+            records = records.filter(date__lt=date)
+        return [(EloRating.INITIAL_RATING, None)] + list(records.order_by('date', 'id').values_list('rating', 'date'))
 
-            current_rating = EloRating.calculate_new_elo_rating(current_rating, membership.user, rating_b, player_b, match)[0]
-            ratings.append((current_rating, match.result_date))
+    @staticmethod
+    @timed_operation('record_ratings')
+    def record_ratings(match, corrected=False):
+        """Stores both players' new ratings in the match's club once its result is known.
+
+        When the result of a rated match is corrected, the ratings of both players are replayed from that match on.
+        """
+        if match.white_player is None or match.black_player is None:
+            return
+        records = EloRatingRecord.objects.filter(match=match)
+        if not corrected:
+            if not records.exists():
+                EloRating.store_ratings(match)
+            return
+
+        first_date = records.order_by('date').values_list('date', flat=True).first()
+        memberships = list(Membership.objects.filter(club=match.tournament.club_id, user__in=[match.white_player, match.black_player]))
+        if first_date is None or not memberships:
+            EloRating.store_ratings(match)
+            return
+
+        # The match's records and every later record of both players are stored again, in the order of the match results
+        replayed = EloRatingRecord.objects.filter(membership__in=memberships, date__gte=first_date)
+        match_ids = set(replayed.values_list('match', flat=True)) | {match.id}
+        replayed.delete()
+        membership_ids = {membership.id for membership in memberships}
+        for replayed_match in Match.objects.filter(id__in=match_ids).select_related('white_player', 'black_player').order_by('result_date', 'id'):
+            EloRating.store_ratings(replayed_match, membership_ids)
+
+        # The highest and lowest ratings may have come from the replaced records, they are read again from the whole history
+        for membership in memberships:
+            extremes = EloRatingRecord.objects.filter(membership=membership).aggregate(highest=Max('rating'), lowest=Min('rating'))
+            highest = EloRating.INITIAL_RATING if extremes['highest'] is None else max(EloRating.INITIAL_RATING, round(extremes['highest']))
+            lowest = EloRating.INITIAL_RATING if extremes['lowest'] is None else min(EloRating.INITIAL_RATING, round(extremes['lowest']))
+            Membership.objects.filter(pk=membership.pk).update(highest_elo_rating=highest, lowest_elo_rating=lowest)
 
-        if current_rating < membership.lowest_elo_rating:
-            membership.lowest_elo_rating = current_rating
-            membership.save()
-        elif current_rating > membership.highest_elo_rating:
-            membership.highest_elo_rating = current_rating
-            membership.save()
+    @staticmethod
+    def store_ratings(match, membership_ids=None):
+        """Stores the new ratings of the match's players, or of the given memberships only, from their ratings before the match."""
+        players = [match.white_player, match.black_player]
+        memberships = {
+            membership.user_id: membership
+            for membership in Membership.objects.filter(club=match.tournament.club_id, user__in=players)
+        }
+        ratings = [
+            EloRating.get_current_rating(memberships[player.id], None if membership_ids is None else match.result_date)
+            if player.id in memberships else EloRating.INITIAL_RATING
+            for player in players
+        ]
+        new_ratings = EloRating.calculate_new_elo_rating(ratings[0], players[0], ratings[1], players[1], match)
+
+        records = []
+        for player, rating in zip(players, new_ratings):
+            membership = memberships.get(player.id)
+            if membership is None or (membership_ids is not None and membership.id not in membership_ids):
+                continue
+            records.append(EloRatingRecord(membership=membership, match=match, rating=rating, date=match.result_date))
+            Membership.objects.filter(pk=membership.pk).update(
+                highest_elo_rating=Greatest('highest_elo_rating', round(rating)),
+                lowest_elo_rating=Least('lowest_elo_rating', round(rating))
+            )
+        EloRatingRecord.objects.bulk_create(records)
+
+
+class EloRatingRecord(models.Model):
+    """Rating of a member after one of its matches, stored when the match result is set."""
+    membership = models.ForeignKey(Membership, on_delete=models.CASCADE, related_name="elo_ratings")
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="elo_ratings")
+    rating = models.FloatField()
+    date = models.DateTimeField()
 
-        return ratings
+    class Meta:
+        unique_together = ("membership", "match")
+        indexes = [
+            models.Index(fields=['membership', 'date'], name='elo_rating_membership_date_idx'),
+        ]
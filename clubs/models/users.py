@@ -2,7 +2,7 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from libgravatar import Gravatar
+from libgravatar import md5_hash, sanitize_email
 
 
 # Create your models here.
@@ -35,8 +35,27 @@ class User(AbstractUser):
     public_bio = models.CharField(max_length=250, blank=False)
     chess_experience = models.CharField(max_length=1, choices=Experience.choices, default=Experience.BEGINNER)
 
+    """MD5 hash of the sanitized email, kept up to date on save so rendering avatars does no hashing."""
+    email_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    GRAVATAR_URL = 'https://www.gravatar.com/avatar/{email_hash}?size={size}&default=mp'
+
+    @staticmethod
+    def hash_email(email):
+        """Return the gravatar hash of an email address."""
+        return md5_hash(sanitize_email(email))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'email' in update_fields:
+            email_hash = self.hash_email(self.email)
+            if email_hash != self.email_hash:
+                self.email_hash = email_hash
+                if update_fields is not None:
+                    kwargs['update_fields'] = list(update_fields) + ['email_hash']
+        super().save(*args, **kwargs)
+
     def gravatar(self, size=120):
         """Return a URL to the user's gravatar."""
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        email_hash = self.email_hash or self.hash_email(self.email)
+        return self.GRAVATAR_URL.format(email_hash=email_hash, size=size)
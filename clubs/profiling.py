@@ -0,0 +1,250 @@
+"""Instrumentation of the requests served by the app: their SQL queries and where their time goes."""
+import io
+import json
+import logging
+import math
+import os
+import pstats
+import re
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('clubs.queries')
+slow_query_logger = logging.getLogger('clubs.slow_queries')
+
+# Literals and parameter lists are collapsed, so queries differing only in their values normalise to the same statement
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PARAMETER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+def normalise_sql(sql):
+    """Return the statement of a query with its literal values replaced by placeholders."""
+    sql = STRING_LITERAL.sub('%s', sql)
+    sql = NUMBER_LITERAL.sub('%s', sql)
+    sql = PARAMETER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its budget and budgets are enforced."""
+
+class QueryProfile:
+    """Database execute wrapper recording the normalised statement and duration of every query it runs."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((normalise_sql(sql), time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """Total time spent running queries, in seconds."""
+        return sum(duration for _, duration in self.queries)
+
+    def get_duplicates(self, threshold=2):
+        """Return the statements run at least threshold times, the signature of an N+1 query, with their counts."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.most_common() if count >= threshold}
+
+def get_query_plan(connection, sql, params):
+    """Return the lines of the plan of a query, or None if the database cannot explain it."""
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    # A cursor of the underlying driver, so the plan is not counted as a query of the request by the execute wrappers
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{prefix} {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except connection.Database.Error:
+        return None
+    finally:
+        cursor.close()
+
+def get_caller_location():
+    """Return the innermost frame of the project's own code running the current query, as file:line in function."""
+    base_directory = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(base_directory) and frame.filename != __file__ and 'site-packages' not in frame.filename:
+            return f'{os.path.relpath(frame.filename, base_directory)}:{frame.lineno} in {frame.name}'
+    return None
+
+class SlowQueryLog:
+    """Database execute wrapper logging the queries of a request slower than SLOW_QUERY_THRESHOLD, with their plan."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD:
+            resolver_match = self.request.resolver_match
+            slow_query_logger.warning(json.dumps({
+                'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'duration': round(duration * 1000, 1),
+                'sql': normalise_sql(sql),
+                'params': repr(params),
+                'view': resolver_match.url_name if resolver_match else None,
+                'location': get_caller_location(),
+                'plan': None if many else get_query_plan(context['connection'], sql, params),
+            }))
+        return result
+
+def get_slow_queries(limit):
+    """Return the latest entries of the slow query log, latest first."""
+    try:
+        with open(settings.SLOW_QUERY_LOG) as log:
+            lines = deque(log, maxlen=limit)
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # A line cut short by a concurrent write or a rotation
+            continue
+    return entries
+
+
+# Timing of the request being served in the current thread or task, filled in by the database and template hooks
+current_timing = ContextVar('current_timing', default=None)
+
+class RequestTiming:
+    """Time spent serving a request, in its view as a whole and in database queries and template rendering."""
+
+    def __init__(self):
+        self.view = 0
+        self.db = 0
+        self.template = 0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def get_server_timing(self):
+        """Return the timings as a Server-Timing header value, in milliseconds."""
+        return ', '.join(
+            f'{name};dur={duration * 1000:.1f};desc="{description}"'
+            for name, duration, description in (
+                ('view', self.view, 'View'),
+                ('db', self.db, 'Database'),
+                ('template', self.template, 'Templates'),
+            )
+        )
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend adding the time spent rendering templates to the timing of the current request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+class TimedTemplate(Template):
+    """Template of the TimedDjangoTemplates backend."""
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing = current_timing.get()
+            if timing is not None:
+                timing.template += time.perf_counter() - start
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)] if values else None
+
+class LatencyBuffer:
+    """Per-process ring buffers of the latest request timings of each view, by URL name."""
+
+    PERCENTILES = {'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.timings = defaultdict(lambda: deque(maxlen=self.size))
+
+    def record(self, url_name, timing):
+        with self.lock:
+            self.timings[url_name].append((timing.view, timing.db, timing.template))
+
+    def clear(self):
+        with self.lock:
+            self.timings.clear()
+
+    def get_percentiles(self):
+        """Return the number of recorded requests and the view, database and template time percentiles of each view, in milliseconds."""
+        with self.lock:
+            timings = {url_name: list(buffer) for url_name, buffer in self.timings.items()}
+
+        results = []
+        for url_name, requests in sorted(timings.items()):
+            result = {'url_name': url_name, 'count': len(requests)}
+            for index, measure in enumerate(('view', 'db', 'template')):
+                durations = sorted(request[index] * 1000 for request in requests)
+                result[measure] = {name: round(percentile(durations, fraction), 1) for name, fraction in self.PERCENTILES.items()}
+            results.append(result)
+        return results
+
+latency_buffer = LatencyBuffer(settings.LATENCY_BUFFER_SIZE)
+
+
+# Saved profiles are named after the time and view of their request, and only read back by these names
+PROFILE_NAME = re.compile(r'^[\w-]+\.prof$')
+
+def save_profile(profiler, url_name):
+    """Save the stats of a profiled request to PROFILING_DIRECTORY, deleting the oldest profiles over PROFILING_MAX_FILES, and return its name."""
+    directory = settings.PROFILING_DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+    seconds, nanoseconds = divmod(time.time_ns(), 10 ** 9)
+    name = f'{time.strftime("%Y%m%d-%H%M%S", time.gmtime(seconds))}-{nanoseconds:09d}-{url_name or "unknown"}.prof'
+    profiler.dump_stats(os.path.join(directory, name))
+
+    profiles = sorted(entry for entry in os.listdir(directory) if PROFILE_NAME.match(entry))
+    for old_name in profiles[:max(len(profiles) - settings.PROFILING_MAX_FILES, 0)]:
+        try:
+            os.remove(os.path.join(directory, old_name))
+        except FileNotFoundError:
+            pass
+    return name
+
+def get_top_functions(stats, limit):
+    """Return the (function, cumulative seconds) of the functions of a pstats.Stats taking the most cumulative time."""
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [(pstats.func_std_string(function), timings[3]) for function, timings in functions]
+
+def get_profile_report(name, limit):
+    """Return the pstats report of the functions of a saved profile taking the most cumulative time, or None if there is no such profile."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIRECTORY, name)
+    if not os.path.exists(path):
+        return None
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
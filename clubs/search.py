@@ -0,0 +1,48 @@
+"""Full-text club search, backed by an SQLite FTS5 index over the clubs' text columns."""
+import re
+
+from django.db import connection
+
+from clubs.models import Club
+
+# Name of the FTS5 table indexing the clubs, kept in sync with clubs_club by triggers
+CLUB_SEARCH_TABLE = 'clubs_club_search'
+
+# Columns of the index, in the order they are declared in the FTS5 table
+CLUB_SEARCH_COLUMNS = ['name', 'location', 'mission_statement', 'description']
+
+# Weight of each indexed column when ranking the results, matches in a name count the most
+CLUB_SEARCH_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+
+def build_match_query(text):
+    """Return the FTS5 query matching every word of the text as a prefix, or None if the text has no word."""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    # Each word is quoted so that FTS5 operators typed by the user are searched for as plain words
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search_clubs(text, page=1, page_size=20):
+    """Return the clubs on the given page of the best matches for the text, and whether there is a next page."""
+    match_query = build_match_query(text)
+    if match_query is None:
+        return [], False
+
+    offset = (page - 1) * page_size
+    if connection.vendor == 'sqlite':
+        weights = ', '.join(str(weight) for weight in CLUB_SEARCH_WEIGHTS)
+        clubs = list(Club.objects.raw(
+            f'SELECT clubs_club.* FROM {CLUB_SEARCH_TABLE} '
+            f'JOIN clubs_club ON clubs_club.id = {CLUB_SEARCH_TABLE}.rowid '
+            f'WHERE {CLUB_SEARCH_TABLE} MATCH %s '
+            f'ORDER BY bm25({CLUB_SEARCH_TABLE}, {weights}) LIMIT %s OFFSET %s',
+            [match_query, page_size + 1, offset]
+        ))
+    else:
+        # Other databases have no FTS5 index, fall back to matching the names
+        clubs = Club.objects.all()
+        for word in re.findall(r'\w+', text):
+            clubs = clubs.filter(name__icontains=word)
+        clubs = list(clubs.order_by('name')[offset:offset + page_size + 1])
+
+    return clubs[:page_size], len(clubs) > page_size
@@ -0,0 +1,34 @@
+"""Signal receivers keeping the cached template fragments and the autocomplete indexes up to date."""
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from clubs.autocomplete import club_index
+from clubs.fragment_cache import bump_version
+from clubs.models import User, Club, Membership, Tournament, Match
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    bump_version(User, instance.pk)
+
+@receiver([post_save, post_delete], sender=Club)
+def club_changed(sender, instance, signal, update_fields=None, **kwargs):
+    bump_version(Club, instance.pk)
+    club_index.update(instance, update_fields, deleted=signal is post_delete)
+
+@receiver([post_save, post_delete], sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    bump_version(Club, instance.club_id)
+
+@receiver([post_save, post_delete], sender=Tournament)
+def tournament_changed(sender, instance, **kwargs):
+    bump_version(Tournament, instance.pk)
+
+@receiver([post_save, post_delete], sender=Match)
+def match_changed(sender, instance, **kwargs):
+    bump_version(Tournament, instance.tournament_id)
+
+@receiver(request_finished)
+def rebuild_stale_indexes(sender, **kwargs):
+    # Once the response is sent, so the lookup that found the index out of date did not wait for it
+    club_index.rebuild()
@@ -0,0 +1,19 @@
+"""Template tags for the clubs app."""
+from django import template
+
+from clubs.fragment_cache import get_version
+
+register = template.Library()
+
+@register.simple_tag
+def gravatar(user, size=120):
+    """Return the URL to a user's gravatar at the given size."""
+    return user.gravatar(size)
+
+@register.simple_tag
+def object_version(obj, related_field=None):
+    """Return the version of an object, or of the object behind one of its foreign keys without loading it."""
+    if related_field is not None:
+        field = obj._meta.get_field(related_field)
+        return get_version(field.related_model, getattr(obj, field.attname))
+    return get_version(type(obj), obj.pk)
@@ -0,0 +1,83 @@
+"""Tests of the bench management command."""
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from clubs.models import Tournament, Match
+
+class BenchCommandTestCase(TestCase):
+    """Tests of the bench management command."""
+
+    BENCHMARKS = [
+        'club_dashboard', 'tournament_dashboard', 'member_profile', 'available_clubs',
+        'join_tournament', 'generate_matches', 'get_ratings', 'stage_transition'
+    ]
+
+    def setUp(self):
+        call_command('seed', users=60, clubs=3, tournaments=8, matches=1000, seed=1, simulate_results=True, stdout=StringIO())
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'bench.json')
+        self.baseline = os.path.join(directory.name, 'baseline.json')
+
+    def bench(self, **options):
+        call_command('bench', in_place=True, repeat=1, stdout=StringIO(), **options)
+
+    def write_baseline(self, report):
+        with open(self.baseline, 'w') as baseline:
+            json.dump(report, baseline)
+
+    def test_results_are_written_as_json(self):
+        self.bench(output=self.output)
+        with open(self.output) as output:
+            report = json.load(output)
+        self.assertEqual(report['dataset'], {'size': 'in-place'})
+        self.assertEqual(list(report['results']), self.BENCHMARKS)
+        for result in report['results'].values():
+            self.assertGreater(result['median_ms'], 0)
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory'], 0)
+
+    def test_benchmarks_leave_the_data_unchanged(self):
+        tournaments = list(Tournament.objects.values_list('id', 'stage', 'deadline'))
+        match_count = Match.objects.count()
+        self.bench()
+        self.assertEqual(list(Tournament.objects.values_list('id', 'stage', 'deadline')), tournaments)
+        self.assertEqual(Match.objects.count(), match_count)
+
+    def test_shared_caches_are_kept_in_place(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared_cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name}
+        with self.settings(CACHES={**settings.CACHES, 'shared': shared_cache}):
+            caches['shared'].set('fragment', 'cached', None)
+            self.bench()
+            self.assertEqual(caches['shared'].get('fragment'), 'cached')
+
+    def test_comparison_with_baseline(self):
+        self.bench(output=self.output)
+        with open(self.output) as output:
+            report = json.load(output)
+        self.write_baseline(report)
+        self.bench(baseline=self.baseline, max_slowdown=1000)
+
+        report['results']['get_ratings']['median_ms'] /= 10000
+        report['results']['member_profile']['queries'] -= 1
+        self.write_baseline(report)
+        with self.assertRaisesMessage(CommandError, '2 benchmarks regressed: member_profile, get_ratings'):
+            self.bench(baseline=self.baseline, max_slowdown=1000)
+
+    def test_baseline_of_another_dataset_is_refused(self):
+        self.write_baseline({'dataset': {'size': 'small', 'seed': 0}, 'repeat': 1, 'results': {}})
+        with self.assertRaises(CommandError):
+            self.bench(baseline=self.baseline)
+
+    def test_repeat_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('bench', in_place=True, repeat=0, stdout=StringIO())
@@ -0,0 +1,108 @@
+"""Tests of the seed management command."""
+from django.contrib import messages
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match, Group, EloRating, EloRatingRecord
+
+class SeedCommandTestCase(TestCase):
+    """Tests of the seed management command."""
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), **options)
+
+    def test_seed_scale_options(self):
+        self.seed(users=40, clubs=4, tournaments=6, matches=1000)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Club.objects.count(), 4)
+        self.assertEqual(Tournament.objects.count(), 6)
+        self.assertTrue(User.objects.get(username='jkerman').check_password('Password123'))
+        user = User.objects.exclude(username__endswith='kerman').first()
+        self.assertTrue(user.check_password('Password123'))
+        self.assertEqual(user.email_hash, User.hash_email(user.email))
+
+    def test_seeded_clubs_are_consistent(self):
+        self.seed(users=40, clubs=4, tournaments=6, matches=1000)
+        for club in Club.objects.all():
+            owner_membership = Membership.objects.get(club=club, user=club.owner)
+            self.assertEqual(owner_membership.user_type, Membership.UserTypes.OWNER)
+            members = Membership.objects.filter(club=club).exclude(user_type=Membership.UserTypes.NON_MEMBER)
+            self.assertEqual(club.member_count, members.count())
+            self.assertEqual(club.officer_count, members.filter(user_type=Membership.UserTypes.OFFICER).count())
+        for membership in Membership.objects.all():
+            self.assertEqual(membership.rank, membership.get_rank())
+
+    def test_seeded_tournaments_are_consistent(self):
+        self.seed(users=60, clubs=3, tournaments=8, matches=1000)
+        for participation in TournamentParticipation.objects.select_related('tournament'):
+            self.assertTrue(Membership.objects.filter(club=participation.tournament.club_id, user=participation.user_id, rank__gte=Membership.Ranks.MEMBER).exists())
+        for tournament in Tournament.objects.all():
+            if tournament.matches.exists():
+                self.assertIn(tournament.stage, [Tournament.StageTypes.ELIMINATION, Tournament.StageTypes.GROUP_STAGES])
+                # The seeded first round is pending, so the organizer cannot generate it again
+                self.assertEqual(tournament.generate_matches(), (messages.WARNING, 'Matches already generated.'))
+
+    def test_seed_match_budget(self):
+        self.seed(users=60, clubs=3, tournaments=8, matches=0)
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(Tournament.objects.exclude(stage=Tournament.StageTypes.SIGNUPS_OPEN).exists())
+
+    def test_seed_rejects_negative_counts(self):
+        with self.assertRaises(CommandError):
+            self.seed(users=-1)
+        with self.assertRaises(CommandError):
+            self.seed(workers=0)
+
+    def snapshot(self):
+        """Returns the seeded data without its primary keys."""
+        return {
+            'users': list(User.objects.order_by('username').values_list('username', 'name', 'email', 'password', 'public_bio', 'chess_experience', 'date_joined')),
+            'clubs': list(Club.objects.order_by('name').values_list('name', 'owner__username', 'location', 'description', 'member_count', 'officer_count')),
+            'memberships': list(Membership.objects.order_by('user__username', 'club__name').values_list('user__username', 'club__name', 'user_type', 'personal_statement')),
+            'tournaments': list(Tournament.objects.order_by('club__name', 'name').values_list('club__name', 'name', 'organizer__username', 'date', 'deadline', 'capacity', 'stage')),
+            'participants': sorted(TournamentParticipation.objects.values_list('tournament__name', 'user__username')),
+            'groups': sorted(Group.objects.values_list('tournament__name', 'name', 'phase')),
+            'matches': sorted(Match.objects.values_list('tournament__name', 'white_player__username', 'black_player__username')),
+        }
+
+    def reseed(self, **options):
+        call_command('unseed')
+        self.seed(**options)
+        return self.snapshot()
+
+    @mock.patch('clubs.management.commands.seed.PARTITION_SIZE', 15)
+    def test_seed_is_deterministic(self):
+        options = {'users': 60, 'clubs': 5, 'tournaments': 8, 'matches': 1000, 'seed': 42}
+        first = self.reseed(**options)
+        self.assertEqual(self.reseed(**options), first)
+        self.assertNotEqual(self.reseed(**dict(options, seed=43)), first)
+
+    @mock.patch('clubs.management.commands.seed.PARTITION_SIZE', 15)
+    def test_seed_is_independent_of_workers(self):
+        options = {'users': 60, 'clubs': 5, 'tournaments': 8, 'matches': 1000, 'seed': 7}
+        self.assertEqual(self.reseed(workers=2, **options), self.reseed(**options))
+
+    def test_seed_size_presets(self):
+        with mock.patch.dict('clubs.management.commands.seed.Command.PRESETS', {'small': {'users': 30, 'clubs': 3, 'tournaments': 4, 'matches': 50}}):
+            self.seed(size='small', clubs=2)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Club.objects.count(), 2)
+
+    def test_seed_simulate_results(self):
+        self.seed(users=80, clubs=3, tournaments=6, matches=10000, seed=3, simulate_results=True)
+        self.assertFalse(Match.objects.filter(_result=Match.MatchResultTypes.PENDING).exists())
+        played = Tournament.objects.filter(matches__isnull=False).distinct()
+        self.assertTrue(played.exists())
+        for tournament in played:
+            self.assertEqual(tournament.stage, Tournament.StageTypes.FINISHED)
+            self.assertFalse(tournament.matches.filter(result_date__lte=tournament.date).exists())
+
+    def test_seed_simulated_ratings(self):
+        self.seed(users=80, clubs=3, tournaments=6, matches=10000, seed=3, simulate_results=True)
+        self.assertEqual(EloRatingRecord.objects.count(), 2 * Match.objects.count())
+        for membership in Membership.objects.filter(elo_ratings__isnull=False).distinct():
+            ratings = [rating for rating, _ in EloRating.get_ratings(membership)]
+            self.assertEqual(membership.highest_elo_rating, max(round(rating) for rating in ratings))
+            self.assertEqual(membership.lowest_elo_rating, min(round(rating) for rating in ratings))
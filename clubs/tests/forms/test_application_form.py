@@ -1,6 +1,8 @@
 """Unit tests of the membership application form."""
 from django import forms
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from clubs.models import User, Club, Membership
 from clubs.forms import MembershipApplicationForm
 
@@ -59,3 +61,38 @@ class ApplicationFormTestCase(TestCase):
         self.assertEqual(after_count, before_count + 1)
         form = MembershipApplicationForm(initial = {'user': self.user}, data=self.form_input)
         self.assertFalse(form.is_valid())
+
+    def test_club_field_renders_selected_club_only(self):
+        Club.objects.create(name='Another Chess Club', owner=User.objects.get(username='janedoe'))
+        form = MembershipApplicationForm(initial = {'user': self.user}, data=self.form_input)
+        rendered = str(form['club'])
+        self.assertIn('Kerbal Chess Club', rendered)
+        self.assertNotIn('Another Chess Club', rendered)
+        self.assertIn('data-url="/autocomplete/clubs"', rendered)
+
+    def test_cannot_apply_to_club_applied_to(self):
+        Membership.objects.create(user=self.user, club=self.club)
+        form = MembershipApplicationForm(initial = {'user': self.user}, data=self.form_input)
+        self.assertFalse(form.is_valid())
+        self.assertIn('You have already applied to this club.', form.non_field_errors())
+
+    def test_accepts_club_id(self):
+        self.form_input['club'] = str(self.club.id)
+        form = MembershipApplicationForm(initial = {'user': self.user}, data=self.form_input)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['club'], self.club)
+
+    def test_rejects_unknown_club_id(self):
+        self.form_input['club'] = '999'
+        form = MembershipApplicationForm(initial = {'user': self.user}, data=self.form_input)
+        self.assertFalse(form.is_valid())
+        self.assertIn('club', form.errors)
+
+    def test_validation_checks_application_once(self):
+        self.form_input['club'] = str(self.club.id)
+        form = MembershipApplicationForm(data=self.form_input)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        membership_queries = [query for query in queries if 'clubs_membership' in query['sql']]
+        self.assertEqual(len(membership_queries), 1)
+        self.assertIn('LIMIT 1', membership_queries[0]['sql'])
@@ -1,7 +1,7 @@
 """Unit tests for Elo Ratings."""
 from django.core.exceptions import ValidationError
 from django.test import TestCase
-from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match, Group, EloRating
+from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match, Group, EloRating, EloRatingRecord
 from django.utils.timezone import make_aware
 from django.utils import timezone
 import datetime
@@ -101,3 +101,59 @@ class EloRatingTestCase(TestCase):
 
 
         self.assertEqual(self.tournament.stage, Tournament.StageTypes.FINISHED)
+
+    def test_match_result_records_ratings(self):
+        owner_membership = Membership.objects.get(user = self.owner, club = self.club)
+        match = Match.objects.create(tournament = self.tournament, white_player = self.owner, black_player = self.officer)
+        self.assertFalse(EloRatingRecord.objects.exists())
+
+        match.result = Match.MatchResultTypes.WHITE_WIN
+        match.save()
+        match.save()
+
+        self.assertEqual(EloRatingRecord.objects.filter(match = match).count(), 2)
+        self.assertEqual(EloRating.get_current_rating(owner_membership), 1016)
+        self.assertEqual(EloRating.get_current_rating(self.officer_membership), 984)
+        self.assertEqual(EloRating.get_ratings(owner_membership), [(1000, None), (1016, match.result_date)])
+        self.assertEqual(EloRating.get_current_rating(owner_membership, match.result_date), 1000)
+
+        owner_membership.refresh_from_db()
+        self.officer_membership.refresh_from_db()
+        self.assertEqual(owner_membership.highest_elo_rating, 1016)
+        self.assertEqual(self.officer_membership.lowest_elo_rating, 984)
+
+    def test_ratings_continue_from_previous_match(self):
+        for result in [Match.MatchResultTypes.WHITE_WIN, Match.MatchResultTypes.DRAW]:
+            match = Match(tournament = self.tournament, white_player = self.owner, black_player = self.officer)
+            match.result = result
+            match.save()
+
+        owner_membership = Membership.objects.get(user = self.owner, club = self.club)
+        ratings = [rating for rating, _ in EloRating.get_ratings(owner_membership)]
+        self.assertEqual(len(ratings), 3)
+        # The favourite loses rating on a draw
+        self.assertTrue(1000 < ratings[2] < ratings[1])
+
+    def test_corrected_result_replays_ratings(self):
+        matches = []
+        for result in [Match.MatchResultTypes.WHITE_WIN, Match.MatchResultTypes.DRAW]:
+            match = Match(tournament = self.tournament, white_player = self.owner, black_player = self.officer)
+            match.result = result
+            match.save()
+            matches.append(match)
+
+        # Corrected as the dashboard does, from a match loaded from the database
+        corrected = Match.objects.get(id = matches[0].id)
+        corrected.result = Match.MatchResultTypes.BLACK_WIN
+        corrected.save()
+
+        owner_membership = Membership.objects.get(user = self.owner, club = self.club)
+        officer_membership = Membership.objects.get(id = self.officer_membership.id)
+        self.assertEqual(EloRatingRecord.objects.count(), 4)
+        # The draw between equally rated players leaves both at 1000, before the black win
+        self.assertEqual(EloRating.get_current_rating(owner_membership), 984)
+        self.assertEqual(EloRating.get_current_rating(officer_membership), 1016)
+        self.assertEqual(owner_membership.highest_elo_rating, 1000)
+        self.assertEqual(owner_membership.lowest_elo_rating, 984)
+        self.assertEqual(officer_membership.highest_elo_rating, 1016)
+        self.assertEqual(officer_membership.lowest_elo_rating, 1000)
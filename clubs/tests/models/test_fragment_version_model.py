@@ -0,0 +1,26 @@
+"""Unit tests for the FragmentVersion model."""
+from django.test import TestCase
+from clubs.fragment_cache import get_version, bump_version
+from clubs.models import Club, FragmentVersion
+
+class FragmentVersionModelTestCase(TestCase):
+    """Unit tests for the FragmentVersion model."""
+
+    def test_version_of_an_object_never_bumped(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_version(Club, 1), 0)
+        self.assertFalse(FragmentVersion.objects.exists())
+
+    def test_bump_moves_to_a_new_version(self):
+        bump_version(Club, 1)
+        version = get_version(Club, 1)
+        self.assertNotEqual(version, 0)
+        bump_version(Club, 1)
+        self.assertNotEqual(get_version(Club, 1), version)
+        self.assertEqual(get_version(Club, 2), 0)
+
+    def test_bumping_an_existing_version_is_a_single_update(self):
+        bump_version(Club, 1)
+        with self.assertNumQueries(1):
+            bump_version(Club, 1)
+        self.assertEqual(FragmentVersion.objects.count(), 1)
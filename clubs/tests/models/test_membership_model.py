@@ -1,6 +1,8 @@
 """Unit tests for the User model."""
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from io import StringIO
 from clubs.models import User, Club, Membership
 
 class UserModelTestCase(TestCase):
@@ -139,6 +141,137 @@ class UserModelTestCase(TestCase):
         owner_membership.kick_member()
         self.assertEqual(owner_membership.user_type, Membership.UserTypes.OWNER)
 
+class ClubCountersTestCase(TestCase):
+    """Unit tests for the denormalized club counters kept by the Membership model."""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json'
+    ]
+
+    def setUp(self):
+        self.club = Club.objects.get(name = "Kerbal Chess Club")
+        self.applicant = User.objects.get(username='janedoe')
+
+    def assertCounters(self, members, officers, applications):
+        self.club.refresh_from_db()
+        self.assertEqual(self.club.member_count, members)
+        self.assertEqual(self.club.officer_count, officers)
+        self.assertEqual(self.club.pending_application_count, applications)
+
+    def test_application_lifecycle_updates_counters(self):
+        self.assertCounters(5, 1, 0)
+        membership = Membership.objects.create(user=self.applicant, club=self.club)
+        self.assertCounters(5, 1, 1)
+        membership.approve_membership()
+        self.assertCounters(6, 1, 0)
+        membership.promote_to_officer()
+        self.assertCounters(6, 2, 0)
+        membership.demote_to_member()
+        self.assertCounters(6, 1, 0)
+        membership.leave()
+        self.assertCounters(5, 1, 0)
+
+    def test_deny_membership_updates_counters(self):
+        membership = Membership.objects.create(user=self.applicant, club=self.club)
+        membership.deny_membership()
+        self.assertCounters(5, 1, 0)
+
+    def test_kick_member_updates_counters(self):
+        membership = Membership.objects.get(user__username='jonathandoe', club=self.club)
+        membership.kick_member()
+        self.assertCounters(4, 0, 0)
+
+    def test_transfer_ownership_keeps_counters(self):
+        owner_membership = Membership.objects.get(user__username='johndoe', club=self.club)
+        owner_membership.transfer_ownership(User.objects.get(username='jonathandoe'))
+        self.assertCounters(5, 1, 0)
+
+    def test_editing_stale_club_does_not_overwrite_counters(self):
+        stale_club = Club.objects.get(id=self.club.id)
+        Membership.objects.create(user=self.applicant, club=self.club)
+        stale_club.location = "Boston"
+        stale_club.save()
+        self.assertCounters(5, 1, 1)
+
+    def test_new_club_counts_its_owner(self):
+        club = Club.objects.create(name="New Chess Club", owner=self.applicant)
+        club.refresh_from_db()
+        self.assertEqual(club.member_count, 1)
+
+    def test_reconcile_command_fixes_drift(self):
+        Club.objects.filter(id=self.club.id).update(member_count=42, officer_count=0, pending_application_count=7)
+        call_command('reconcile_club_counters', stdout=StringIO())
+        self.assertCounters(5, 1, 0)
+
+class MembershipRankTestCase(TestCase):
+    """Unit tests for the membership rank kept in sync with the user type."""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json'
+    ]
+
+    def setUp(self):
+        self.club = Club.objects.get(name = "Kerbal Chess Club")
+        self.applicant = User.objects.get(username='janedoe')
+
+    def assertRank(self, membership, rank):
+        membership.refresh_from_db()
+        self.assertEqual(membership.rank, rank)
+        self.assertEqual(membership.rank, membership.get_rank())
+
+    def test_fixture_ranks_match_user_types(self):
+        for membership in Membership.objects.all():
+            self.assertEqual(membership.rank, membership.get_rank())
+
+    def test_ranks_follow_role_hierarchy(self):
+        self.assertLess(Membership.Ranks.NON_MEMBER, Membership.Ranks.MEMBER)
+        self.assertLess(Membership.Ranks.MEMBER, Membership.Ranks.OFFICER)
+        self.assertLess(Membership.Ranks.OFFICER, Membership.Ranks.OWNER)
+
+    def test_application_lifecycle_updates_rank(self):
+        membership = Membership.objects.create(user=self.applicant, club=self.club)
+        self.assertRank(membership, Membership.Ranks.NON_MEMBER)
+        membership.approve_membership()
+        self.assertRank(membership, Membership.Ranks.MEMBER)
+        membership.promote_to_officer()
+        self.assertRank(membership, Membership.Ranks.OFFICER)
+        membership.demote_to_member()
+        self.assertRank(membership, Membership.Ranks.MEMBER)
+
+    def test_transfer_ownership_updates_ranks(self):
+        owner_membership = Membership.objects.get(user__username='johndoe', club=self.club)
+        officer_membership = Membership.objects.get(user__username='jonathandoe', club=self.club)
+        owner_membership.transfer_ownership(officer_membership.user)
+        self.assertRank(owner_membership, Membership.Ranks.OFFICER)
+        self.assertRank(officer_membership, Membership.Ranks.OWNER)
+
+    def test_save_with_update_fields_updates_rank(self):
+        membership = Membership.objects.get(user__username='alicesmith', club=self.club)
+        membership.user_type = Membership.UserTypes.OFFICER
+        membership.save(update_fields=['user_type'])
+        self.assertRank(membership, Membership.Ranks.OFFICER)
+
+    def test_bulk_create_sets_rank(self):
+        Membership.objects.bulk_create([
+            Membership(user=self.applicant, club=self.club, user_type=Membership.UserTypes.OFFICER, application_status=Membership.Application.APPROVED)
+        ])
+        self.assertRank(Membership.objects.get(user=self.applicant, club=self.club), Membership.Ranks.OFFICER)
+
+    def test_queryset_update_sets_rank(self):
+        Membership.objects.filter(club=self.club, user_type=Membership.UserTypes.MEMBER).update(user_type=Membership.UserTypes.OFFICER)
+        self.assertFalse(Membership.objects.filter(club=self.club, user_type=Membership.UserTypes.OFFICER).exclude(rank=Membership.Ranks.OFFICER).exists())
+
+    def test_officers_and_owner_by_rank(self):
+        officers = Membership.objects.filter(club=self.club, rank__gte=Membership.Ranks.OFFICER)
+        self.assertEqual(
+            set(officers.values_list('user__username', flat=True)),
+            {'johndoe', 'jonathandoe'}
+        )
+
 class EloRatingTestCase(TestCase):
     def setUp(self):
         self.club = Club.objects.create(name = "Kerbal Chess Club", owner=1)
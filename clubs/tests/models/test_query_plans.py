@@ -0,0 +1,70 @@
+"""Query plan tests of the hot view and model queries"""
+import re
+
+from django.test import TestCase
+
+from clubs.autocomplete import club_index
+from clubs.helpers import get_keyset_page
+from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Group, Match, EloRatingRecord
+from clubs.views.club import PANEL_PAGE_SIZE, get_club_members, get_club_applications, get_club_tournaments
+from clubs.views.user import get_member_matches
+
+class QueryPlanTestCase(TestCase):
+    """Tests that the hot queries are answered from indexes, without scanning whole tables"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+        'clubs/tests/fixtures/default_tournaments.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='johndoe')
+        self.club = Club.objects.get(id=1)
+        self.tournament = Tournament.objects.get(id=1)
+        self.membership = Membership.objects.get(user=self.user, club=self.club)
+
+    def assertNoTableScan(self, queryset, sorted_by_index=False):
+        """Fail if the plan of the queryset scans a whole table, or sorts its rows when they should come sorted from an index."""
+        plan = queryset.explain()
+        scans = re.findall(r'SCAN (?:TABLE )?(\w+)', plan)
+        self.assertEqual(scans, [], f'Full scan in the plan of {queryset.query}:\n{plan}')
+        if sorted_by_index:
+            self.assertNotIn('USE TEMP B-TREE', plan, f'Sort in the plan of {queryset.query}:\n{plan}')
+
+    def test_pending_matches_of_tournament(self):
+        self.assertNoTableScan(self.tournament.matches.filter(_result=Match.MatchResultTypes.PENDING))
+
+    def test_latest_group_of_tournament(self):
+        self.assertNoTableScan(Group.objects.filter(tournament=self.tournament).order_by('-phase')[:1], sorted_by_index=True)
+        self.assertNoTableScan(Group.objects.filter(tournament=self.tournament, phase=1))
+
+    def test_player_matches_in_club(self):
+        self.assertNoTableScan(Match.get_player_matches(self.user, self.club))
+        self.assertNoTableScan(Match.objects.filter(white_player=self.user).order_by('result_date'), sorted_by_index=True)
+        self.assertNoTableScan(Match.objects.filter(black_player=self.user).order_by('result_date'), sorted_by_index=True)
+
+    def test_member_matches(self):
+        for matches in get_member_matches(self.membership):
+            self.assertNoTableScan(matches.order_by('result_date', 'id')[:21], sorted_by_index=True)
+            self.assertNoTableScan(matches.order_by('-result_date', '-id')[:21], sorted_by_index=True)
+
+    def test_club_dashboard_panels(self):
+        # The first page, and a following one from the cursor of the previous page
+        for get_panel_objects in [get_club_members, get_club_applications, get_club_tournaments]:
+            for after in [None, 1]:
+                self.assertNoTableScan(get_keyset_page(get_panel_objects(self.club), after, PANEL_PAGE_SIZE), sorted_by_index=True)
+
+    def test_club_name_prefix_search(self):
+        self.assertNoTableScan(club_index.get_word_range('roy')[:10], sorted_by_index=True)
+
+    def test_memberships_of_user(self):
+        self.assertNoTableScan(Membership.objects.filter(user=self.user))
+
+    def test_tournament_participants(self):
+        self.assertNoTableScan(TournamentParticipation.objects.filter(tournament=self.tournament))
+        self.assertNoTableScan(TournamentParticipation.objects.filter(user=self.user))
+
+    def test_current_rating_of_member(self):
+        self.assertNoTableScan(EloRatingRecord.objects.filter(membership=self.membership).order_by('-date', '-id')[:1])
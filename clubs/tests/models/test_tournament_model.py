@@ -1,6 +1,8 @@
 """Unit tests for the Tournament model."""
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match, Group
 from django.utils.timezone import make_aware
 from django.utils import timezone
@@ -894,3 +896,73 @@ class TournamentModelMatchesTestCase(TestCase):
 
 
         self.assertEqual(self.tournament.stage, Tournament.StageTypes.FINISHED)
+
+
+class TournamentEliminationQueriesTestCase(TestCase):
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json'
+    ]
+
+    def setUp(self):
+        self.club = Club.objects.get(name = "Kerbal Chess Club", owner=1)
+        self.officer = User.objects.get(username='jonathandoe')
+
+    def create_elimination_tournament(self, name, participant_count):
+        tournament = Tournament.objects.create(
+            name = name,
+            description = "Tournament description",
+            club = self.club,
+            organizer = self.officer,
+            capacity = participant_count,
+            stage = Tournament.StageTypes.ELIMINATION,
+        )
+        User.objects.bulk_create([
+            User(username = f"{name}{i}", email = f"{name}{i}@example.com", password = "password")
+            for i in range(participant_count)
+        ])
+        users = User.objects.filter(email__endswith = "@example.com", username__startswith = name)
+        TournamentParticipation.objects.bulk_create([
+            TournamentParticipation(tournament = tournament, user = user) for user in users
+        ])
+        return tournament
+
+    def advance_round_queries(self, tournament):
+        tournament.generate_matches()
+        tournament.matches.update(_result = Match.MatchResultTypes.WHITE_WIN)
+        with CaptureQueriesContext(connection) as queries:
+            tournament.generate_matches()
+        return len(queries)
+
+    def test_advancing_elimination_round_uses_constant_queries(self):
+        small_tournament = self.create_elimination_tournament("small", 16)
+        large_tournament = self.create_elimination_tournament("large", 512)
+        self.assertEqual(self.advance_round_queries(small_tournament), self.advance_round_queries(large_tournament))
+        self.assertEqual(large_tournament.matches.filter(group__phase = 1).count(), 128)
+
+    def test_advancing_elimination_round_with_bye(self):
+        tournament = self.create_elimination_tournament("bye", 5)
+        tournament.generate_matches()
+        bye_player = tournament.groups.get(phase = 0).players.exclude(
+            id__in = tournament.matches.values('white_player')
+        ).exclude(
+            id__in = tournament.matches.values('black_player')
+        ).get()
+        tournament.matches.update(_result = Match.MatchResultTypes.BLACK_WIN)
+        tournament.generate_matches()
+        next_round_players = tournament.groups.get(phase = 1).players.all()
+        self.assertEqual(next_round_players.count(), 3)
+        self.assertIn(bye_player, next_round_players)
+
+    def test_drawn_pairing_is_rescheduled_once(self):
+        tournament = self.create_elimination_tournament("draw", 4)
+        tournament.generate_matches()
+        drawn_match = tournament.matches.first()
+        tournament.matches.update(_result = Match.MatchResultTypes.WHITE_WIN)
+        Match.objects.filter(id = drawn_match.id).update(_result = Match.MatchResultTypes.DRAW)
+        message = tournament.generate_matches()
+        self.assertEqual(message[1], '1 matches rescheduled.')
+        rescheduled_match = tournament.matches.get(_result = Match.MatchResultTypes.PENDING)
+        self.assertEqual(rescheduled_match.white_player, drawn_match.white_player)
+        self.assertEqual(rescheduled_match.black_player, drawn_match.black_player)
@@ -2,6 +2,9 @@
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from clubs.models import User
+from hashlib import md5
+from libgravatar import Gravatar
+from unittest.mock import patch
 
 class UserModelTestCase(TestCase):
     """Unit tests for the User model."""
@@ -112,6 +115,20 @@ class UserModelTestCase(TestCase):
 
         self._assert_user_is_invalid()
 
+    def test_email_hash_is_updated_when_email_changes(self):
+        self.user.email = ' JohnDoe2@Example.org '
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_hash, md5(b'johndoe2@example.org').hexdigest())
+
+    def test_gravatar_url_matches_libgravatar(self):
+        self.assertEqual(self.user.gravatar(60), Gravatar(self.user.email).get_image(size=60, default='mp'))
+
+    def test_gravatar_does_not_hash_email(self):
+        with patch('clubs.models.users.md5_hash') as md5_hash:
+            self.user.gravatar()
+        md5_hash.assert_not_called()
+
     def _assert_user_is_valid(self):
         try:
             self.user.full_clean()
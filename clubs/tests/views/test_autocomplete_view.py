@@ -0,0 +1,182 @@
+"""Tests of the autocomplete views"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from clubs import autocomplete
+from clubs.autocomplete import PrefixIndex
+from clubs.models import User, Club
+from clubs.tests.helpers import reverse_with_query
+
+class PrefixIndexTestCase(TestCase):
+    """Unit tests of the in-memory prefix index"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.index = PrefixIndex(User, ['username', 'name'])
+        # No signal stores the word starts of the users, which are not indexed by the site
+        self.index.reindex()
+        self._build()
+
+    def _build(self):
+        self.index.is_ready()
+        self.index.rebuild()
+
+    def _usernames(self, prefix, limit=10):
+        users = User.objects.in_bulk(self.index.search(prefix, limit))
+        return [users[pk].username for pk in self.index.search(prefix, limit)]
+
+    def test_search_matches_start_of_any_word(self):
+        self.assertEqual(self._usernames('alice'), ['alicesmith'])
+        self.assertEqual(self._usernames('Smi'), ['alicesmith', 'bobsmith'])
+        self.assertEqual(self._usernames('jan'), ['janedoe', 'janettedoe'])
+
+    def test_search_returns_each_row_once(self):
+        # 'johndoe' matches both through its username and its name
+        self.assertEqual(self._usernames('john'), ['johndoe'])
+
+    def test_search_limit(self):
+        self.assertEqual(len(self._usernames('doe', limit=3)), 3)
+
+    def test_empty_prefix_matches_nothing(self):
+        self.assertEqual(self.index.search('  ', 10), [])
+
+    def test_index_is_built_once(self):
+        with mock.patch.object(self.index, 'build') as build:
+            self.index.search('ja', 10)
+            self.index.rebuild()
+            build.assert_not_called()
+
+    def test_invalidated_index_is_rebuilt_after_the_lookup(self):
+        user = User.objects.create_user(username='josephdoe', name='Joseph Doe', email='joseph@example.org', password='Password123')
+        self.index.update(user)
+        with mock.patch.object(self.index, 'build') as build:
+            # Answered by the database
+            self.assertEqual(self._usernames('jo'), ['johndoe', 'jonathandoe', 'josephdoe'])
+            self.assertIn('josephdoe', self._usernames('Doe'))
+            build.assert_not_called()
+        self.index.rebuild()
+        self.assertIn('josephdoe', self._usernames('doe'))
+
+    def test_rebuilds_follow_the_version_shared_by_every_process(self):
+        other_process_index = PrefixIndex(User, ['username', 'name'])
+        other_process_index.invalidate()
+        self.assertFalse(self.index.is_ready())
+        self.index.rebuild()
+        self.assertTrue(self.index.is_ready())
+
+    def test_unindexed_changes_keep_the_index(self):
+        user = User.objects.get(username='johndoe')
+        user.public_bio = 'A new bio'
+        user.save(update_fields=['public_bio'])
+        self.index.invalidate(['public_bio'])
+        self.assertTrue(self.index.is_ready())
+
+    def test_large_tables_are_searched_in_the_database(self):
+        with mock.patch.object(autocomplete, 'MAX_INDEX_ROWS', 2):
+            self.index.invalidate()
+            self._build()
+            self.assertEqual(self._usernames('Ali'), ['alicesmith'])
+            self.assertEqual(self._usernames('Smi'), ['alicesmith', 'bobsmith'])
+            self.assertEqual(self._usernames('john'), ['johndoe'])
+            self.assertEqual(self.index.keys, [])
+
+    def test_database_and_index_answer_alike(self):
+        for prefix in ['j', 'jo', 'doe', 'smith', 'alice s', 'ja', 'x']:
+            self.assertEqual(self.index.search_database(prefix, 3), self.index.search(prefix, 3), prefix)
+
+    def test_deleted_rows_leave_the_database_search(self):
+        user = User.objects.get(username='alicesmith')
+        self.index.update(user, deleted=True)
+        self.assertEqual(self.index.search_database('smi', 10), [User.objects.get(username='bobsmith').id])
+
+
+class AutocompleteViewTestCase(TestCase):
+    """Tests of the autocomplete views"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.club = Club.objects.get(id=1)
+        self.owner = User.objects.get(username='johndoe')
+        self.officer = User.objects.get(username='jonathandoe')
+        self.member = User.objects.get(username='alicesmith')
+
+    def _suggestions(self, response):
+        return [result['label'] for result in response.json()['results']]
+
+    def test_autocomplete_urls(self):
+        self.assertEqual(reverse('autocomplete_users'), '/autocomplete/users')
+        self.assertEqual(reverse('autocomplete_clubs'), '/autocomplete/clubs')
+
+    def test_redirects_when_not_logged_in(self):
+        url = reverse('autocomplete_clubs')
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse_with_query('log_in', query_kwargs={'next': url}), status_code=302, target_status_code=200)
+
+    def test_autocomplete_users_suggests_club_officers(self):
+        self.client.login(username=self.officer.username, password="Password123")
+        response = self.client.get(reverse_with_query('autocomplete_users', query_kwargs={'club': self.club.id, 'q': 'j'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._suggestions(response), ['John Doe (johndoe)'])
+        self.assertEqual(response.json()['results'][0]['value'], self.owner.id)
+
+    def test_autocomplete_users_finds_officers_among_many_matching_users(self):
+        User.objects.bulk_create([
+            User(username=f'jo{i:03}', name=f'Jo {i}', email=f'jo{i}@example.org', email_hash=User.hash_email(f'jo{i}@example.org'))
+            for i in range(300)
+        ])
+        self.client.login(username=self.officer.username, password="Password123")
+        response = self.client.get(reverse_with_query('autocomplete_users', query_kwargs={'club': self.club.id, 'q': 'jo'}))
+        self.assertEqual(self._suggestions(response), ['John Doe (johndoe)'])
+
+    def test_autocomplete_users_skips_members(self):
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse_with_query('autocomplete_users', query_kwargs={'club': self.club.id, 'q': 'smith'}))
+        self.assertEqual(self._suggestions(response), [])
+
+    def test_autocomplete_users_forbidden_to_members(self):
+        self.client.login(username=self.member.username, password="Password123")
+        response = self.client.get(reverse_with_query('autocomplete_users', query_kwargs={'club': self.club.id, 'q': 'j'}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_autocomplete_users_requires_club(self):
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse_with_query('autocomplete_users', query_kwargs={'q': 'j'}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_autocomplete_clubs_index_is_built_after_the_first_lookup(self):
+        self.client.login(username=self.member.username, password="Password123")
+        url = reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'chess'})
+        club_index = autocomplete.club_index
+        with mock.patch.object(club_index, 'search_database', wraps=club_index.search_database) as search_database:
+            # Answered by the database before the index is built, then by the index
+            self.assertEqual(self._suggestions(self.client.get(url)), ['Royal Chess Club'])
+            self.assertEqual(self._suggestions(self.client.get(url)), ['Royal Chess Club'])
+        self.assertEqual(search_database.call_count, 1)
+
+    def test_autocomplete_clubs_skips_clubs_applied_to(self):
+        self.client.login(username=self.member.username, password="Password123")
+        self.client.get(reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'roy'}))
+        response = self.client.get(reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'chess'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._suggestions(response), ['Royal Chess Club'])
+
+    def test_autocomplete_clubs_follows_renamed_clubs(self):
+        self.client.login(username=self.member.username, password="Password123")
+        self.client.get(reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'roy'}))
+        club = Club.objects.get(name='Royal Chess Club')
+        club.name = 'Imperial Chess Club'
+        club.save()
+        self.assertEqual(self._suggestions(self.client.get(reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'roy'}))), [])
+        self.assertEqual(self._suggestions(self.client.get(reverse_with_query('autocomplete_clubs', query_kwargs={'q': 'imp'}))), ['Imperial Chess Club'])
@@ -0,0 +1,98 @@
+"""Tests of the paginated club dashboard panels"""
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club, Membership, Tournament
+from clubs.tests.helpers import reverse_with_query
+from clubs.views.club import PANEL_PAGE_SIZE
+
+class ClubDashboardPanelsViewTestCase(TestCase):
+    """Tests of the paginated club dashboard panels"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        self.club = Club.objects.get(id=1)
+        self.owner = User.objects.get(username='johndoe')
+        self.member = User.objects.get(username='janettedoe')
+        self.non_member = User.objects.get(username='janedoe')
+
+    def _create_memberships(self, count, user_type, application_status):
+        User.objects.bulk_create([
+            User(username=f'extra{i}', name=f'Extra {i}', email=f'extra{i}@example.org')
+            for i in range(count)
+        ])
+        Membership.objects.bulk_create([
+            Membership(user=user, club=self.club, user_type=user_type, application_status=application_status, personal_statement='Statement')
+            for user in User.objects.filter(username__startswith='extra')
+        ])
+
+    def test_members_panel_returns_first_page(self):
+        self._create_memberships(PANEL_PAGE_SIZE, Membership.UserTypes.MEMBER, Membership.Application.APPROVED)
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse('club_members_panel', kwargs={'club_id': self.club.id}))
+        self.assertEqual(response.status_code, 200)
+        members = response.context['members']
+        self.assertEqual(len(members), PANEL_PAGE_SIZE)
+        next_url = reverse_with_query('club_members_panel', kwargs={'club_id': self.club.id}, query_kwargs={'after': members[-1].id})
+        self.assertEqual(response.context['next_members_url'], next_url)
+        self.assertContains(response, f'data-url="{next_url}"')
+
+    def test_panel_without_next_page_has_no_load_more(self):
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse('club_members_panel', kwargs={'club_id': self.club.id}))
+        self.assertIsNone(response.context['next_members_url'])
+        self.assertNotContains(response, 'load-more-row')
+
+    def test_members_panel_returns_next_page(self):
+        self._create_memberships(PANEL_PAGE_SIZE, Membership.UserTypes.MEMBER, Membership.Application.APPROVED)
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse('club_members_panel', kwargs={'club_id': self.club.id}))
+        first_page_ids = {member.id for member in response.context['members']}
+        response = self.client.get(response.context['next_members_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'partials/club_member_rows.html')
+        second_page_ids = {member.id for member in response.context['members']}
+        self.assertEqual(len(first_page_ids) + len(second_page_ids), Membership.objects.filter(club=self.club).exclude(user_type='NM').count())
+        self.assertFalse(first_page_ids & second_page_ids)
+        self.assertIsNone(response.context['next_members_url'])
+
+    def test_members_panel_forbidden_to_non_member(self):
+        self.client.login(username=self.non_member.username, password="Password123")
+        response = self.client.get(reverse('club_members_panel', kwargs={'club_id': self.club.id}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_applications_panel_forbidden_to_member(self):
+        self.client.login(username=self.member.username, password="Password123")
+        response = self.client.get(reverse('club_applications_panel', kwargs={'club_id': self.club.id}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_applications_panel_returns_page_to_officer(self):
+        self._create_memberships(PANEL_PAGE_SIZE + 1, Membership.UserTypes.NON_MEMBER, Membership.Application.PENDING)
+        self.client.login(username=self.owner.username, password="Password123")
+        response = self.client.get(reverse('club_applications_panel', kwargs={'club_id': self.club.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['applications']), PANEL_PAGE_SIZE)
+        self.assertIsNotNone(response.context['next_applications_url'])
+
+    def test_tournaments_panel_ignores_invalid_cursor(self):
+        Tournament.objects.create(name="Tournament", description="Description", club=self.club, organizer=self.owner, capacity=2)
+        self.client.login(username=self.member.username, password="Password123")
+        url = reverse_with_query('club_tournaments_panel', kwargs={'club_id': self.club.id}, query_kwargs={'after': 'abc'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tournaments']), 1)
+
+    def test_tournaments_panel_of_unexisting_club(self):
+        self.client.login(username=self.member.username, password="Password123")
+        response = self.client.get(reverse('club_tournaments_panel', kwargs={'club_id': 12345}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_panels_redirect_when_not_logged_in(self):
+        url = reverse('club_members_panel', kwargs={'club_id': self.club.id})
+        redirect_url = reverse_with_query('log_in', query_kwargs={'next': url})
+        response = self.client.get(url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
@@ -1,6 +1,10 @@
 """Tests of the club dashboard view"""
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from clubs.fragment_cache import bump_version
 from clubs.models import User, Club, Membership
 from clubs.tests.helpers import reverse_with_query
 
@@ -13,7 +17,14 @@ class ClubDashboardViewTestCase(TestCase):
         'clubs/tests/fixtures/default_memberships.json',
     ]
 
+    # Session, user, club, own memberships and the versions of the club and its owner, the panels are fetched from their fragment endpoints
+    QUERY_BUDGET = 6
+
+    # Session, user, own memberships, club and one page of members with their users
+    MEMBERS_PANEL_QUERY_BUDGET = 5
+
     def setUp(self):
+        cache.clear()
         self.club = Club.objects.get(id=1)
         self.user = User.objects.get(username='johndoe')
         self.officer = User.objects.get(username='jonathandoe')
@@ -65,8 +76,6 @@ class ClubDashboardViewTestCase(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'club_dashboard.html')
-        applications = list(response.context['applications'])
-        self.assertEqual(len(applications), 0)
         self.assertContains(response, "<h2>Pending applications</h2>")
         self.assertContains(response, "<p>No pending applications</p>")
 
@@ -79,9 +88,84 @@ class ClubDashboardViewTestCase(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'club_dashboard.html')
-        applications = list(response.context['applications'])
-        self.assertEqual(len(applications), 1)
         self.assertContains(response, "<h2>Pending applications</h2>")
         self.assertNotContains(response, "<p>No pending applications</p>")
+        self.assertContains(response, f'data-url="{response.context["applications_url"]}"')
+        response = self.client.get(response.context['applications_url'])
+        self.assertEqual(len(response.context['applications']), 1)
         self.assertContains(response, "<td>Jane Doe</td>")
         self.assertContains(response, "<td>Some personal statement</td>")
+
+    def test_club_details_are_cached(self):
+        self.client.login(username=self.user.username, password="Password123")
+        url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+        self.client.get(url)
+        # Queryset updates send no signal, so the cached fragment is still served
+        Club.objects.filter(id=self.club.id).update(location="Boston")
+        response = self.client.get(url)
+        self.assertContains(response, "<td>New York</th>")
+        self.assertNotContains(response, "<td>Boston</th>")
+
+    def test_edited_club_details_show_straight_away(self):
+        self.client.login(username=self.user.username, password="Password123")
+        url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+        self.client.get(url)
+        self.club.location = "Boston"
+        self.club.save()
+        response = self.client.get(url)
+        self.assertContains(response, "<td>Boston</th>")
+
+    def test_club_details_edited_in_another_worker_show_straight_away(self):
+        self.client.login(username=self.user.username, password="Password123")
+        url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+        self.client.get(url)
+        # Another worker only shares the database with this one, where it saves the club and bumps its version
+        Club.objects.filter(id=self.club.id).update(location="Boston")
+        bump_version(Club, self.club.id)
+        response = self.client.get(url)
+        self.assertContains(response, "<td>Boston</th>")
+
+    def test_edited_owner_details_show_straight_away(self):
+        self.client.login(username=self.user.username, password="Password123")
+        url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+        self.client.get(url)
+        self.user.public_bio = "A new bio"
+        self.user.save()
+        response = self.client.get(url)
+        self.assertContains(response, "<td>A new bio</th>")
+
+    def test_panels_are_not_rendered_with_the_dashboard(self):
+        self.client.login(username=self.officer.username, password="Password123")
+        response = self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        self.assertNotIn('members', response.context)
+        self.assertNotIn('tournaments', response.context)
+        for url_name in ['club_tournaments_panel', 'club_members_panel']:
+            self.assertContains(response, f'data-url="{reverse(url_name, kwargs={"club_id": self.club.id})}"')
+
+    def _create_members(self, count):
+        User.objects.bulk_create([
+            User(username=f'member{i}', name=f'Member {i}', email=f'member{i}@example.org', email_hash=User.hash_email(f'member{i}@example.org'))
+            for i in range(count)
+        ])
+        Membership.objects.bulk_create([
+            Membership(user=user, club=self.club, user_type=Membership.UserTypes.MEMBER, application_status=Membership.Application.APPROVED)
+            for user in User.objects.filter(username__startswith='member')
+        ])
+
+    def _count_queries(self, url_name, member_count):
+        self._create_members(member_count)
+        self.client.login(username=self.user.username, password="Password123")
+        url = reverse(url_name, kwargs={'club_id': self.club.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_club_dashboard_query_budget_with_10_members(self):
+        self.assertEqual(self._count_queries('club_dashboard', 10), self.QUERY_BUDGET)
+
+    def test_members_panel_query_budget_with_10_members(self):
+        self.assertEqual(self._count_queries('club_members_panel', 10), self.MEMBERS_PANEL_QUERY_BUDGET)
+
+    def test_members_panel_query_budget_with_10000_members(self):
+        self.assertEqual(self._count_queries('club_members_panel', 10000), self.MEMBERS_PANEL_QUERY_BUDGET)
@@ -0,0 +1,105 @@
+"""Tests of the club search view"""
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club
+from clubs.search import build_match_query
+from clubs.tests.helpers import reverse_with_query
+from clubs.views.club import SEARCH_PAGE_SIZE
+
+class ClubSearchViewTestCase(TestCase):
+    """Tests of the club search view"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='janedoe')
+        self.url = reverse('club_search')
+
+    def _search(self, query, page=None):
+        query_kwargs = {'q': query}
+        if page is not None:
+            query_kwargs['page'] = page
+        return self.client.get(reverse_with_query('club_search', query_kwargs=query_kwargs))
+
+    def _result_names(self, response):
+        return [club.name for club in response.context['clubs']]
+
+    def test_club_search_url(self):
+        self.assertEqual(self.url, '/club_search/')
+
+    def test_redirects_when_not_logged_in(self):
+        redirect_url = reverse_with_query('log_in', query_kwargs={'next': self.url})
+        response = self.client.get(self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def test_empty_search(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'club_search.html')
+        self.assertEqual(response.context['clubs'], [])
+        self.assertNotContains(response, "No clubs match your search.")
+
+    def test_search_matches_every_column(self):
+        self.client.login(username=self.user.username, password="Password123")
+        self.assertEqual(self._result_names(self._search('Royal')), ['Royal Chess Club'])
+        self.assertEqual(self._result_names(self._search('london')), ['Royal Chess Club'])
+        self.assertEqual(self._result_names(self._search('World')), ['Kerbal Chess Club'])
+        self.assertEqual(self._result_names(self._search('keeps players')), ['Kerbal Chess Club'])
+
+    def test_search_matches_prefixes(self):
+        self.client.login(username=self.user.username, password="Password123")
+        self.assertEqual(self._result_names(self._search('Ker')), ['Kerbal Chess Club'])
+        self.assertEqual(set(self._result_names(self._search('ches clu'))), {'Kerbal Chess Club', 'Royal Chess Club'})
+
+    def test_search_ranks_name_matches_first(self):
+        Club.objects.create(name='Budapest Club', location='Budapest', mission_statement='Play', description='We love the Royal game', owner=self.user)
+        self.client.login(username=self.user.username, password="Password123")
+        self.assertEqual(self._result_names(self._search('royal')), ['Royal Chess Club', 'Budapest Club'])
+
+    def test_search_without_results(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self._search('checkers')
+        self.assertEqual(response.context['clubs'], [])
+        self.assertContains(response, "No clubs match your search.")
+
+    def test_search_operators_are_plain_words(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self._search('Royal OR "NEAR( * -')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._result_names(response), [])
+        self.assertEqual(build_match_query('"Royal" OR'), '"Royal"* "OR"*')
+
+    def test_search_follows_club_changes(self):
+        self.client.login(username=self.user.username, password="Password123")
+        club = Club.objects.get(name='Royal Chess Club')
+        club.location = 'Edinburgh'
+        club.save()
+        self.assertEqual(self._result_names(self._search('Edinburgh')), ['Royal Chess Club'])
+        self.assertEqual(self._result_names(self._search('London')), [])
+        club.delete()
+        self.assertEqual(self._result_names(self._search('Royal')), [])
+
+    def test_search_pages(self):
+        for i in range(SEARCH_PAGE_SIZE + 5):
+            Club.objects.create(name=f'Paged Club {i}', location='Paris', mission_statement='Play', description='Chess', owner=self.user)
+        self.client.login(username=self.user.username, password="Password123")
+        first_page = self._search('Paris')
+        self.assertEqual(len(first_page.context['clubs']), SEARCH_PAGE_SIZE)
+        self.assertIsNone(first_page.context['previous_page'])
+        self.assertEqual(first_page.context['next_page'], 2)
+        second_page = self._search('Paris', 2)
+        self.assertEqual(len(second_page.context['clubs']), 5)
+        self.assertEqual(second_page.context['previous_page'], 1)
+        self.assertIsNone(second_page.context['next_page'])
+        self.assertFalse(set(self._result_names(first_page)) & set(self._result_names(second_page)))
+
+    def test_invalid_page_shows_first_page(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self._search('Royal', 'last')
+        self.assertEqual(response.context['page'], 1)
+        self.assertEqual(self._result_names(response), ['Royal Chess Club'])
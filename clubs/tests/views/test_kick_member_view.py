@@ -80,3 +80,16 @@ class KickMemberTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         after_count = Membership.objects.count()
         self.assertEqual(after_count, before_count)
+
+    def test_member_cannot_kick_other_member(self):
+        club = Club.objects.get(id=1)
+        member = User.objects.get(username="alicesmith")
+        other_member = User.objects.get(username="bobsmith")
+        self.client.login(username=member.username, password="Password123")
+        before_count = Membership.objects.count()
+        url = reverse('kick_member', kwargs={'club_id': club.id, 'user_id': other_member.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        after_count = Membership.objects.count()
+        self.assertEqual(after_count, before_count)
+        self.assertTrue(Membership.objects.filter(user=other_member, club=club).exists())
@@ -1,11 +1,13 @@
 """Tests of the user_profile view."""
+from unittest import mock
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.messages import get_messages
 from django.utils.timezone import make_aware
 from django.utils import timezone
 import datetime
-from clubs.models import User, Club, Membership, Tournament, TournamentParticipation
+from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match, EloRatingRecord
+from clubs.tests.helpers import reverse_with_query
 
 
 class MemberProfileViewTestCase(TestCase):
@@ -83,5 +85,181 @@ class MemberProfileViewTestCase(TestCase):
         self.assertEqual(response.context['club'], self.club)
         self.assertEqual(response.context['user'], self.user)
         self.assertEqual(response.context['tournaments'], [self.tournament])
-        self.assertEqual(len(response.context['matches']), 1)
+        self.assertEqual(response.context['matches_url'], reverse('member_matches', kwargs={'membership_id': user_membership.id}))
+        self.assertEqual(len(self.client.get(response.context['matches_url']).json()['results']), 1)
         
+
+    def _play_matches(self, results, opponent=None):
+        opponent = opponent or User.objects.get(username='jonathandoe')
+        matches = []
+        for index, result in enumerate(results):
+            match = Match(tournament=self.tournament)
+            if index % 2:
+                match.white_player, match.black_player = self.user, opponent
+            else:
+                match.white_player, match.black_player = opponent, self.user
+            match.result = result
+            matches.append(match)
+        Match.objects.bulk_create(matches)
+
+    def test_member_profile_match_statistics(self):
+        # White wins, black wins and draws, alternating the member's colour
+        self._play_matches(['W', 'W', 'B', 'B', 'D'])
+        other_club_tournament = Tournament.objects.create(name='Other', description='Other', club=Club.objects.get(id=2), organizer=self.user, capacity=2, deadline=self.tournament.deadline, date=self.tournament.deadline)
+        Match.objects.create(tournament=other_club_tournament, white_player=self.user, black_player=self.officer, _result='W')
+        self.client.login(username=self.user.username, password="Password123")
+        user_membership = Membership.objects.get(user=self.user, club=self.club)
+        response = self.client.get(reverse('member_profile', kwargs={'membership_id': user_membership.id}))
+        self.assertEqual(response.context['match_statistics'], [2, 2, 1])
+        self.assertEqual(len(self.client.get(response.context['matches_url']).json()['results']), 5)
+
+    def test_match_statistics_use_one_query(self):
+        self._play_matches(['W', 'B', 'D'] * 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(Match.get_player_statistics(self.user, self.club), [10, 10, 10])
+
+    def _get_matches(self, **query_kwargs):
+        user_membership = Membership.objects.get(user=self.user, club=self.club)
+        return self.client.get(reverse_with_query('member_matches', kwargs={'membership_id': user_membership.id}, query_kwargs=query_kwargs))
+
+    @mock.patch('clubs.views.user.MATCH_PAGE_SIZE', 2)
+    def test_member_matches_keyset_pages(self):
+        self._play_matches(['D'] * 5)
+        self.client.login(username=self.officer.username, password="Password123")
+        ids = []
+        response = self._get_matches(sort='result_date', direction='asc')
+        while True:
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 2)
+            ids += [match['id'] for match in data['results']]
+            if data['next'] is None:
+                break
+            response = self._get_matches(sort='result_date', direction='asc', after=data['next'])
+        self.assertEqual(ids, list(Match.objects.order_by('result_date', 'id').values_list('id', flat=True)))
+
+    @mock.patch('clubs.views.user.MATCH_PAGE_SIZE', 2)
+    def test_member_matches_keyset_pages_by_opponent(self):
+        self._play_matches(['W', 'B', 'D'])
+        self._play_matches(['D', 'W'], User.objects.get(username='alicesmith'))
+        self.client.login(username=self.officer.username, password="Password123")
+        for direction in ('asc', 'desc'):
+            rows = []
+            response = self._get_matches(sort='opponent', direction=direction)
+            while True:
+                data = response.json()
+                rows += [(match['opponent'], match['id']) for match in data['results']]
+                if data['next'] is None:
+                    break
+                response = self._get_matches(sort='opponent', direction=direction, after=data['next'])
+            self.assertEqual(len(rows), 5)
+            self.assertEqual(rows, sorted(rows, reverse=direction == 'desc'))
+
+    def test_member_matches_sorting(self):
+        self._play_matches(['W', 'B'])
+        self._play_matches(['D'], User.objects.get(username='alicesmith'))
+        self.client.login(username=self.officer.username, password="Password123")
+        opponents = [match['opponent'] for match in self._get_matches(sort='opponent', direction='asc').json()['results']]
+        self.assertEqual(opponents, ['alicesmith', 'jonathandoe', 'jonathandoe'])
+        opponents = [match['opponent'] for match in self._get_matches(sort='opponent', direction='desc').json()['results']]
+        self.assertEqual(opponents, ['jonathandoe', 'jonathandoe', 'alicesmith'])
+        results = [match['result'] for match in self._get_matches(sort='result', direction='desc').json()['results']]
+        self.assertEqual(results, ['W', 'D', 'B'])
+        dates = [match['result_date'] for match in self._get_matches().json()['results']]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    @mock.patch('clubs.views.user.MATCH_PAGE_SIZE', 2)
+    def test_member_matches_keyset_pages_with_pending_matches(self):
+        self._play_matches(['D'] * 3)
+        opponent = User.objects.get(username='alicesmith')
+        Match.objects.bulk_create([Match(tournament=self.tournament, white_player=opponent, black_player=self.user) for i in range(3)])
+        self.client.login(username=self.officer.username, password="Password123")
+        for direction, pending_first in (('asc', True), ('desc', False)):
+            ids = []
+            response = self._get_matches(direction=direction)
+            while True:
+                data = response.json()
+                ids += [match['id'] for match in data['results']]
+                if data['next'] is None:
+                    break
+                response = self._get_matches(direction=direction, after=data['next'])
+            # Pending matches have no result date, they come before every played match
+            pending = sorted(Match.objects.filter(result_date__isnull=True).values_list('id', flat=True))
+            played = list(Match.objects.filter(result_date__isnull=False).order_by('result_date', 'id').values_list('id', flat=True))
+            self.assertEqual(ids, pending + played if pending_first else list(reversed(pending + played)))
+
+    def test_member_matches_unknown_cursor_gives_empty_page(self):
+        self._play_matches(['W', 'B'])
+        self._play_matches(['D'], User.objects.get(username='alicesmith'))
+        self.client.login(username=self.officer.username, password="Password123")
+        other_match = Match.objects.get(white_player__username='alicesmith')
+        for after in (other_match.id, 12345):
+            data = self._get_matches(opponent='Jonathan', after=after).json()
+            self.assertEqual(data, {'results': [], 'next': None})
+
+    def test_member_matches_opponent_filter(self):
+        self._play_matches(['W', 'B'])
+        self._play_matches(['D'], User.objects.get(username='alicesmith'))
+        self.client.login(username=self.officer.username, password="Password123")
+        by_username = self._get_matches(opponent='alice').json()['results']
+        self.assertEqual([match['opponent'] for match in by_username], ['alicesmith'])
+        by_name = self._get_matches(opponent='Jonathan').json()['results']
+        self.assertEqual(len(by_name), 2)
+
+    def test_member_matches_rejects_unknown_sort(self):
+        self.client.login(username=self.officer.username, password="Password123")
+        self.assertEqual(self._get_matches(sort='white_player__password').status_code, 400)
+
+    def test_member_matches_forbidden_to_non_members(self):
+        self.client.login(username=self.non_member.username, password="Password123")
+        self.assertEqual(self._get_matches().status_code, 403)
+
+    def _play_rated_matches(self, results):
+        # Matches saved one at a time store the players' ratings
+        opponent = User.objects.get(username='jonathandoe')
+        for result in results:
+            match = Match(tournament=self.tournament, white_player=self.user, black_player=opponent)
+            match.result = result
+            match.save()
+
+    def _get_ratings(self, **query_kwargs):
+        user_membership = Membership.objects.get(user=self.user, club=self.club)
+        return self.client.get(reverse_with_query('member_ratings', kwargs={'membership_id': user_membership.id}, query_kwargs=query_kwargs))
+
+    def test_member_profile_current_rating(self):
+        self._play_rated_matches(['W'])
+        self.client.login(username=self.user.username, password="Password123")
+        user_membership = Membership.objects.get(user=self.user, club=self.club)
+        response = self.client.get(reverse('member_profile', kwargs={'membership_id': user_membership.id}))
+        self.assertEqual(response.context['elo_rating'], 1016)
+        self.assertEqual(response.context['ratings_url'], reverse('member_ratings', kwargs={'membership_id': user_membership.id}))
+
+    def test_member_ratings_downsampled(self):
+        self._play_rated_matches(['W', 'B', 'W', 'D', 'B', 'W'])
+        self.client.login(username=self.officer.username, password="Password123")
+        data = self._get_ratings(points=3).json()
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(len(data['results']), 3)
+        records = EloRatingRecord.objects.filter(membership__user=self.user).order_by('date')
+        self.assertEqual(data['results'][0]['rating'], round(records.first().rating))
+        self.assertEqual(data['results'][-1]['rating'], round(records.last().rating))
+        self.assertEqual(len(self._get_ratings().json()['results']), 6)
+
+    def test_member_ratings_date_range(self):
+        self._play_rated_matches(['W', 'B', 'W', 'D'])
+        self.client.login(username=self.officer.username, password="Password123")
+        dates = [record.date for record in EloRatingRecord.objects.filter(membership__user=self.user).order_by('date')]
+        data = self._get_ratings(start=dates[1].isoformat(), end=dates[2].isoformat()).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([point['date'] for point in data['results']], [date.isoformat() for date in dates[1:3]])
+
+    def test_member_ratings_rejects_invalid_parameters(self):
+        self.client.login(username=self.officer.username, password="Password123")
+        self.assertEqual(self._get_ratings(start='yesterday').status_code, 400)
+        self.assertEqual(self._get_ratings(points='many').status_code, 400)
+        for points in (2, 1, 0, -5):
+            self.assertEqual(self._get_ratings(points=points).status_code, 400)
+        self.assertEqual(self._get_ratings(points=3).status_code, 200)
+
+    def test_member_ratings_forbidden_to_non_members(self):
+        self.client.login(username=self.non_member.username, password="Password123")
+        self.assertEqual(self._get_ratings().status_code, 403)
@@ -1,6 +1,8 @@
 """Tests of the sign up view."""
 from django.contrib.auth.hashers import check_password
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.models import User, Club, Membership
 from clubs.forms import MembershipApplicationForm
@@ -78,3 +80,10 @@ class MembershipApplicationViewTestCase(TestCase, LogInTester):
         response = self.client.post(self.url, self.form_input, follow=True)
         after_count = Membership.objects.count()
         self.assertEqual(after_count, before_count + 1)
+
+    def test_applied_everywhere_check_does_not_count_clubs(self):
+        self.client.login(username="janedoe", password="Password123")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
@@ -0,0 +1,82 @@
+"""Tests of the request-scoped membership cache"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+
+from clubs.helpers import get_membership, get_user_types, is_tournament_organizer
+from clubs.middleware import MembershipMiddleware
+from clubs.models import User, Club, Membership, Tournament
+
+class MembershipMiddlewareTestCase(TestCase):
+    """Tests of the request-scoped membership cache"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+        'clubs/tests/fixtures/default_tournaments.json',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='johndoe')
+        self.middleware = MembershipMiddleware(lambda request: HttpResponse())
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_memberships_are_not_loaded_until_used(self):
+        with self.assertNumQueries(0):
+            self.middleware(self.request)
+
+    def test_memberships_are_loaded_with_one_query(self):
+        self.middleware(self.request)
+        with self.assertNumQueries(1):
+            owned = get_membership(self.request, 1)
+            joined = get_membership(self.request, 2)
+            self.assertEqual(get_user_types(self.request, 1), owned.get_user_types())
+            self.assertIn(Membership.UserTypes.MEMBER, get_user_types(self.request, '2'))
+        self.assertEqual(owned.user_type, Membership.UserTypes.OWNER)
+        self.assertEqual(joined.user_type, Membership.UserTypes.MEMBER)
+
+    def test_club_without_membership(self):
+        self.middleware(self.request)
+        club = Club.objects.create(name='Another Club', location='London', owner=User.objects.get(username='juliedoe'))
+        self.assertIsNone(get_membership(self.request, club.id))
+        self.assertEqual(get_user_types(self.request, club.id), [])
+
+    def test_anonymous_user_has_no_memberships(self):
+        self.request.user = AnonymousUser()
+        self.middleware(self.request)
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_membership(self.request, 1))
+
+    def test_request_without_middleware(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_membership(self.request, 1).user_type, Membership.UserTypes.OWNER)
+            self.assertEqual(get_membership(self.request, 2).user_type, Membership.UserTypes.MEMBER)
+
+    def _log_in(self, username):
+        self.request.user = User.objects.get(username=username)
+        self.middleware(self.request)
+
+    def test_tournament_organizer(self):
+        tournament = Tournament.objects.get(id=1)
+        self._log_in('jonathandoe')
+        with self.assertNumQueries(1):
+            self.assertTrue(is_tournament_organizer(self.request, tournament))
+
+    def test_tournament_coorganizer(self):
+        tournament = Tournament.objects.get(id=1)
+        self._log_in('johndoe')
+        self.assertFalse(is_tournament_organizer(self.request, tournament))
+        tournament.coorganizers.add(self.user)
+        self.assertTrue(is_tournament_organizer(self.request, tournament))
+
+    def test_members_do_not_look_up_the_coorganizers(self):
+        tournament = Tournament.objects.get(id=1)
+        self._log_in('alicesmith')
+        with self.assertNumQueries(1):
+            self.assertFalse(is_tournament_organizer(self.request, tournament))
+
+    def test_officers_of_other_clubs_are_not_organizers(self):
+        self._log_in('juliedoe')
+        self.assertFalse(is_tournament_organizer(self.request, Tournament.objects.get(id=1)))
@@ -0,0 +1,124 @@
+"""Tests of the Prometheus metrics middleware and view"""
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+
+from clubs import metrics
+from clubs.models import User, Club, Tournament
+
+class MetricsTestCase(TestCase):
+    """Tests of the Prometheus metrics middleware and view"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+        'clubs/tests/fixtures/default_tournaments.json'
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(METRICS_DATABASE=os.path.join(directory.name, 'metrics.sqlite3'), METRICS_FLUSH_INTERVAL=0, METRICS_ENABLED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        metrics.buffer.clear()
+        self.user = User.objects.get(username='johndoe')
+        self.club = Club.objects.get(id=1)
+        self.url = reverse('metrics')
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_are_in_prometheus_text_format(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        content = response.content.decode()
+        self.assertIn('# TYPE clubs_request_duration_seconds histogram', content)
+        self.assertIn('# TYPE clubs_cache_hit_ratio gauge', content)
+
+    def test_request_latency_and_queries_are_recorded_by_view(self):
+        self.client.login(username=self.user.username, password="Password123")
+        for i in range(2):
+            self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        samples = metrics.store.get_samples()
+        self.assertEqual(samples['clubs_request_duration_seconds_count']['method="GET",status="200",view="club_dashboard"'], 2)
+        self.assertEqual(samples['clubs_request_duration_seconds_bucket']['le="+Inf",method="GET",status="200",view="club_dashboard"'], 2)
+        self.assertEqual(samples['clubs_request_queries_count']['view="club_dashboard"'], 2)
+        self.assertGreater(samples['clubs_request_queries_sum']['view="club_dashboard"'], 0)
+
+    def test_cache_hits_and_misses_are_counted(self):
+        cache.get('missing')
+        cache.set('present', 1)
+        cache.get('present')
+        cache.get_many(['present', 'missing'])
+        samples = metrics.store.get_samples()['clubs_cache_requests_total']
+        self.assertEqual(samples['cache="default",result="hit"'], 2)
+        self.assertEqual(samples['cache="default",result="miss"'], 2)
+        self.assertIn('clubs_cache_hit_ratio{cache="default"} 0.5', metrics.get_metrics())
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.operation_duration.observe(0.3, operation='test')
+        samples = metrics.store.get_samples()['clubs_operation_duration_seconds_bucket']
+        self.assertNotIn('le="0.25",operation="test"', samples)
+        self.assertEqual(samples['le="0.5",operation="test"'], 1)
+        self.assertEqual(samples['le="10",operation="test"'], 1)
+        self.assertEqual(samples['le="+Inf",operation="test"'], 1)
+
+    def test_domain_operations_and_stage_transitions_are_recorded(self):
+        tournament = Tournament.objects.get(id=1)
+        tournament.deadline = timezone.now() - timedelta(days=1)
+        tournament.check_tournament_stage_transition()
+        samples = metrics.store.get_samples()
+        self.assertEqual(samples['clubs_operation_duration_seconds_count']['operation="check_tournament_stage_transition"'], 1)
+        self.assertEqual(samples['clubs_tournament_stage_transitions_total']['from_stage="S",to_stage="C"'], 1)
+
+    def test_metrics_are_hidden_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_metrics_are_hidden_from_other_addresses(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_are_visible_to_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username=self.user.username, password="Password123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_nothing_is_recorded_when_disabled(self):
+        cache.get('missing')
+        self.assertEqual(metrics.store.get_samples(), {})
+
+    @override_settings(METRICS_FLUSH_INTERVAL=3600)
+    def test_samples_are_written_when_due_or_scraped(self):
+        metrics.buffer.flush()
+        metrics.stage_transitions.inc(from_stage='S', to_stage='C')
+        self.assertEqual(metrics.store.get_samples(), {})
+        self.assertIn('clubs_tournament_stage_transitions_total{from_stage="S",to_stage="C"} 1', metrics.get_metrics())
+
+    def test_store_errors_do_not_fail_requests(self):
+        self.client.login(username=self.user.username, password="Password123")
+        with mock.patch.object(metrics.store, 'add', side_effect=sqlite3.OperationalError('database is locked')):
+            with self.assertLogs('clubs.metrics', 'ERROR'):
+                response = self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        self.assertEqual(response.status_code, 200)
+
+        # The samples that could not be written are kept for the next flush
+        metrics.buffer.flush()
+        samples = metrics.store.get_samples()
+        self.assertEqual(samples['clubs_request_queries_count']['view="club_dashboard"'], 1)
@@ -0,0 +1,83 @@
+"""Tests of the query profiling middleware"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match
+from clubs.profiling import normalise_sql, QueryBudgetExceeded
+
+class QueryProfilingMiddlewareTestCase(TestCase):
+    """Tests of the query profiling middleware"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+        'clubs/tests/fixtures/default_tournaments.json'
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.club = Club.objects.get(id=1)
+        self.tournament = Tournament.objects.get(id=1)
+        self.client.login(username='johndoe', password="Password123")
+        self.club_dashboard_url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+
+    def test_normalise_sql(self):
+        self.assertEqual(
+            normalise_sql('SELECT *  FROM "clubs_user" WHERE id = 12 AND name = \'it\'\'s\' AND id IN (%s, %s, %s)'),
+            'SELECT * FROM "clubs_user" WHERE id = %s AND name = %s AND id IN (...)'
+        )
+
+    def test_profiling_is_off_by_default(self):
+        response = self.client.get(self.club_dashboard_url)
+        self.assertFalse(hasattr(response.wsgi_request, 'query_profile'))
+
+    @override_settings(QUERY_PROFILING=True)
+    def test_request_queries_are_recorded(self):
+        response = self.client.get(self.club_dashboard_url)
+        profile = response.wsgi_request.query_profile
+        self.assertEqual(profile.count, 6)
+        self.assertGreater(profile.duration, 0)
+        self.assertIn('FROM "clubs_club"', ' '.join(sql for sql, _ in profile.queries))
+
+    @override_settings(QUERY_PROFILING=True, QUERY_DUPLICATE_THRESHOLD=2)
+    def test_duplicated_queries_are_logged(self):
+        with self.assertLogs('clubs.queries', 'WARNING') as logs:
+            self.client.get(reverse('tournament_dashboard', kwargs={'tournament_id': self.tournament.id}))
+        self.assertIn('ran the same query', logs.output[0])
+
+    @override_settings(QUERY_PROFILING=True, QUERY_BUDGETS={'club_dashboard': 1})
+    def test_requests_over_budget_are_logged(self):
+        with self.assertLogs('clubs.queries', 'WARNING') as logs:
+            response = self.client.get(self.club_dashboard_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('(club_dashboard) ran 6 queries, over its budget of 1', logs.output[0])
+
+    @override_settings(QUERY_PROFILING=True, QUERY_BUDGET_STRICT=True, QUERY_BUDGETS={'club_dashboard': 1})
+    def test_strict_budget_fails_requests_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.club_dashboard_url)
+
+    def _fill_tournament(self):
+        players = [membership.user for membership in Membership.objects.filter(club=self.club).select_related('user')]
+        TournamentParticipation.objects.bulk_create([TournamentParticipation(tournament=self.tournament, user=player) for player in players], ignore_conflicts=True)
+        # Every player meets every other one, with the first half of the matches played, so the tournament stays in its elimination stage
+        Tournament.objects.filter(id=self.tournament.id).update(stage=Tournament.StageTypes.ELIMINATION)
+        pairs = [(white, black) for white in players for black in players if white != black]
+        Match.objects.bulk_create([
+            Match(tournament=self.tournament, white_player=white, black_player=black, _result='W' if index < len(pairs) // 2 else 'P')
+            for index, (white, black) in enumerate(pairs)
+        ])
+
+    @override_settings(QUERY_PROFILING=True, QUERY_BUDGET_STRICT=True)
+    def test_dashboards_are_within_their_budgets(self):
+        self._fill_tournament()
+        membership = Membership.objects.get(user__username='johndoe', club=self.club)
+        for url in [
+            self.club_dashboard_url,
+            reverse('tournament_dashboard', kwargs={'tournament_id': self.tournament.id}),
+            reverse('member_profile', kwargs={'membership_id': membership.id}),
+            reverse('user_dashboard'),
+        ]:
+            self.assertEqual(self.client.get(url).status_code, 200)
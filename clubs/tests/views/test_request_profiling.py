@@ -0,0 +1,87 @@
+"""Tests of the cProfile middleware and the profile report view"""
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from clubs.models import User, Club
+
+class RequestProfilingTestCase(TestCase):
+    """Tests of the cProfile middleware and the profile report view"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILING_DIRECTORY=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.get(username='johndoe')
+        self.club = Club.objects.get(id=1)
+        self.url = reverse('club_dashboard', kwargs={'club_id': self.club.id})
+
+    def log_in_as_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username=self.user.username, password="Password123")
+
+    def test_requests_are_not_profiled_by_default(self):
+        self.log_in_as_staff()
+        response = self.client.get(self.url)
+        self.assertNotIn('X-Profile-Summary', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_only_staff_can_profile_requests(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self.client.get(self.url, {'profile': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Summary', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_staff_requests_are_profiled_on_demand(self):
+        self.log_in_as_staff()
+        response = self.client.get(self.url, {'profile': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response['X-Profile-Summary'].split('; ')), 10)
+        profiles = os.listdir(self.directory)
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].endswith('-club_dashboard.prof'))
+
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-Summary', response)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    @override_settings(PROFILING_MAX_FILES=2)
+    def test_oldest_profiles_are_deleted(self):
+        self.log_in_as_staff()
+        urls = [self.client.get(self.url, {'profile': 1})['X-Profile-Url'] for i in range(3)]
+        self.assertEqual(sorted(os.listdir(self.directory)), [url.split('/')[-1] for url in urls[1:]])
+
+    def test_profile_report(self):
+        self.log_in_as_staff()
+        report_url = self.client.get(self.url, {'profile': 1})['X-Profile-Url']
+        response = self.client.get(report_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Ordered by: cumulative time', response.content.decode())
+
+    def test_profile_report_is_only_visible_to_staff(self):
+        self.log_in_as_staff()
+        report_url = self.client.get(self.url, {'profile': 1})['X-Profile-Url']
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.client.get(report_url).status_code, 403)
+
+    def test_profile_report_of_unknown_profile(self):
+        self.log_in_as_staff()
+        response = self.client.get(reverse('profile_report', kwargs={'name': 'missing.prof'}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('profile_report', kwargs={'name': '..settings.py'}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,59 @@
+"""Tests of the request timing middleware and the latency percentiles view"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from clubs.models import User, Club
+from clubs.profiling import latency_buffer, percentile
+
+class RequestTimingTestCase(TestCase):
+    """Tests of the request timing middleware and the latency percentiles view"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        latency_buffer.clear()
+        self.user = User.objects.get(username='johndoe')
+        self.club = Club.objects.get(id=1)
+        self.url = reverse('latency_percentiles')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_response_has_server_timing_header(self):
+        self.client.login(username=self.user.username, password="Password123")
+        response = self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['view', 'db', 'template'])
+
+    def test_timings_are_kept_by_view(self):
+        self.client.login(username=self.user.username, password="Password123")
+        for i in range(3):
+            self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        self.client.get(reverse('user_dashboard'))
+
+        User.objects.filter(id=self.user.id).update(is_staff=True)
+        results = {result['url_name']: result for result in self.client.get(self.url).json()['results']}
+        self.assertEqual(results['club_dashboard']['count'], 3)
+        self.assertEqual(results['user_dashboard']['count'], 1)
+        club_dashboard = results['club_dashboard']
+        self.assertLessEqual(club_dashboard['view']['p50'], club_dashboard['view']['p99'])
+        self.assertGreater(club_dashboard['template']['p50'], 0)
+        self.assertLessEqual(club_dashboard['db']['p95'], club_dashboard['view']['p95'])
+
+    def test_latency_percentiles_are_only_visible_to_staff(self):
+        self.client.login(username=self.user.username, password="Password123")
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_latency_percentiles_require_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
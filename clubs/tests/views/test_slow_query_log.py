@@ -0,0 +1,79 @@
+"""Tests of the slow query log and the slow queries view"""
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from clubs.models import User, Club
+from clubs.profiling import slow_query_logger
+
+class SlowQueryLogTestCase(TestCase):
+    """Tests of the slow query log and the slow queries view"""
+
+    fixtures = [
+        'clubs/tests/fixtures/default_users.json',
+        'clubs/tests/fixtures/default_clubs.json',
+        'clubs/tests/fixtures/default_memberships.json',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='johndoe')
+        self.club = Club.objects.get(id=1)
+        self.url = reverse('slow_queries')
+        self.client.login(username=self.user.username, password="Password123")
+
+    def get_logged_queries(self, url):
+        with self.assertLogs('clubs.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_are_logged_with_their_plan(self):
+        entries = self.get_logged_queries(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        entry = next(entry for entry in entries if 'FROM "clubs_club"' in entry['sql'])
+        self.assertEqual(entry['view'], 'club_dashboard')
+        self.assertIn('%s', entry['sql'])
+        self.assertIn(str(self.club.id), entry['params'])
+        self.assertTrue(entry['location'].startswith('clubs/'))
+        self.assertTrue(any('clubs_club' in step for step in entry['plan']))
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_query_plans_are_not_counted_as_queries(self):
+        with self.assertLogs('clubs.slow_queries', 'WARNING'):
+            with self.assertNumQueries(6):
+                self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+
+    def test_fast_queries_are_not_logged(self):
+        with mock.patch.object(slow_query_logger, 'warning') as warning:
+            self.client.get(reverse('club_dashboard', kwargs={'club_id': self.club.id}))
+        warning.assert_not_called()
+
+    def test_slow_queries_page_is_only_visible_to_staff(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_slow_queries_page_shows_latest_entries_first(self):
+        self.user.is_staff = True
+        self.user.save()
+        with tempfile.TemporaryDirectory() as directory:
+            log = os.path.join(directory, 'slow_queries.log')
+            with open(log, 'w') as file:
+                for sql in ['SELECT 1', 'SELECT 2']:
+                    file.write(json.dumps({'date': '', 'duration': 150, 'sql': sql, 'params': '()', 'view': None, 'location': None, 'plan': ['SCAN clubs_match']}) + '\n')
+                file.write('{"date": "')
+            with override_settings(SLOW_QUERY_LOG=log):
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'slow_queries.html')
+        self.assertEqual([entry['sql'] for entry in response.context['slow_queries']], ['SELECT 2', 'SELECT 1'])
+        self.assertContains(response, 'SCAN clubs_match')
+
+    def test_slow_queries_page_without_log(self):
+        self.user.is_staff = True
+        self.user.save()
+        with override_settings(SLOW_QUERY_LOG=os.path.join(tempfile.gettempdir(), 'missing-slow-queries.log')):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'No query has been slower')
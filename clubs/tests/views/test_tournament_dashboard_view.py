@@ -1,4 +1,5 @@
 """Tests of the tournament dashboard view"""
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from clubs.models import User, Club, Membership, Tournament, TournamentParticipation, Match
@@ -17,6 +18,7 @@ class TournamentDashboardViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        cache.clear()
         self.club = Club.objects.get(id=1)
         self.member = User.objects.get(username='johndoe')
         self.organizer = User.objects.get(username='jonathandoe')
@@ -216,3 +218,30 @@ class TournamentDashboardViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'tournament_dashboard.html')
         self.assertContains(response, ">Cancel Tournament</a>")
+
+    def test_tournament_details_are_cached(self):
+        self.client.login(username=self.member.username, password="Password123")
+        url = reverse('tournament_dashboard', kwargs={'tournament_id': self.tournament.id})
+        self.client.get(url)
+        # Queryset updates send no signal, so the cached fragment is still served
+        Tournament.objects.filter(id=self.tournament.id).update(description="New description")
+        response = self.client.get(url)
+        self.assertContains(response, "<td>Tournament description</td>")
+
+    def test_edited_tournament_details_show_straight_away(self):
+        self.client.login(username=self.member.username, password="Password123")
+        url = reverse('tournament_dashboard', kwargs={'tournament_id': self.tournament.id})
+        self.client.get(url)
+        self.tournament.description = "New description"
+        self.tournament.save()
+        response = self.client.get(url)
+        self.assertContains(response, "<td>New description</td>")
+
+    def test_edited_club_details_show_straight_away(self):
+        self.client.login(username=self.member.username, password="Password123")
+        url = reverse('tournament_dashboard', kwargs={'tournament_id': self.tournament.id})
+        self.client.get(url)
+        self.club.location = "Boston"
+        self.club.save()
+        response = self.client.get(url)
+        self.assertContains(response, "<td>Boston</td>")
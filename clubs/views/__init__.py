@@ -1,8 +1,10 @@
 from .account import *
 from .authentication import *
+from .autocomplete import *
 from .club_actions import *
 from .club import *
 from .membership import *
+from .monitoring import *
 from .static import *
 from .tournament import *
 from .user import *
\ No newline at end of file
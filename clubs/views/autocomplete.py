@@ -0,0 +1,45 @@
+'''Autocomplete Related Views'''
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+
+from clubs.autocomplete import club_index, search_objects
+from clubs.helpers import get_membership, get_user_types
+from clubs.models import Membership, Club, User
+
+# Number of suggestions returned by the autocomplete endpoints
+AUTOCOMPLETE_LIMIT = 10
+
+# Number of club name matches looked up before keeping only the clubs the user can apply to
+AUTOCOMPLETE_CANDIDATES = 200
+
+def get_suggestions(objects, ids, label):
+    """Return the objects in the order of their ids, as suggestions with a value and a label."""
+    objects_by_id = {obj.id: obj for obj in objects}
+    return [
+        {'value': pk, 'label': label(objects_by_id[pk])}
+        for pk in ids if pk in objects_by_id
+    ][:AUTOCOMPLETE_LIMIT]
+
+@login_required
+def autocomplete_users(request):
+    """Return the officers and owner of a club whose username or name starts with the query, only available to the club's officers."""
+    club_id = request.GET.get('club', '')
+    if not club_id.isdigit() or Membership.UserTypes.OFFICER not in get_user_types(request, club_id):
+        return HttpResponse(status = 403)
+
+    # A club only has a few officers, so they are loaded first and matched in memory
+    officers = User.objects.filter(
+        id__in=Membership.objects.filter(club=club_id, rank__gte=Membership.Ranks.OFFICER).values('user')
+    ).exclude(id=request.user.id).only('id', 'username', 'name')
+    ids = search_objects(officers, ['username', 'name'], request.GET.get('q', ''), AUTOCOMPLETE_LIMIT)
+    return JsonResponse({'results': get_suggestions(officers, ids, lambda user: f'{user.name} ({user.username})')})
+
+@login_required
+def autocomplete_clubs(request):
+    """Return the clubs whose name starts with the query and that the user has not applied to yet."""
+    ids = [
+        pk for pk in club_index.search(request.GET.get('q', ''), AUTOCOMPLETE_CANDIDATES)
+        if get_membership(request, pk) is None
+    ]
+    clubs = Club.objects.filter(id__in=ids[:AUTOCOMPLETE_LIMIT]).only('id', 'name')
+    return JsonResponse({'results': get_suggestions(clubs, ids, lambda club: club.name)})
@@ -3,10 +3,49 @@ from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.http import HttpResponse
 from django.urls import reverse
 
 from clubs.models import Membership, Club, Tournament
 from clubs.forms import ClubCreationForm, EditClubDetailsForm
+from clubs.helpers import keyset_paginate, get_cursor, get_membership
+from clubs.search import search_clubs
+
+# Number of rows rendered per page in each club dashboard panel
+PANEL_PAGE_SIZE = 20
+
+# Number of clubs listed per page of search results
+SEARCH_PAGE_SIZE = 20
+
+def get_club_members(club):
+    """Return the club's members, with only the columns rendered by the members panel."""
+    # Excluding non-members rather than filtering on a range of ranks, so SQLite pages the members in id order from the
+    # club's index instead of sorting every member found by a range of membership_club_rank_idx
+    return Membership.objects.filter(club=club).exclude(rank=Membership.Ranks.NON_MEMBER).select_related('user').only(
+        'user_type', 'user', 'user__username', 'user__name', 'user__email', 'user__email_hash'
+    )
+
+def get_club_applications(club):
+    """Return the club's pending applications, with only the columns rendered by the applications panel."""
+    return Membership.objects.filter(club=club, application_status='P').select_related('user').only(
+        'personal_statement', 'user', 'user__name'
+    )
+
+def get_club_tournaments(club):
+    """Return the club's tournaments, with only the columns rendered by the tournaments panel."""
+    return Tournament.objects.filter(club=club).select_related('organizer').only(
+        'name', 'capacity', 'deadline', 'organizer', 'organizer__name'
+    )
+
+def get_panel_url(url_name, club):
+    """Return the URL of the first page of a club dashboard panel fragment."""
+    return reverse(url_name, kwargs={'club_id': club.id})
+
+def get_next_page_url(url_name, club, cursor):
+    """Return the URL of the panel fragment continuing from the cursor, or None on the last page."""
+    if cursor is None:
+        return None
+    return f"{get_panel_url(url_name, club)}?after={cursor}"
 
 @login_required
 def club_dashboard(request, club_id):
@@ -16,31 +55,93 @@ def club_dashboard(request, club_id):
     membership = None
 
     try:
-        club = Club.objects.get(id=club_id)
+        club = Club.objects.select_related('owner').get(id=club_id)
     except:
         club = None
 
     # If the club exists, get the data related to the specified club
     if club is not None:
-        membership = Membership.objects.filter(user=user, club=club).first()
-        members = Membership.objects.filter(club=club).exclude(user_type = Membership.UserTypes.NON_MEMBER)
-        officers = Membership.objects.filter(club=club).filter(user_type = Membership.UserTypes.OFFICER)
-        applications = Membership.objects.filter(club=club, application_status='P')
-        tournaments = Tournament.objects.filter(club=club)
+        membership = get_membership(request, club.id)
+        user_types = membership.get_user_types() if membership else []
 
+        # The panels are not queried here, each one is fetched from its fragment endpoint when it scrolls into view
         return render(request, 'club_dashboard.html', {
             'club': club,
             'membership': membership,
-            'members': members,
-            'officers': officers,
-            'applications': applications,
+            'user_types': user_types,
             'user': user,
-            'tournaments': tournaments
+            'tournaments_url': get_panel_url('club_tournaments_panel', club),
+            'members_url': get_panel_url('club_members_panel', club),
+            'applications_url': get_panel_url('club_applications_panel', club)
         })
     else:
         messages.add_message(request, messages.ERROR, "Club does not exist.")
         return redirect('user_dashboard')
 
+@login_required
+def club_tournaments_panel(request, club_id):
+    """Return a page of rows of the club dashboard's tournaments panel."""
+    club = Club.objects.filter(id=club_id).first()
+    if club is None:
+        return HttpResponse(status = 404)
+
+    tournaments, next_tournaments = keyset_paginate(get_club_tournaments(club), get_cursor(request), PANEL_PAGE_SIZE)
+    return render(request, 'partials/club_tournament_rows.html', {
+        'club': club,
+        'tournaments': tournaments,
+        'next_tournaments_url': get_next_page_url('club_tournaments_panel', club, next_tournaments)
+    })
+
+@login_required
+def club_members_panel(request, club_id):
+    """Return a page of rows of the club dashboard's members panel, only visible to the club's members."""
+    membership = get_membership(request, club_id)
+    if membership is None or membership.user_type == Membership.UserTypes.NON_MEMBER:
+        return HttpResponse(status = 403)
+
+    club = Club.objects.get(id=club_id)
+    members, next_members = keyset_paginate(get_club_members(club), get_cursor(request), PANEL_PAGE_SIZE)
+    return render(request, 'partials/club_member_rows.html', {
+        'club': club,
+        'membership': membership,
+        'user_types': membership.get_user_types(),
+        'members': members,
+        'next_members_url': get_next_page_url('club_members_panel', club, next_members)
+    })
+
+@login_required
+def club_applications_panel(request, club_id):
+    """Return a page of rows of the club dashboard's pending applications panel, only visible to the club's officers."""
+    membership = get_membership(request, club_id)
+    if membership is None or Membership.UserTypes.OFFICER not in membership.get_user_types():
+        return HttpResponse(status = 403)
+
+    club = Club.objects.get(id=club_id)
+    applications, next_applications = keyset_paginate(get_club_applications(club), get_cursor(request), PANEL_PAGE_SIZE)
+    return render(request, 'partials/club_application_rows.html', {
+        'club': club,
+        'applications': applications,
+        'next_applications_url': get_next_page_url('club_applications_panel', club, next_applications)
+    })
+
+@login_required
+def club_search(request):
+    """Allow users to search clubs by name, location, mission statement and description, with the best matches first."""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    clubs, has_next = search_clubs(query, page, SEARCH_PAGE_SIZE)
+    return render(request, 'club_search.html', {
+        'query': query,
+        'clubs': clubs,
+        'page': page,
+        'previous_page': page - 1 if page > 1 else None,
+        'next_page': page + 1 if has_next else None
+    })
+
 @login_required
 def club_creation(request):
     """Allow user to create club."""
@@ -60,13 +161,7 @@ def club_creation(request):
 @login_required
 def edit_club(request, club_id):
     """Allow user to edit club. If there is an error it redirects the user."""
-    # Get currently logged-in user
-    current_user = request.user
-
-    try:
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
-    except:
-        current_user_membership = None
+    current_user_membership = get_membership(request, club_id)
 
     if current_user_membership is None:
         messages.add_message(request, messages.ERROR, "Must be an owner and apart of this club to edit details!")
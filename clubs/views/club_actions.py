@@ -5,16 +5,14 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 
 from clubs.models import Membership, Club, User
+from clubs.helpers import get_membership, get_user_types
 
 @login_required
 def promote_member(request, club_id, user_id):
     """Allow owners to promote users."""
-    # Get currently logged-in user
-    current_user = request.user
     try:
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
         # Check if the logged-in user is the owner of the specified club
-        if Membership.UserTypes.OWNER in current_user_membership.get_user_types():
+        if Membership.UserTypes.OWNER in get_user_types(request, club_id):
             # Promote the specified user to 'officer'
             membership_to_promote = Membership.objects.get(club = club_id, user=user_id)
             membership_to_promote.promote_to_officer()
@@ -30,12 +28,9 @@ def promote_member(request, club_id, user_id):
 @login_required
 def demote_member(request, club_id, user_id):
     """Allow owners to demote users."""
-    # Get currently logged-in user
-    current_user = request.user
     try:
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
         # Check if the logged-in user is the owner of the specified club
-        if Membership.UserTypes.OWNER in current_user_membership.get_user_types():
+        if Membership.UserTypes.OWNER in get_user_types(request, club_id):
             membership_to_demote = Membership.objects.get(club = club_id, user=user_id)
             # Demote the specified user to 'member'
             membership_to_demote.demote_to_member()
@@ -51,12 +46,9 @@ def demote_member(request, club_id, user_id):
 @login_required
 def kick_member(request, club_id, user_id):
     """Allow owners or officers to kick users."""
-    # Get currently logged-in user
-    current_user = User.objects.get(id=user_id)
     try:
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
-        # Check if the logged-in user is the owner or an officer of the specified club
-        if Membership.UserTypes.OWNER or Membership.UserTypes.OFFICER in current_user_membership.get_user_types():
+        # Check if the logged-in user is the owner or an officer of the specified club (owners are officers too)
+        if Membership.UserTypes.OFFICER in get_user_types(request, club_id):
             membership_to_kick = Membership.objects.get(club = club_id, user=user_id)
             # Kick the specified 'member' from the club
             membership_to_kick.kick_member()
@@ -72,12 +64,10 @@ def kick_member(request, club_id, user_id):
 @login_required
 def transfer_ownership(request, club_id, user_id):
     """Allow owners to transfer ownership."""
-    # Get currently logged-in user
-    current_user = request.user
     try:
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
+        current_user_membership = get_membership(request, club_id)
         # Check if the logged-in user is the owner of the specified club
-        if Membership.UserTypes.OWNER in current_user_membership.get_user_types():
+        if current_user_membership and Membership.UserTypes.OWNER in current_user_membership.get_user_types():
             user_to_transfer = User.objects.get(id=user_id)
             # Transfer the club ownership to the specified user
             current_user_membership.transfer_ownership(user_to_transfer)
@@ -93,11 +83,11 @@ def transfer_ownership(request, club_id, user_id):
 @login_required
 def leave_club(request, club_id):
     """Allow users to leave a club."""
-    # Get currently logged-in user
-    current_user = request.user
     try:
-        club = Club.objects.get(id=club_id)
-        current_user_membership = Membership.objects.get(user=current_user, club=club_id)
+        current_user_membership = get_membership(request, club_id)
+        if current_user_membership is None:
+            raise Membership.DoesNotExist("Membership matching query does not exist.")
+        club = current_user_membership.club
         # Attempt to leave the specified club
         if current_user_membership.leave():
             messages.add_message(request, messages.SUCCESS, f"Successfully left {club.name}.")
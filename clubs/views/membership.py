@@ -2,7 +2,7 @@
 from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Exists, Q, OuterRef
+from django.db.models import Exists, OuterRef
 
 from clubs.forms import MembershipApplicationForm
 from clubs.models import Membership, Club
@@ -25,7 +25,7 @@ def membership_application(request):
                 messages.add_message(request, messages.ERROR, "There is an error with the form, please try again.")
     else:
         form = MembershipApplicationForm(initial = {'user': request.user})
-        if form.fields['club'].queryset.count() == 0:
+        if not Club.objects.filter(~Exists(Membership.objects.filter(user=request.user.pk, club=OuterRef('pk')))).exists():
             # The user has already applied to every club available, it cannot apply to any other club, an error message is output
             messages.add_message(request, messages.ERROR, "Cannot apply to any club. You already applied to every club available.")
             return redirect('user_dashboard')
@@ -60,8 +60,7 @@ def club_memberships(request):
     # Select clubs the user is a member of
     subquery = Membership.objects.filter(user=request.user.pk, club=OuterRef('pk'))
     clubs = Club.objects.filter(
-        Q(Exists(subquery)) &
-        ~Q(Exists(subquery.filter(user_type=Membership.UserTypes.NON_MEMBER)))
+        Exists(subquery.filter(rank__gte=Membership.Ranks.MEMBER))
     )
     return render(request, 'club_memberships.html', {'clubs': clubs})
 
@@ -71,7 +70,6 @@ def available_clubs(request):
     # Select clubs the user is not a member of
     subquery = Membership.objects.filter(user=request.user.pk, club=OuterRef('pk'))
     clubs = Club.objects.filter(
-        ~Q(Exists(subquery)) |
-        Q(Exists(subquery.filter(user_type=Membership.UserTypes.NON_MEMBER)))
+        ~Exists(subquery.filter(rank__gte=Membership.Ranks.MEMBER))
     )
     return render(request, 'available_clubs.html', {'clubs': clubs})
@@ -0,0 +1,45 @@
+'''Monitoring Related Views'''
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+
+from clubs.metrics import get_metrics
+from clubs.profiling import get_profile_report, get_slow_queries, latency_buffer
+
+@login_required
+def latency_percentiles(request):
+    """Return the p50, p95 and p99 view, database and template times of each view served by this process, only visible to staff."""
+    if not request.user.is_staff:
+        return HttpResponse(status = 403)
+
+    return JsonResponse({'results': latency_buffer.get_percentiles()})
+
+@login_required
+def profile_report(request, name):
+    """Return the report of a saved request profile, listing the functions taking the most cumulative time, only visible to staff."""
+    if not request.user.is_staff:
+        return HttpResponse(status = 403)
+
+    report = get_profile_report(name, settings.PROFILING_REPORT_FUNCTIONS)
+    if report is None:
+        return HttpResponse(status = 404)
+    return HttpResponse(report, content_type='text/plain; charset=utf-8')
+
+@login_required
+def slow_queries(request):
+    """Show the latest queries of the slow query log with their plan, only visible to staff."""
+    if not request.user.is_staff:
+        return HttpResponse(status = 403)
+
+    return render(request, 'slow_queries.html', {
+        'slow_queries': get_slow_queries(settings.SLOW_QUERY_PAGE_SIZE),
+        'threshold': settings.SLOW_QUERY_THRESHOLD,
+    })
+
+def metrics(request):
+    """Return the metrics of all processes in the Prometheus text format, only visible to staff and the scrapers in METRICS_ALLOWED_IPS, if any."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS and not request.user.is_staff:
+        return HttpResponse(status = 403)
+
+    return HttpResponse(get_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -9,6 +9,7 @@ from django.urls import reverse
 
 from clubs.models import Club, Tournament, TournamentParticipation, Match, Membership
 from clubs.forms import TournamentCreationForm
+from clubs.helpers import get_membership, is_tournament_organizer
 
 @login_required
 def tournament_dashboard(request, tournament_id):
@@ -27,7 +28,7 @@ def tournament_dashboard(request, tournament_id):
     user = request.user
 
     try:
-        tournament = Tournament.objects.get(id=tournament_id)
+        tournament = Tournament.objects.select_related('club', 'organizer').get(id=tournament_id)
     except:
         tournament = None
 
@@ -41,10 +42,10 @@ def tournament_dashboard(request, tournament_id):
         # Get the number of participants to the tournament
         participants_count = TournamentParticipation.objects.filter(tournament=tournament).count()
         participants_users = TournamentParticipation.objects.filter(tournament=tournament).values_list('user', flat=True)
-        participants = Membership.objects.filter(user__in=participants_users, club=club)
+        participants = Membership.objects.filter(user__in=participants_users, club=club).select_related('user')
 
-        # Get all games scheduled for this tournament, as Match objects
-        games = Match.objects.filter(tournament=tournament)
+        # Get all games scheduled for this tournament, as Match objects, with the players and groups the schedule lists
+        games = Match.objects.filter(tournament=tournament).select_related('white_player', 'black_player', 'group')
 
         status = {
             Tournament.StageTypes.SIGNUPS_OPEN: "Signups Open",
@@ -54,8 +55,8 @@ def tournament_dashboard(request, tournament_id):
             Tournament.StageTypes.FINISHED: "Finished",
         }[tournament.stage]
 
-        # Get the list of coorganizers of the tournament
-        coorganizers = tournament.coorganizers.all()
+        # Check if the logged-in user is one of the organizers of the tournament
+        is_organizer = is_tournament_organizer(request, tournament)
 
         # Check if the logged-in user is already signed-up to the tournament
         try:
@@ -72,7 +73,7 @@ def tournament_dashboard(request, tournament_id):
             'participants': participants,
             'participants_count': participants_count,
             'is_signed_up': is_signed_up,
-            'coorganizers': coorganizers,
+            'is_organizer': is_organizer,
             'status': status
         })
 
@@ -107,8 +108,8 @@ def join_tournament(request, tournament_id):
     tournament = Tournament.objects.get(id=tournament_id)
     # Get currently logged-in user
     user = request.user
-    # Attempt to join the tournament
-    join_tournament_message = tournament.join_tournament(user)
+    # Attempt to join the tournament, with the user's membership of its club read from the request's membership cache
+    join_tournament_message = tournament.join_tournament(user, get_membership(request, tournament.club_id))
     if join_tournament_message:
         messages.add_message(request, messages.ERROR, join_tournament_message)
     if request.GET.get('next'):
@@ -137,8 +138,11 @@ def cancel_tournament(request, tournament_id):
     tournament = Tournament.objects.get(id=tournament_id)
     # Get currently logged-in user
     user = request.user
-    # Attempt to cancel the tournament
-    cancel_tournament_message = tournament.cancel_tournament(user)
+    # Attempt to cancel the tournament, only if the logged-in user is an organizer for this tournament
+    if is_tournament_organizer(request, tournament):
+        cancel_tournament_message = tournament.cancel_tournament(user)
+    else:
+        cancel_tournament_message = "You are not an organizer for this tournament."
     if cancel_tournament_message:
         messages.add_message(request, messages.ERROR, cancel_tournament_message)
     if request.GET.get('next'):
@@ -150,10 +154,8 @@ def generate_matches(request, tournament_id):
     """Generates matches for group and elimination stages"""
     # Get specified Tournament object
     tournament = Tournament.objects.get(id=tournament_id)
-    # Get currently logged-in user
-    user = request.user
     # Check if the logged-in user is an organizer for this tournament
-    is_organizer = user in tournament.coorganizers.all() or tournament.organizer == user
+    is_organizer = is_tournament_organizer(request, tournament)
     if is_organizer: # Generate matches only is the user is an organizer for this tournament
         message = tournament.generate_matches()
         messages.add_message(request, *message)
@@ -2,9 +2,60 @@
 from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import F, Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timezone
 
-from clubs.models import Membership, Tournament, TournamentParticipation, Match, EloRating, User
+from clubs.charts import largest_triangle_three_buckets
+from clubs.models import Membership, Tournament, TournamentParticipation, Match, EloRating, EloRatingRecord, User
+from clubs.helpers import get_membership, sorted_keyset_paginate, get_cursor
+
+# Number of rows returned per page of the member profile's matches table
+MATCH_PAGE_SIZE = 20
+
+# Columns the matches table can be sorted on, and the field or annotation holding each one's sort value
+MATCH_SORT_KEYS = {
+    'result_date': 'result_date',
+    'opponent': 'opponent_username',
+    'result': '_result'
+}
+
+# Number of points the rating history chart is downsampled to, by default, at least and at most
+RATING_CHART_POINTS = 200
+MIN_RATING_CHART_POINTS = 3
+MAX_RATING_CHART_POINTS = 1000
+
+def get_member_matches(membership):
+    """Return the member's matches in the club as white and as black, annotated with their opponent.
+
+    They are two querysets, so each one is read in order of result date from its (player, result_date) index, and
+    its opponent is a single column of the other player to sort on.
+    """
+    matches = Match.objects.filter(tournament__club=membership.club_id).select_related('white_player', 'black_player', 'group').only(
+        '_result', 'result_date', 'white_player__username', 'black_player__username', 'group__stage'
+    )
+    return [
+        matches.filter(white_player=membership.user_id).annotate(
+            opponent_username=F('black_player__username'), opponent_name=F('black_player__name')
+        ),
+        matches.filter(black_player=membership.user_id).annotate(
+            opponent_username=F('white_player__username'), opponent_name=F('white_player__name')
+        )
+    ]
+
+def get_match_row(match):
+    """Return the columns of a match rendered by the matches table."""
+    return {
+        'id': match.id,
+        'white_player': str(match.white_player) if match.white_player else '',
+        'black_player': str(match.black_player) if match.black_player else '',
+        'opponent': match.opponent_username or '',
+        'stage': match.group.stage if match.group else '',
+        'result': match.result,
+        'result_date': match.result_date.isoformat() if match.result_date else None
+    }
 
 @login_required
 def user_dashboard(request):
@@ -25,7 +76,7 @@ def user_profile(request, user_id = None, membership_id = None):
             return redirect('user_dashboard')
 
         # Get Membership object of current user
-        request_membership = Membership.objects.filter(user=request.user, club=membership.club).first()
+        request_membership = get_membership(request, membership.club_id)
 
         if request_membership is None:
             messages.error(request, 'You do not have permission to view this user profile.')
@@ -39,11 +90,9 @@ def user_profile(request, user_id = None, membership_id = None):
 @login_required
 def member_profile(request, membership_id):
     """Information of a member when a member profile is viewed. Redirects to user dashboard if there is no club."""
-    # Get currently logged-in user
-    user = request.user
     # Get the specified Membership object
     try:
-        membership = Membership.objects.get(id=membership_id)
+        membership = Membership.objects.select_related('club', 'user').get(id=membership_id)
     except:
         membership = None
 
@@ -51,33 +100,81 @@ def member_profile(request, membership_id):
         # If the specified Membership object exists, get the data related to the membership
         club = membership.club
 
-        if not Membership.objects.filter(user=user, club=club).exists():
+        if get_membership(request, club.id) is None:
             messages.add_message(request, messages.ERROR, "You are not a member of this club.")
             return redirect('user_dashboard')
 
-        # Get the tournament data associated with this member
-        matches = list(Match.objects.filter(Q(tournament__club=club) & Q(white_player=membership.user) | Q(black_player=membership.user)))
+        # Get the tournament data associated with this member, the matches table fetches its rows from member_matches
         tournament_ids = TournamentParticipation.objects.filter(user=membership.user).values_list('tournament', flat=True).distinct()
-        tournaments = list(Tournament.objects.filter(id__in=tournament_ids))
+        tournaments = list(Tournament.objects.filter(id__in=tournament_ids).select_related('organizer'))
 
-        # Get the member's ELO Ratings
-        elo_ratings = EloRating.get_ratings(membership)
-        match_statistics = [
-            sum((match.result == Match.MatchResultTypes.WHITE_WIN and match.white_player == membership.user) or (match.result == Match.MatchResultTypes.BLACK_WIN and match.black_player == membership.user) for match in matches),
-            sum((match.result == Match.MatchResultTypes.BLACK_WIN and match.white_player == membership.user) or (match.result == Match.MatchResultTypes.WHITE_WIN and match.black_player == membership.user) for match in matches),
-            sum((match.result == Match.MatchResultTypes.DRAW and match.white_player == membership.user) or (match.result == Match.MatchResultTypes.DRAW and match.black_player == membership.user) for match in matches)
-        ]
+        # The rating history chart fetches its points from member_ratings
+        match_statistics = Match.get_player_statistics(membership.user, club)
 
         return render(request, 'member_profile.html', {
             'club': club,
             'membership': membership,
             'user': membership.user,
-            'matches': matches,
+            'matches_url': reverse('member_matches', kwargs={'membership_id': membership.id}),
             'match_statistics': match_statistics,
             'tournaments': tournaments,
-            'elo_ratings': elo_ratings
+            'elo_rating': EloRating.get_current_rating(membership),
+            'ratings_url': reverse('member_ratings', kwargs={'membership_id': membership.id})
         })
 
     else:
         messages.add_message(request, messages.ERROR, "Member not found.")
         return redirect('user_dashboard')
+
+@login_required
+def member_matches(request, membership_id):
+    """Return a page of the member's matches as JSON, sorted on a column and filtered by opponent, only visible to the club's members."""
+    membership = Membership.objects.filter(id=membership_id).first()
+    if membership is None or get_membership(request, membership.club_id) is None:
+        return HttpResponse(status = 403)
+
+    sort = request.GET.get('sort', 'result_date')
+    if sort not in MATCH_SORT_KEYS:
+        return HttpResponse(status = 400)
+    descending = request.GET.get('direction', 'desc') == 'desc'
+
+    matches = get_member_matches(membership)
+    opponent = request.GET.get('opponent', '').strip()
+    if opponent:
+        matches = [queryset.filter(Q(opponent_username__icontains=opponent) | Q(opponent_name__icontains=opponent)) for queryset in matches]
+
+    page, next_match = sorted_keyset_paginate(matches, MATCH_SORT_KEYS[sort], descending, get_cursor(request), MATCH_PAGE_SIZE)
+    return JsonResponse({
+        'results': [get_match_row(match) for match in page],
+        'next': next_match
+    })
+
+@login_required
+def member_ratings(request, membership_id):
+    """Return the member's rating history between two dates as JSON, downsampled for the chart, only visible to the club's members."""
+    membership = Membership.objects.filter(id=membership_id).first()
+    if membership is None or get_membership(request, membership.club_id) is None:
+        return HttpResponse(status = 403)
+
+    records = EloRatingRecord.objects.filter(membership=membership)
+    try:
+        points = min(int(request.GET.get('points', RATING_CHART_POINTS)), MAX_RATING_CHART_POINTS)
+        if points < MIN_RATING_CHART_POINTS:
+            raise ValueError('points')
+        for parameter, lookup in (('start', 'date__gte'), ('end', 'date__lte')):
+            if request.GET.get(parameter):
+                date = parse_datetime(request.GET[parameter])
+                if date is None:
+                    raise ValueError(parameter)
+                records = records.filter(**{lookup: date})
+    except ValueError:
+        return HttpResponse(status = 400)
+
+    series = [(date.timestamp(), rating) for rating, date in records.order_by('date', 'id').values_list('rating', 'date')]
+    return JsonResponse({
+        'results': [
+            {'date': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(), 'rating': round(rating)}
+            for timestamp, rating in largest_triangle_three_buckets(series, points)
+        ],
+        'count': len(series)
+    })
@@ -0,0 +1,37 @@
+"""Form widgets for the clubs app."""
+from urllib.parse import urlencode
+
+from django import forms
+from django.urls import reverse
+
+class AutocompleteMixin:
+    """Render only the selected choices of a model choice field, the other choices are suggested by an autocomplete endpoint as the user types."""
+
+    template_name = 'widgets/autocomplete.html'
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.query = {}
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        url = reverse(self.url_name)
+        context['widget']['autocomplete_url'] = f'{url}?{urlencode(self.query)}' if self.query else url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        """Return the options of the selected values only, instead of loading every choice."""
+        selected = [v for v in value if v not in ('', None)]
+        options = []
+        if selected:
+            for index, obj in enumerate(self.choices.queryset.filter(pk__in=selected)):
+                option_value, label = self.choices.choice(obj)
+                options.append(self.create_option(name, option_value, label, True, index, attrs=attrs))
+        return [(None, options, 0)]
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    """Select a single object suggested by an autocomplete endpoint."""
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    """Select several objects suggested by an autocomplete endpoint."""
@@ -44,11 +44,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clubs.middleware.MetricsMiddleware',
+    'clubs.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'clubs.middleware.QueryProfilingMiddleware',
+    'clubs.middleware.SlowQueryLogMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'clubs.middleware.MembershipMiddleware',
+    'clubs.middleware.CProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +63,7 @@ ROOT_URLCONF = 'system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'clubs.profiling.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +91,106 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Holds the versioned template fragments of the club and tournament dashboards
+
+CACHES = {
+    'default': {
+        'BACKEND': 'clubs.metrics.InstrumentedLocMemCache',
+    },
+}
+
+
+# Query profiling
+# Off by default, records the queries of each request and logs N+1 statements and views over their query budget
+
+QUERY_PROFILING = False
+
+# Number of runs of the same normalised statement in one request that is logged as an N+1 query
+QUERY_DUPLICATE_THRESHOLD = 3
+
+# Maximum number of queries per request to each view, by URL name, measured on the data of seed --size small --simulate-results
+QUERY_BUDGETS = {
+    'club_dashboard': 6,
+    # 11 on the seeded tournaments, which are all finished or open to signups, and up to 4 more for the stage checks of one in its elimination rounds
+    'tournament_dashboard': 15,
+    'member_profile': 7,
+    'user_dashboard': 4,
+}
+
+# Raise QueryBudgetExceeded instead of logging a warning, to fail the tests of views going over their budget
+QUERY_BUDGET_STRICT = False
+
+# Number of latest requests to each view whose timings are kept by each process, to compute its latency percentiles
+LATENCY_BUFFER_SIZE = 1000
+
+
+# Prometheus metrics
+# Off unless METRICS_ENABLED=1 is set, so tests and management commands do not write to the metrics file.
+# Summed across worker processes in a local SQLite file, and served at /metrics to staff and the allowed addresses
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+
+METRICS_DATABASE = os.environ.get('METRICS_DATABASE', BASE_DIR / 'metrics.sqlite3')
+
+# Seconds between the writes of a process' samples to METRICS_DATABASE, so workers do not queue on its lock every request
+METRICS_FLUSH_INTERVAL = 10
+
+# Comma separated REMOTE_ADDR of the scrapers, empty by default since behind a proxy every client has the proxy's address
+METRICS_ALLOWED_IPS = [address for address in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if address]
+
+
+# Request profiling
+# Staff can run a request under cProfile with a profile query parameter or an X-Profile header
+
+PROFILING_DIRECTORY = os.environ.get('PROFILING_DIRECTORY', BASE_DIR / 'profiles')
+
+# Number of latest profiles kept on disk, older ones are deleted
+PROFILING_MAX_FILES = 50
+
+# Number of functions taking the most cumulative time listed in the X-Profile-Summary header, and in profile reports
+PROFILING_SUMMARY_FUNCTIONS = 10
+PROFILING_REPORT_FUNCTIONS = 50
+
+
+# Slow query log
+# Queries slower than the threshold, in milliseconds, are logged with their plan as JSON lines to a rotating log file,
+# whose latest entries are shown to staff at /monitoring/slow_queries. A threshold of None turns the log off
+
+SLOW_QUERY_THRESHOLD = 100
+
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', BASE_DIR / 'slow_queries.log')
+
+# Number of latest entries of the log shown to staff
+SLOW_QUERY_PAGE_SIZE = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'clubs.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -28,6 +28,8 @@ urlpatterns = [
     path('user_profile/<int:user_id>/<int:membership_id>', views.user_profile, name='user_profile'),
     
     path('member_profile/<int:membership_id>', views.member_profile, name='member_profile'),
+    path('member_profile/<int:membership_id>/matches', views.member_matches, name='member_matches'),
+    path('member_profile/<int:membership_id>/ratings', views.member_ratings, name='member_ratings'),
 
     path('log_in/', views.log_in, name='log_in'),
     path('log_out/', views.log_out, name='log_out'),
@@ -37,7 +39,13 @@ urlpatterns = [
 
     path('new_club/', views.club_creation, name='new_club'),
     path('available_clubs/', views.available_clubs, name='available_clubs'),
+    path('club_search/', views.club_search, name='club_search'),
+    path('autocomplete/users', views.autocomplete_users, name='autocomplete_users'),
+    path('autocomplete/clubs', views.autocomplete_clubs, name='autocomplete_clubs'),
     path('club/<int:club_id>', views.club_dashboard, name='club_dashboard'),
+    path('club/<int:club_id>/tournaments', views.club_tournaments_panel, name='club_tournaments_panel'),
+    path('club/<int:club_id>/members', views.club_members_panel, name='club_members_panel'),
+    path('club/<int:club_id>/applications', views.club_applications_panel, name='club_applications_panel'),
 
     path('club_memberships/', views.club_memberships, name='club_memberships'),
     path('my_applications/', views.my_applications, name='my_applications'),
@@ -61,5 +69,10 @@ urlpatterns = [
     path('tournament/<int:tournament_id>/join', views.join_tournament, name='join_tournament'),
     path('tournament/<int:tournament_id>/leave', views.leave_tournament, name='leave_tournament'),
     path('tournament/<int:tournament_id>/cancel', views.cancel_tournament, name='cancel_tournament'),
-    path('tournament/<int:tournament_id>/generate_matches', views.generate_matches, name='generate_matches')
+    path('tournament/<int:tournament_id>/generate_matches', views.generate_matches, name='generate_matches'),
+
+    path('monitoring/latency', views.latency_percentiles, name='latency_percentiles'),
+    path('monitoring/profiles/<str:name>', views.profile_report, name='profile_report'),
+    path('monitoring/slow_queries', views.slow_queries, name='slow_queries'),
+    path('metrics', views.metrics, name='metrics')
 ]